@@ -4,7 +4,7 @@
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
--- Tasks table
+-- Tasks table (Marcus adds later columns to existing databases, see SCHEMA_MIGRATIONS in task_repository.py)
 CREATE TABLE IF NOT EXISTS tasks (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     title TEXT NOT NULL,
@@ -14,7 +14,9 @@ CREATE TABLE IF NOT EXISTS tasks (
     due_date TIMESTAMP,
     created_by TEXT,
     created_at TIMESTAMP DEFAULT NOW(),
-    updated_at TIMESTAMP DEFAULT NOW()
+    updated_at TIMESTAMP DEFAULT NOW(),
+    version INTEGER NOT NULL DEFAULT 1,
+    depends_on UUID[] NOT NULL DEFAULT '{}'
 );
 
 -- Files table
@@ -49,6 +51,7 @@ CREATE TABLE IF NOT EXISTS events (
 CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
 CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority);
 CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks(due_date);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_files_type ON files(file_type);
 CREATE INDEX IF NOT EXISTS idx_files_tags ON files USING GIN(tags);
 CREATE INDEX IF NOT EXISTS idx_events_type ON events(event_type);
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Hub proxy benchmark
+Compares the Hub-side CPU time and peak memory of relaying a large task listing
+by decoding/validating/re-encoding it versus forwarding the upstream bytes.
+
+Usage: python scripts/bench_hub_proxy.py [items] [rounds]
+"""
+
+import sys
+import json
+import time
+import uuid
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shared.models import TaskListResponse  # noqa: E402
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def build_listing(items: int) -> bytes:
+    """Upstream body as Marcus would send it"""
+    now = datetime.utcnow().isoformat()
+    tasks = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Task {i}",
+            "description": "Scene asset review and sign-off for the episode checklist",
+            "status": "pending",
+            "priority": "medium",
+            "due_date": now,
+            "created_by": "marcus",
+            "created_at": now,
+            "updated_at": now
+        }
+        for i in range(items)
+    ]
+    return json.dumps({"success": True, "message": "Tasks retrieved successfully", "data": tasks}).encode()
+
+
+def decode_and_reencode(body: bytes) -> int:
+    """Previous Hub behaviour: response.json(), model validation, response_model serialization"""
+    parsed = json.loads(body)
+    model = TaskListResponse(**parsed)
+    return len(json.dumps(model.model_dump(mode="json")).encode())
+
+
+def pass_through(body: bytes) -> int:
+    """Pass-through mode: forward the upstream bytes chunk by chunk"""
+    view = memoryview(body)
+    sent = 0
+    for start in range(0, len(view), CHUNK_SIZE):
+        sent += len(view[start:start + CHUNK_SIZE])
+    return sent
+
+
+def measure(label: str, fn, body: bytes, rounds: int) -> None:
+    started = time.process_time()
+    for _ in range(rounds):
+        fn(body)
+    cpu_ms = (time.process_time() - started) / rounds * 1000
+
+    # Separate pass: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} cpu {cpu_ms:9.2f} ms/request   peak mem {peak / 1024 / 1024:8.2f} MiB")
+
+
+if __name__ == "__main__":
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    body = build_listing(items)
+    print(f"{items} tasks, {len(body) / 1024 / 1024:.2f} MiB upstream body, {rounds} rounds")
+    measure("decode + re-encode", decode_and_reencode, body, rounds)
+    measure("pass-through", pass_through, body, rounds)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+n8n dispatcher benchmark
+Fires a burst of workflow triggers at the local n8n stand-in, first the old way
+(a fresh client and one webhook per event) and then through the shared dispatcher,
+and compares wall time, webhook requests and peak concurrency at the receiver.
+
+Usage: python scripts/bench_n8n_dispatcher.py [events] [--latency-ms 50] [--failure-rate 0.0]
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from shared.n8n import N8nDispatcher  # noqa: E402
+from n8n_standin import create_standin  # noqa: E402
+
+
+PORT = 5679
+URL = f"http://127.0.0.1:{PORT}"
+WORKFLOWS = ["task-created", "task-updated", "task-deleted"]
+
+
+def start_standin(latency_ms: float, failure_rate: float) -> None:
+    config = uvicorn.Config(create_standin(latency_ms, failure_rate), host="127.0.0.1", port=PORT, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+async def per_event(events: int) -> int:
+    """Previous behaviour: every trigger opens its own client and posts on its own"""
+    async def fire(i: int) -> bool:
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(f"{URL}/webhook/{WORKFLOWS[i % 3]}", json={"id": i}, timeout=10.0)
+                return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    return sum(await asyncio.gather(*(fire(i) for i in range(events))))
+
+
+async def dispatched(events: int) -> int:
+    """Dispatcher: pooled client, per-workflow batches, retries, capped concurrency"""
+    dispatcher = N8nDispatcher(base_url=URL, api_key="local", batch_workflows=WORKFLOWS)
+    results = await asyncio.gather(*(dispatcher.dispatch(WORKFLOWS[i % 3], {"id": i}) for i in range(events)))
+    await dispatcher.close()
+    return sum(1 for result in results if result["success"])
+
+
+async def run(label: str, fn, events: int) -> None:
+    async with httpx.AsyncClient(base_url=URL) as control:
+        await control.delete("/stats")
+        started = time.perf_counter()
+        delivered = await fn(events)
+        elapsed = time.perf_counter() - started
+        stats = (await control.get("/stats")).json()
+    print(f"{label:<12} {elapsed:7.2f}s  delivered {delivered:>5}/{events}  "
+          f"requests {stats['requests']:>5}  peak concurrency {stats['peak_in_flight']:>4}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark n8n webhook delivery")
+    parser.add_argument("events", type=int, nargs="?", default=1000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    start_standin(args.latency_ms, args.failure_rate)
+    print(f"{args.events} events over {len(WORKFLOWS)} workflows, {args.latency_ms}ms webhook latency, "
+          f"{args.failure_rate:.0%} failures")
+    asyncio.run(run("per-event", per_event, args.events))
+    asyncio.run(run("dispatcher", dispatched, args.events))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Service response encoding benchmark
+Compares stdlib json against orjson for rendering typical SkyRas responses, and the
+wire size and CPU cost of gzip and brotli at the levels the services use.
+
+Usage: python scripts/bench_service_encoding.py [rounds]
+"""
+
+import sys
+import json
+import time
+import uuid
+import zlib
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+
+def task_listing(items: int = 10000) -> dict:
+    """Marcus GET /api/tasks"""
+    now = datetime.utcnow().isoformat()
+    return {
+        "success": True,
+        "message": "Tasks retrieved successfully",
+        "data": [
+            {
+                "id": str(uuid.uuid4()),
+                "title": f"Task {i}",
+                "description": "Scene asset review and sign-off for the episode checklist",
+                "status": "pending",
+                "priority": "medium",
+                "due_date": now,
+                "created_by": "marcus",
+                "created_at": now,
+                "updated_at": now
+            }
+            for i in range(items)
+        ]
+    }
+
+
+def search_results(items: int = 500) -> dict:
+    """Letitia POST /api/search"""
+    now = datetime.utcnow().isoformat()
+    return {
+        "success": True,
+        "message": f"Found {items} files",
+        "data": [
+            {
+                "id": str(uuid.uuid4()),
+                "filename": f"skysky_ep{i % 40:03d}_scene{i % 12:02d}.png",
+                "original_name": f"scene {i}.png",
+                "file_type": "image",
+                "mime_type": "image/png",
+                "size": 1048576 + i,
+                "path": f"/app/storage/assets/skysky_ep{i % 40:03d}_scene{i % 12:02d}.png",
+                "tags": ["skysky", "scene", f"episode-{i % 40}"],
+                "metadata": {"width": 1920, "height": 1080},
+                "uploaded_by": "letitia",
+                "created_at": now,
+                "updated_at": now
+            }
+            for i in range(items)
+        ]
+    }
+
+
+def batch_generation(items: int = 50) -> dict:
+    """Giorgio POST /api/generate/batch"""
+    now = datetime.utcnow().isoformat()
+    return {
+        "success": True,
+        "message": f"Generated {items} assets",
+        "data": {
+            "results": [
+                {
+                    "type": "image",
+                    "prompt": "SkySky floating over a pastel city at dawn, storybook style",
+                    "filepath": f"/app/generated/images/skysky_{uuid.uuid4().hex}.png",
+                    "provider": "openai",
+                    "generated_at": now,
+                    "metadata": {"size": "1024x1024", "quality": "standard", "style": "vivid"}
+                }
+                for _ in range(items)
+            ]
+        }
+    }
+
+
+def encode_json(payload: dict) -> bytes:
+    return json.dumps(payload).encode()
+
+
+def encode_orjson(payload: dict) -> bytes:
+    return orjson.dumps(payload)
+
+
+def timed(fn, arg, rounds: int):
+    started = time.process_time()
+    for _ in range(rounds):
+        result = fn(arg)
+    return result, (time.process_time() - started) / rounds * 1000
+
+
+def bench(name: str, payload: dict, rounds: int) -> None:
+    body, json_ms = timed(encode_json, payload, rounds)
+    print(f"\n{name}: {len(body) / 1024:.1f} KiB")
+    print(f"  {'json.dumps':<16} {json_ms:8.2f} ms")
+    if orjson is not None:
+        _, orjson_ms = timed(encode_orjson, payload, rounds)
+        print(f"  {'orjson.dumps':<16} {orjson_ms:8.2f} ms   ({json_ms / orjson_ms:.1f}x)")
+
+    gzipped, gzip_ms = timed(lambda b: zlib.compress(b, GZIP_LEVEL, 31), body, rounds)
+    print(f"  {f'gzip -{GZIP_LEVEL}':<16} {gzip_ms:8.2f} ms   {len(gzipped) / 1024:8.1f} KiB "
+          f"({len(body) / len(gzipped):.1f}x smaller)")
+    if brotli is not None:
+        compressed, br_ms = timed(lambda b: brotli.compress(b, quality=BROTLI_QUALITY), body, rounds)
+        print(f"  {f'br q{BROTLI_QUALITY}':<16} {br_ms:8.2f} ms   {len(compressed) / 1024:8.1f} KiB "
+              f"({len(body) / len(compressed):.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{rounds} rounds, orjson {'available' if orjson else 'missing'}, "
+          f"brotli {'available' if brotli else 'missing'}")
+    bench("task listing (10k tasks)", task_listing(), rounds)
+    bench("search results (500 files)", search_results(), rounds)
+    bench("batch generation (50 assets)", batch_generation(), rounds)
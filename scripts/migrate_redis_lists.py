@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Redis list to sorted set migration
+One-shot conversion of the tasks:list, files:list, episodes:list and
+episode:<id>:scenes lists into the sorted sets the services now read.
+
+Safe to re-run: keys that are already converted are skipped.
+
+Usage: REDIS_URL=redis://... python scripts/migrate_redis_lists.py [--dry-run]
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "services" / "marcus"))
+
+from shared.redis_client import get_redis_client  # noqa: E402
+from shared.pagination import timestamp_score  # noqa: E402
+from task_index import TaskIndex  # noqa: E402
+
+
+def load(redis_client, prefix: str, ids: list) -> list:
+    """(id, document) pairs for the ids whose document still exists"""
+    documents = redis_client.mget([f"{prefix}:{item_id}" for item_id in ids])
+    return [(item_id, document) for item_id, document in zip(ids, documents) if document]
+
+
+def migrate_tasks(redis_client, dry_run: bool) -> int:
+    """tasks:list -> tasks:by_created plus the status/priority/due-date indexes"""
+    client = redis_client.client
+    if client.type("tasks:list") != "list":
+        return 0
+
+    tasks = load(redis_client, "task", redis_client.lrange("tasks:list", 0, -1))
+    if not dry_run:
+        pipe = client.pipeline()
+        index = TaskIndex(redis_client)
+        for _, task in tasks:
+            index.add(pipe, task)
+        pipe.delete("tasks:list")
+        pipe.execute()
+    return len(tasks)
+
+
+def migrate_scored(redis_client, list_key: str, prefix: str, target_key: str,
+                   timestamp_field: str, dry_run: bool) -> int:
+    """A list of ids -> a sorted set scored by each document's timestamp"""
+    client = redis_client.client
+    if client.type(list_key) != "list":
+        return 0
+
+    items = load(redis_client, prefix, redis_client.lrange(list_key, 0, -1))
+    if not dry_run:
+        pipe = client.pipeline()
+        if items:
+            pipe.zadd(target_key, {item_id: timestamp_score(document[timestamp_field]) for item_id, document in items})
+        pipe.delete(list_key)
+        pipe.execute()
+    return len(items)
+
+
+def migrate_scenes(redis_client, dry_run: bool) -> int:
+    """episode:<id>:scenes lists -> sorted sets (same key) scored by scene number"""
+    client = redis_client.client
+    migrated = 0
+    for key in client.scan_iter(match="episode:*:scenes", count=500):
+        if client.type(key) != "list":
+            continue
+        scenes = load(redis_client, "scene", redis_client.lrange(key, 0, -1))
+        if not dry_run:
+            # Same key changes type, so swap it in one transaction
+            pipe = client.pipeline()
+            pipe.delete(key)
+            if scenes:
+                pipe.zadd(key, {scene_id: scene["scene_number"] for scene_id, scene in scenes})
+            pipe.execute()
+        migrated += len(scenes)
+    return migrated
+
+
+if __name__ == "__main__":
+    dry_run = "--dry-run" in sys.argv
+    redis_client = get_redis_client()
+
+    print(f"🔁 Migrating Redis lists to sorted sets{' (dry run)' if dry_run else ''}")
+    print(f"  tasks:    {migrate_tasks(redis_client, dry_run)}")
+    print(f"  files:    {migrate_scored(redis_client, 'files:list', 'file', 'files:by_uploaded', 'uploaded_at', dry_run)}")
+    print(f"  episodes: {migrate_scored(redis_client, 'episodes:list', 'episode', 'episodes:by_created', 'created_at', dry_run)}")
+    print(f"  scenes:   {migrate_scenes(redis_client, dry_run)}")
+    print("✅ Done")
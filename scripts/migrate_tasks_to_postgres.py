@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Redis to PostgreSQL task backfill
+One-shot copy of the tasks Marcus stored in Redis alone into the tasks table,
+for switching an existing deployment over to DATABASE_URL.
+
+Run it before (or right after) Marcus first starts with DATABASE_URL set; tasks
+in Redis are invisible to Marcus until they are copied. Safe to re-run: tasks
+already in PostgreSQL are left as they are. Redis is not modified, so unsetting
+DATABASE_URL still returns to the Redis-only store.
+
+Run scripts/migrate_redis_lists.py first if tasks:list still exists.
+
+Usage: REDIS_URL=redis://... DATABASE_URL=postgresql://... python scripts/migrate_tasks_to_postgres.py [--dry-run]
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "services" / "marcus"))
+
+from pydantic import ValidationError  # noqa: E402
+
+from shared.redis_client import get_redis_client  # noqa: E402
+from shared.models import Task  # noqa: E402
+from task_index import CREATED_KEY  # noqa: E402
+from task_repository import TaskRepository, INSERT_TASK_SQL, _task_to_row  # noqa: E402
+
+BATCH_SIZE = 500
+
+BACKFILL_TASK_SQL = f"{INSERT_TASK_SQL.strip()} ON CONFLICT (id) DO NOTHING"
+
+
+async def backfill(dry_run: bool) -> None:
+    redis_client = get_redis_client()
+    repository = TaskRepository(redis_client)
+    if not repository.database_url:
+        sys.exit("DATABASE_URL is not set")
+    await repository.start()
+    if not repository.uses_database:
+        sys.exit("Could not connect to PostgreSQL (is asyncpg installed?)")
+
+    total = redis_client.client.zcard(CREATED_KEY)
+    print(f"🔁 Copying {total} Redis tasks to PostgreSQL{' (dry run)' if dry_run else ''}")
+    copied = skipped = invalid = 0
+    try:
+        for start in range(0, total, BATCH_SIZE):
+            task_ids = redis_client.zrange(CREATED_KEY, start, start + BATCH_SIZE - 1)
+            rows = []
+            for task_id, document in zip(task_ids, redis_client.mget([f"task:{task_id}" for task_id in task_ids])):
+                if not document:
+                    continue
+                try:
+                    # Older documents predate version and depends_on; the model fills the defaults
+                    rows.append(_task_to_row(Task.model_validate(document).model_dump(mode="json")))
+                except (ValidationError, ValueError, KeyError) as e:
+                    invalid += 1
+                    print(f"  ⚠️ Skipping task {task_id}: {str(e).splitlines()[0]}")
+
+            if dry_run or not rows:
+                copied += len(rows)
+                continue
+            async with repository.pool.acquire() as conn:
+                async with conn.transaction():
+                    before = await conn.fetchval("SELECT count(*) FROM tasks WHERE id = ANY($1::uuid[])",
+                                                 [row[0] for row in rows])
+                    await conn.executemany(BACKFILL_TASK_SQL, rows)
+            copied += len(rows) - before
+            skipped += before
+    finally:
+        await repository.close()
+
+    print(f"  copied:  {copied}")
+    print(f"  already: {skipped}")
+    print(f"  invalid: {invalid}")
+    print("✅ Done")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill("--dry-run" in sys.argv))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Local n8n stand-in
+Accepts n8n webhook calls (POST /webhook/<workflow>) with configurable latency and
+failure rate, and counts requests and delivered items, so webhook delivery can be
+exercised and benchmarked without an n8n instance.
+
+Usage: python scripts/n8n_standin.py [--port 5678] [--latency-ms 50] [--failure-rate 0.0]
+Point Marcus at it with N8N_URL=http://localhost:5678 N8N_API_KEY=local
+"""
+
+import random
+import asyncio
+import argparse
+from collections import Counter
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request, Response
+
+
+def create_standin(latency_ms: float = 50.0, failure_rate: float = 0.0) -> FastAPI:
+    app = FastAPI(title="n8n stand-in")
+    stats: Dict[str, Any] = {"requests": 0, "items": 0, "failures": 0, "in_flight": 0, "peak_in_flight": 0,
+                             "by_workflow": Counter()}
+
+    @app.post("/webhook/{workflow}")
+    async def webhook(workflow: str, request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+        try:
+            await asyncio.sleep(latency_ms / 1000)
+            if random.random() < failure_rate:
+                stats["failures"] += 1
+                return Response(status_code=503)
+
+            items = body["count"] if isinstance(body, dict) and "items" in body else 1
+            stats["items"] += items
+            stats["by_workflow"][workflow] += items
+            return {"received": items}
+        finally:
+            stats["in_flight"] -= 1
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.delete("/stats")
+    async def reset_stats():
+        stats.update(requests=0, items=0, failures=0, in_flight=0, peak_in_flight=0, by_workflow=Counter())
+        return stats
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local n8n webhook stand-in")
+    parser.add_argument("--port", type=int, default=5678)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(f"🔗 n8n stand-in on :{args.port} ({args.latency_ms}ms latency, {args.failure_rate:.0%} failures)")
+    uvicorn.run(create_standin(args.latency_ms, args.failure_rate), host="0.0.0.0", port=args.port, log_level="warning")
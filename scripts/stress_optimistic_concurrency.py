@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Optimistic concurrency stress test
+Runs many concurrent read -> conditional write loops against a running Marcus and
+checks that no update was lost: every writer increments a counter with If-Match and
+retries on 409, so the final counter and version must account for every increment.
+
+Pass --url more than once to spread the writers over several Marcus processes.
+
+Usage: python scripts/stress_optimistic_concurrency.py [--url http://localhost:8001 ...] [--workers 20] [--increments 10]
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+from typing import List
+
+import httpx
+
+
+async def increment_task(client: httpx.AsyncClient, task_id: str, increments: int) -> int:
+    """Increment the counter kept in the task description; returns the 409s seen"""
+    conflicts = 0
+    done = 0
+    while done < increments:
+        response = await client.get(f"/api/tasks/{task_id}")
+        response.raise_for_status()
+        counter = int(response.json()["data"]["description"])
+
+        response = await client.put(
+            f"/api/tasks/{task_id}",
+            json={"description": str(counter + 1)},
+            headers={"If-Match": response.headers["ETag"]}
+        )
+        if response.status_code == 409:
+            conflicts += 1
+            continue
+        response.raise_for_status()
+        done += 1
+    return conflicts
+
+
+async def touch_scene(client: httpx.AsyncClient, episode_id: str, increments: int) -> int:
+    """Rewrite scene 1's status under If-Match; returns the 409s seen"""
+    conflicts = 0
+    done = 0
+    while done < increments:
+        response = await client.get(f"/api/skysky/episodes/{episode_id}")
+        response.raise_for_status()
+        scene = response.json()["data"]["episode"]["scenes"][0]
+
+        response = await client.put(
+            f"/api/skysky/episodes/{episode_id}/scene",
+            json={"scene_number": scene["scene_number"], "status": "in_progress"},
+            headers={"If-Match": f'"{scene["version"]}"'}
+        )
+        if response.status_code == 409:
+            conflicts += 1
+            continue
+        response.raise_for_status()
+        done += 1
+    return conflicts
+
+
+async def run(urls: List[str], workers: int, increments: int) -> bool:
+    expected = workers * increments
+    ok = True
+    clients = [httpx.AsyncClient(base_url=url, timeout=30.0) for url in urls]
+    # Writer i talks to clients[i % len(clients)]
+    writers = [clients[i % len(clients)] for i in range(workers)]
+    client = clients[0]
+    try:
+        response = await client.post("/api/tasks", json={"title": "Concurrency stress", "description": "0"})
+        response.raise_for_status()
+        task_id = response.json()["data"]["id"]
+
+        started = time.perf_counter()
+        conflicts = sum(await asyncio.gather(*(increment_task(writer, task_id, increments) for writer in writers)))
+        elapsed = time.perf_counter() - started
+
+        task = (await client.get(f"/api/tasks/{task_id}")).json()["data"]
+        counter, version = int(task["description"]), task["version"]
+        lost = expected - counter
+        print(f"task   {workers}x{increments} writes in {elapsed:6.2f}s, {conflicts} conflicts retried, "
+              f"counter {counter}/{expected}, version {version}, lost {lost}")
+        ok = ok and lost == 0 and version == expected + 1
+
+        response = await client.post("/api/skysky/episodes", json={
+            "title": "Concurrency stress", "episode_number": 0, "theme": "stress", "tagline": "stress"
+        })
+        response.raise_for_status()
+        episode_id = response.json()["data"]["episode_id"]
+
+        started = time.perf_counter()
+        conflicts = sum(await asyncio.gather(*(touch_scene(writer, episode_id, increments) for writer in writers)))
+        elapsed = time.perf_counter() - started
+
+        scene = (await client.get(f"/api/skysky/episodes/{episode_id}")).json()["data"]["episode"]["scenes"][0]
+        lost = expected + 1 - scene["version"]
+        print(f"scene  {workers}x{increments} writes in {elapsed:6.2f}s, {conflicts} conflicts retried, "
+              f"version {scene['version']}/{expected + 1}, lost {lost}")
+        ok = ok and lost == 0
+    finally:
+        for writer_client in clients:
+            await writer_client.aclose()
+
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", action="append", dest="urls")
+    parser.add_argument("--workers", type=int, default=20)
+    parser.add_argument("--increments", type=int, default=10)
+    args = parser.parse_args()
+
+    if asyncio.run(run(args.urls or ["http://localhost:8001"], args.workers, args.increments)):
+        print("✅ No lost updates")
+    else:
+        print("❌ Lost updates detected")
+        sys.exit(1)
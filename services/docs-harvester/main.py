@@ -1,15 +1,16 @@
 import os
 from datetime import datetime
 from typing import Optional
-from fastapi import FastAPI, HTTPException
+from fastapi import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
 from models import HarvestRequest
 from storage.supabase import SupabaseStore
 from harvesters.dispatch import run_harvest
 from export.markdown import export_markdown
+from shared.asgi import create_app
 
-app = FastAPI(title="Docs Harvester Agent", version="1.0.0")
+app = create_app(title="Docs Harvester Agent", version="1.0.0")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"], allow_credentials=True)
 
 store = SupabaseStore()
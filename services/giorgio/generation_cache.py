@@ -0,0 +1,258 @@
+"""
+SkyRas v2 Giorgio Generation Cache
+Content-addressed store of generated assets so identical requests are not paid for twice
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import asyncio
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from shared.redis_client import RedisClient, get_redis_client
+
+
+ENTRY_KEY = "generation_cache:{}"        # hash: provider, path, size, metadata, created_at, hits
+LRU_KEY = "generation_cache:lru"         # zset: cache key -> last used
+BYTES_KEY = "generation_cache:bytes"     # total size of the stored blobs
+STATS_KEY = "generation_cache:stats"     # hash: <provider>:<hits|misses|forced|stores|evictions>
+
+# Result fields that describe one particular request rather than the generated asset
+REQUEST_FIELDS = ('success', 'file_path', 'context', 'audio_data', 'cached', 'cache_key')
+
+# Provider download links expire, so they are never kept; a hit links to the cached
+# blob instead (see blob_url)
+URL_FIELDS = ('image_url', 'video_url', 'audio_url')
+
+# The size swap is read and written in one step, so concurrent stores of the same key
+# can't double count. Returns the path the entry had before, if any
+STORE_SCRIPT = """
+local previous = redis.call('HMGET', KEYS[1], 'size', 'path')
+redis.call('HSET', KEYS[1], 'provider', ARGV[2], 'path', ARGV[3], 'size', ARGV[4],
+           'metadata', ARGV[5], 'created_at', ARGV[6], 'hits', 0)
+redis.call('ZADD', KEYS[2], ARGV[6], ARGV[1])
+redis.call('INCRBY', KEYS[3], tonumber(ARGV[4]) - tonumber(previous[1] or 0))
+redis.call('HINCRBY', KEYS[4], ARGV[2] .. ':stores', 1)
+return previous[2]
+"""
+
+# Drops an entry only if it is still the one the caller looked at (same created_at),
+# and only counts its bytes off when this call is the one that deleted it
+DROP_SCRIPT = """
+local entry = redis.call('HMGET', KEYS[1], 'size', 'created_at')
+if not entry[1] or entry[2] ~= ARGV[2] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('DECRBY', KEYS[3], entry[1])
+return 1
+"""
+
+# Pops and drops the least recently used entry while over budget; returns its blob
+# path so the caller can delete the file. LRU members whose entry is already gone
+# are discarded without touching the byte count. The entry key is built from the
+# popped member, so this assumes a single Redis rather than a cluster
+EVICT_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[2]) or 0) <= tonumber(ARGV[1]) then
+    return false
+end
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then
+    return false
+end
+local entry_key = ARGV[2] .. popped[1]
+local entry = redis.call('HMGET', entry_key, 'size', 'path', 'provider')
+if not entry[1] then
+    return ''
+end
+redis.call('DEL', entry_key)
+redis.call('DECRBY', KEYS[2], entry[1])
+redis.call('HINCRBY', KEYS[3], entry[3] .. ':evictions', 1)
+return entry[2]
+"""
+
+# Marks a hit without recreating an entry that was dropped since it was read
+TOUCH_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('ZADD', KEYS[2], ARGV[1], ARGV[2])
+redis.call('HINCRBY', KEYS[1], 'hits', 1)
+return 1
+"""
+
+
+class GenerationCache:
+    """Generated assets keyed by a hash of provider, model, prompt, voice and settings
+
+    Blobs live under their own directory (GENERATION_CACHE_DIR) so evicting one never
+    touches an episode's files; a hit is copied into the requesting episode's folder.
+    The index, LRU order and hit counters are in Redis, shared by every replica that
+    mounts the same directory. The least recently used blobs are evicted once the
+    total exceeds GENERATION_CACHE_MAX_MB. If Redis is unreachable every lookup is
+    a miss.
+
+    Provider download URLs are not cached since they expire. With GIORGIO_PUBLIC_URL
+    set, a blob is served by Giorgio at a stable URL (blob_url) that can be handed to
+    another provider instead, e.g. a cached background for HeyGen.
+    """
+
+    def __init__(self, redis_client: RedisClient = None, cache_dir: str = None, max_bytes: int = None):
+        self.redis_client = redis_client or get_redis_client()
+        skysky_root = os.getenv('SKYSKY_ROOT', '/mnt/qnap/SkySkyShow')
+        self.cache_dir = Path(cache_dir or os.getenv('GENERATION_CACHE_DIR', os.path.join(skysky_root, '.generation_cache')))
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv('GENERATION_CACHE_MAX_MB', '20480')) * 1024 * 1024)
+        self.public_url = os.getenv('GIORGIO_PUBLIC_URL', '').rstrip('/')
+
+        client = self.redis_client.client
+        self.store_script = client.register_script(STORE_SCRIPT)
+        self.drop_script = client.register_script(DROP_SCRIPT)
+        self.evict_script = client.register_script(EVICT_SCRIPT)
+        self.touch_script = client.register_script(TOUCH_SCRIPT)
+
+    @staticmethod
+    def key(provider: str, prompt: str, model: str = None, voice: str = None,
+            settings: Dict[str, Any] = None) -> str:
+        """Cache key for a request: the provider plus a digest of everything that shapes the output"""
+        request = {'model': model, 'prompt': prompt, 'voice': voice, 'settings': settings or {}}
+        digest = hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+        return f"{provider}:{digest}"
+
+    async def fetch(self, key: str, destination: Path, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Copy a cached asset to destination and return it as a generation result, or None on a miss"""
+        provider = key.split(':', 1)[0]
+        if self.max_bytes <= 0:
+            return None
+        try:
+            client = self.redis_client.client
+            if force:
+                client.hincrby(STATS_KEY, f"{provider}:forced", 1)
+                return None
+
+            entry = client.hgetall(ENTRY_KEY.format(key))
+            if not entry or not os.path.exists(entry['path']):
+                if entry:
+                    self._drop(key, entry)
+                client.hincrby(STATS_KEY, f"{provider}:misses", 1)
+                return None
+
+            await asyncio.get_running_loop().run_in_executor(None, shutil.copyfile, entry['path'], str(destination))
+
+            self.touch_script(keys=[ENTRY_KEY.format(key), LRU_KEY], args=[time.time(), key])
+            client.hincrby(STATS_KEY, f"{provider}:hits", 1)
+        except Exception as e:
+            print(f"⚠️ Generation cache lookup failed for {provider}: {e}")
+            return None
+
+        print(f"♻️ Reused cached {provider} asset for {destination}")
+        return {
+            **json.loads(entry.get('metadata') or '{}'),
+            'success': True,
+            'file_path': str(destination),
+            'cached': True,
+            'cache_key': key
+        }
+
+    async def store(self, key: str, file_path: str, result: Dict[str, Any]) -> None:
+        """Keep a copy of a freshly generated asset, replacing any earlier one for the same key"""
+        provider, digest = key.split(':', 1)
+        if self.max_bytes <= 0:
+            return
+        blob = self.cache_dir / provider / digest[:2] / f"{digest}{Path(file_path).suffix}"
+        try:
+            size = await asyncio.get_running_loop().run_in_executor(None, self._copy_in, file_path, blob)
+            metadata = {}
+            for field, value in result.items():
+                if field in REQUEST_FIELDS or field in URL_FIELDS:
+                    continue
+                try:
+                    json.dumps(value)
+                except (TypeError, ValueError):
+                    continue
+                metadata[field] = value
+
+            previous_path = self.store_script(
+                keys=[ENTRY_KEY.format(key), LRU_KEY, BYTES_KEY, STATS_KEY],
+                args=[key, provider, str(blob), size, json.dumps(metadata), time.time()]
+            )
+            if previous_path and previous_path != str(blob):
+                await asyncio.get_running_loop().run_in_executor(None, self._remove, previous_path)
+            await self._evict()
+        except Exception as e:
+            print(f"⚠️ Failed to cache {provider} asset {file_path}: {e}")
+
+    async def _evict(self) -> None:
+        """Drop least recently used blobs until the cache fits its disk budget"""
+        while True:
+            path = self.evict_script(keys=[LRU_KEY, BYTES_KEY, STATS_KEY], args=[self.max_bytes, ENTRY_KEY.format('')])
+            if path is None:
+                break
+            if path:
+                await asyncio.get_running_loop().run_in_executor(None, self._remove, path)
+
+    def _drop(self, key: str, entry: Dict[str, str]) -> bool:
+        """Forget an entry whose blob is missing, unless it was replaced since it was read"""
+        return bool(self.drop_script(keys=[ENTRY_KEY.format(key), LRU_KEY, BYTES_KEY],
+                                     args=[key, entry.get('created_at', '')]))
+
+    def blob_path(self, key: str) -> Optional[str]:
+        """Path of a cached blob that is still on disk"""
+        path = self.redis_client.client.hget(ENTRY_KEY.format(key), 'path')
+        return path if path and os.path.exists(path) else None
+
+    def blob_url(self, key: str) -> Optional[str]:
+        """Stable URL Giorgio serves a cached blob from, if GIORGIO_PUBLIC_URL is set"""
+        if not self.public_url:
+            return None
+        provider, digest = key.split(':', 1)
+        return f"{self.public_url}/api/cache/blobs/{provider}/{digest}"
+
+    @staticmethod
+    def _copy_in(file_path: str, blob: Path) -> int:
+        # Copy then rename, so a reader never sees a half-written blob
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        partial = blob.with_name(f"{blob.name}.{os.getpid()}.partial")
+        shutil.copyfile(file_path, partial)
+        os.replace(partial, blob)
+        return blob.stat().st_size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate per provider plus the cache's current size"""
+        client = self.redis_client.client
+        counters = client.hgetall(STATS_KEY)
+        providers: Dict[str, Dict[str, Any]] = {}
+        for field, value in counters.items():
+            provider, counter = field.rsplit(':', 1)
+            providers.setdefault(provider, {'hits': 0, 'misses': 0, 'forced': 0, 'stores': 0, 'evictions': 0})[counter] = int(value)
+        for counts in providers.values():
+            lookups = counts['hits'] + counts['misses']
+            counts['hit_rate'] = round(counts['hits'] / lookups, 4) if lookups else None
+
+        return {
+            'entries': client.zcard(LRU_KEY),
+            'bytes': int(client.get(BYTES_KEY) or 0),
+            'max_bytes': self.max_bytes,
+            'providers': providers
+        }
+
+
+# Global cache instance
+generation_cache = None
+
+def get_generation_cache() -> GenerationCache:
+    """Get or create the global generation cache"""
+    global generation_cache
+    if generation_cache is None:
+        generation_cache = GenerationCache()
+    return generation_cache
@@ -10,6 +10,11 @@ from typing import Dict, Any, List, Optional
 from pathlib import Path
 import yaml
 
+from shared.governor import get_governor
+from generation_cache import get_generation_cache
+
+MODEL_ID = "eleven_monolingual_v1"
+
 
 class ElevenLabsGenerator:
     """Generates voice-over audio using ElevenLabs API"""
@@ -22,6 +27,10 @@ class ElevenLabsGenerator:
             "Content-Type": "application/json"
         }
         
+        # Shared rate limit and concurrency quota across Giorgio replicas
+        self.governor = get_governor().provider('elevenlabs')
+        self.cache = get_generation_cache()
+        
         # Load scene templates
         self.templates = self._load_templates()
     
@@ -36,7 +45,7 @@ class ElevenLabsGenerator:
             return {}
     
     async def generate_voice_over(self, character: str, text: str, 
-                                scene_context: str = None) -> Dict[str, Any]:
+                                scene_context: str = None, force_regenerate: bool = False) -> Dict[str, Any]:
         """Generate voice-over for a character"""
         try:
             if not self.api_key:
@@ -49,6 +58,13 @@ class ElevenLabsGenerator:
             
             voice_id = character_config.get('elevenlabs_voice_id', f'{character}_voice')
             
+            # Reuse an identical earlier line unless asked to regenerate
+            cache_key = self.cache.key('elevenlabs', text, model=MODEL_ID, voice=voice_id,
+                                       settings=self._voice_settings(character))
+            cached = await self.cache.fetch(cache_key, self._audio_path(character), force_regenerate)
+            if cached:
+                return cached
+            
             # Generate audio
             result = await self._generate_audio(voice_id, text, character)
             
@@ -56,6 +72,7 @@ class ElevenLabsGenerator:
                 # Save to appropriate folder
                 save_path = await self._save_audio(result['audio_data'], character, scene_context)
                 result['file_path'] = save_path
+                await self.cache.store(cache_key, save_path, result)
             
             return result
             
@@ -79,7 +96,8 @@ class ElevenLabsGenerator:
             result = await self.generate_voice_over(
                 character=character,
                 text=text,
-                scene_context=scene_data.get('description', '')
+                scene_context=scene_data.get('description', ''),
+                force_regenerate=scene_data.get('force_regenerate', False)
             )
             
             return result
@@ -129,24 +147,15 @@ class ElevenLabsGenerator:
     async def _generate_audio(self, voice_id: str, text: str, character: str) -> Dict[str, Any]:
         """Call ElevenLabs API to generate audio"""
         try:
-            # Get voice settings from character template
-            character_config = self.templates.get('characters', {}).get(character, {})
-            stability = character_config.get('stability', 0.7)
-            similarity_boost = character_config.get('similarity_boost', 0.8)
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
+            async with self.governor.slot(), httpx.AsyncClient() as client:
+                response = await self.governor.call(
+                    client.post,
                     f"{self.base_url}/text-to-speech/{voice_id}",
                     headers=self.headers,
                     json={
                         "text": text,
-                        "model_id": "eleven_monolingual_v1",
-                        "voice_settings": {
-                            "stability": stability,
-                            "similarity_boost": similarity_boost,
-                            "style": 0.0,
-                            "use_speaker_boost": True
-                        }
+                        "model_id": MODEL_ID,
+                        "voice_settings": self._voice_settings(character)
                     },
                     timeout=60.0
                 )
@@ -172,15 +181,7 @@ class ElevenLabsGenerator:
                          scene_context: str = None) -> str:
         """Save audio to NAS"""
         try:
-            # Determine save path
-            filename = f"{character}_voice_over.mp3"
-            
-            # Create folder structure
-            skysky_root = os.getenv('SKYSKY_ROOT', '/mnt/qnap/SkySkyShow')
-            save_dir = Path(skysky_root) / "Episode_unknown" / "ElevenLabs_VO" / "Scene_01"
-            save_dir.mkdir(parents=True, exist_ok=True)
-            
-            save_path = save_dir / filename
+            save_path = self._audio_path(character)
             
             # Save audio file
             with open(save_path, 'wb') as f:
@@ -191,6 +192,27 @@ class ElevenLabsGenerator:
         except Exception as e:
             raise Exception(f"Failed to save audio: {str(e)}")
     
+    def _voice_settings(self, character: str) -> Dict[str, Any]:
+        """Voice settings from the character template"""
+        character_config = self.templates.get('characters', {}).get(character, {})
+        return {
+            "stability": character_config.get('stability', 0.7),
+            "similarity_boost": character_config.get('similarity_boost', 0.8),
+            "style": 0.0,
+            "use_speaker_boost": True
+        }
+    
+    def _audio_path(self, character: str) -> Path:
+        """Where a voice-over for this character is saved on the NAS"""
+        filename = f"{character}_voice_over.mp3"
+        
+        # Create folder structure
+        skysky_root = os.getenv('SKYSKY_ROOT', '/mnt/qnap/SkySkyShow')
+        save_dir = Path(skysky_root) / "Episode_unknown" / "ElevenLabs_VO" / "Scene_01"
+        save_dir.mkdir(parents=True, exist_ok=True)
+        
+        return save_dir / filename
+    
     def _get_scene_type(self, scene_number: int) -> str:
         """Map scene number to scene type"""
         scene_types = {
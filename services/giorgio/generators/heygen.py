@@ -10,6 +10,9 @@ from typing import Dict, Any, List, Optional
 from pathlib import Path
 import yaml
 
+from shared.governor import get_governor
+from generation_cache import get_generation_cache
+
 
 class HeyGenGenerator:
     """Generates animated videos using HeyGen API"""
@@ -22,6 +25,10 @@ class HeyGenGenerator:
             "Content-Type": "application/json"
         }
         
+        # Shared rate limit and concurrency quota across Giorgio replicas
+        self.governor = get_governor().provider('heygen')
+        self.cache = get_generation_cache()
+        
         # Load scene templates
         self.templates = self._load_templates()
     
@@ -74,6 +81,15 @@ class HeyGenGenerator:
                 "aspect_ratio": "9:16"
             }
             
+            # Reuse an identical earlier render unless asked to regenerate
+            video_input = video_request['video_inputs'][0]
+            cache_key = self.cache.key('heygen', video_input['voice']['input_text'],
+                                       model=video_input['character']['avatar_id'],
+                                       voice=video_input['voice']['voice_id'], settings=video_request)
+            cached = await self.cache.fetch(cache_key, self._video_path(scene_data), scene_data.get('force_regenerate', False))
+            if cached:
+                return cached
+            
             # Generate video
             result = await self._generate_video(video_request, scene_data)
             
@@ -81,6 +97,7 @@ class HeyGenGenerator:
                 # Save to appropriate folder
                 save_path = await self._save_video(result['video_url'], scene_data)
                 result['file_path'] = save_path
+                await self.cache.store(cache_key, save_path, result)
             
             return result
             
@@ -88,7 +105,8 @@ class HeyGenGenerator:
             return {'success': False, 'error': f"Failed to generate scene video: {str(e)}"}
     
     async def generate_character_dialogue(self, character: str, script: str, 
-                                        background_image: str = None) -> Dict[str, Any]:
+                                        background_image: str = None,
+                                        force_regenerate: bool = False) -> Dict[str, Any]:
         """Generate character dialogue video"""
         try:
             if not self.api_key:
@@ -124,6 +142,14 @@ class HeyGenGenerator:
                 "aspect_ratio": "9:16"
             }
             
+            # Reuse an identical earlier render unless asked to regenerate
+            video_input = video_request['video_inputs'][0]
+            cache_key = self.cache.key('heygen', script, model=video_input['character']['avatar_id'],
+                                       voice=video_input['voice']['voice_id'], settings=video_request)
+            cached = await self.cache.fetch(cache_key, self._video_path({'character': character}), force_regenerate)
+            if cached:
+                return cached
+            
             # Generate video
             result = await self._generate_video(video_request, {'character': character})
             
@@ -131,6 +157,7 @@ class HeyGenGenerator:
                 # Save to appropriate folder
                 save_path = await self._save_video(result['video_url'], {'character': character})
                 result['file_path'] = save_path
+                await self.cache.store(cache_key, save_path, result)
             
             return result
             
@@ -179,9 +206,10 @@ class HeyGenGenerator:
     async def _generate_video(self, video_request: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         """Call HeyGen API to generate video"""
         try:
-            async with httpx.AsyncClient() as client:
+            async with self.governor.slot(), httpx.AsyncClient() as client:
                 # Start video generation
-                response = await client.post(
+                response = await self.governor.call(
+                    client.post,
                     f"{self.base_url}/video/generate",
                     headers=self.headers,
                     json=video_request,
@@ -226,7 +254,8 @@ class HeyGenGenerator:
         try:
             async with httpx.AsyncClient() as client:
                 for attempt in range(max_attempts):
-                    response = await client.get(
+                    response = await self.governor.call(
+                        client.get,
                         f"{self.base_url}/video/{video_id}",
                         headers=self.headers,
                         timeout=10.0
@@ -256,22 +285,7 @@ class HeyGenGenerator:
     async def _save_video(self, video_url: str, context: Dict[str, Any]) -> str:
         """Download and save video to NAS"""
         try:
-            # Determine save path
-            episode_id = context.get('episode_id', 'unknown')
-            scene_number = context.get('scene_number', 1)
-            character = context.get('character')
-            
-            if character:
-                filename = f"EP{episode_id[:8]}_S{scene_number:02d}_{character}_dialogue.mp4"
-            else:
-                filename = f"EP{episode_id[:8]}_S{scene_number:02d}_scene.mp4"
-            
-            # Create folder structure
-            skysky_root = os.getenv('SKYSKY_ROOT', '/mnt/qnap/SkySkyShow')
-            save_dir = Path(skysky_root) / f"Episode_{episode_id}" / "HeyGen_Video" / f"Scene_{scene_number:02d}"
-            save_dir.mkdir(parents=True, exist_ok=True)
-            
-            save_path = save_dir / filename
+            save_path = self._video_path(context)
             
             # Download video
             async with httpx.AsyncClient() as client:
@@ -287,6 +301,24 @@ class HeyGenGenerator:
         except Exception as e:
             raise Exception(f"Failed to save video: {str(e)}")
     
+    def _video_path(self, context: Dict[str, Any]) -> Path:
+        """Where a video for this context is saved on the NAS"""
+        episode_id = context.get('episode_id', 'unknown')
+        scene_number = context.get('scene_number', 1)
+        character = context.get('character')
+        
+        if character:
+            filename = f"EP{episode_id[:8]}_S{scene_number:02d}_{character}_dialogue.mp4"
+        else:
+            filename = f"EP{episode_id[:8]}_S{scene_number:02d}_scene.mp4"
+        
+        # Create folder structure
+        skysky_root = os.getenv('SKYSKY_ROOT', '/mnt/qnap/SkySkyShow')
+        save_dir = Path(skysky_root) / f"Episode_{episode_id}" / "HeyGen_Video" / f"Scene_{scene_number:02d}"
+        save_dir.mkdir(parents=True, exist_ok=True)
+        
+        return save_dir / filename
+    
     def _get_scene_type(self, scene_number: int) -> str:
         """Map scene number to scene type"""
         scene_types = {
@@ -10,6 +10,12 @@ from typing import Dict, Any, List, Optional
 from pathlib import Path
 import yaml
 
+from shared.governor import get_governor
+from generation_cache import get_generation_cache
+
+# Request settings sent with every prompt; part of the generation cache key
+IMAGE_SETTINGS = {"aspect_ratio": "9:16", "quality": "high", "style": "raw"}
+
 
 class MidjourneyGenerator:
     """Generates images using Midjourney API"""
@@ -22,6 +28,10 @@ class MidjourneyGenerator:
             "Content-Type": "application/json"
         }
         
+        # Shared rate limit and concurrency quota across Giorgio replicas
+        self.governor = get_governor().provider('midjourney')
+        self.cache = get_generation_cache()
+        
         # Load scene templates
         self.templates = self._load_templates()
     
@@ -57,6 +67,14 @@ class MidjourneyGenerator:
             # Add SkySky Show specific parameters
             prompt += " --ar 9:16 --v 6 --style raw --quality 2"
             
+            # Reuse an identical earlier generation unless asked to regenerate
+            cache_key = self.cache.key('midjourney', prompt, settings=IMAGE_SETTINGS)
+            cached = await self.cache.fetch(cache_key, self._image_path(scene_data), scene_data.get('force_regenerate', False))
+            if cached:
+                # The provider's image link has expired by now; hand out Giorgio's copy
+                cached['image_url'] = self.cache.blob_url(cache_key)
+                return cached
+            
             # Generate image
             result = await self._generate_image(prompt, scene_data)
             
@@ -64,13 +82,15 @@ class MidjourneyGenerator:
                 # Save to appropriate folder
                 save_path = await self._save_image(result['image_url'], scene_data)
                 result['file_path'] = save_path
+                await self.cache.store(cache_key, save_path, result)
             
             return result
             
         except Exception as e:
             return {'success': False, 'error': f"Failed to generate scene background: {str(e)}"}
     
-    async def generate_character_art(self, character: str, scene_context: str) -> Dict[str, Any]:
+    async def generate_character_art(self, character: str, scene_context: str,
+                                     force_regenerate: bool = False) -> Dict[str, Any]:
         """Generate character art for a scene"""
         try:
             if not self.api_key:
@@ -85,6 +105,14 @@ class MidjourneyGenerator:
             prompt = f"{character_config.get('name', character)}, {character_config.get('voice_description', '')}, {scene_context}"
             prompt += " --ar 9:16 --v 6 --style raw --quality 2"
             
+            # Reuse an identical earlier generation unless asked to regenerate
+            cache_key = self.cache.key('midjourney', prompt, settings=IMAGE_SETTINGS)
+            cached = await self.cache.fetch(cache_key, self._image_path({'character': character}), force_regenerate)
+            if cached:
+                # The provider's image link has expired by now; hand out Giorgio's copy
+                cached['image_url'] = self.cache.blob_url(cache_key)
+                return cached
+            
             # Generate image
             result = await self._generate_image(prompt, {'character': character})
             
@@ -92,6 +120,7 @@ class MidjourneyGenerator:
                 # Save to appropriate folder
                 save_path = await self._save_image(result['image_url'], {'character': character})
                 result['file_path'] = save_path
+                await self.cache.store(cache_key, save_path, result)
             
             return result
             
@@ -145,16 +174,12 @@ class MidjourneyGenerator:
     async def _generate_image(self, prompt: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Call Midjourney API to generate image"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
+            async with self.governor.slot(), httpx.AsyncClient() as client:
+                response = await self.governor.call(
+                    client.post,
                     f"{self.base_url}/imagine",
                     headers=self.headers,
-                    json={
-                        "prompt": prompt,
-                        "aspect_ratio": "9:16",
-                        "quality": "high",
-                        "style": "raw"
-                    },
+                    json={"prompt": prompt, **IMAGE_SETTINGS},
                     timeout=60.0
                 )
                 
@@ -178,22 +203,7 @@ class MidjourneyGenerator:
     async def _save_image(self, image_url: str, context: Dict[str, Any]) -> str:
         """Download and save image to NAS"""
         try:
-            # Determine save path
-            episode_id = context.get('episode_id', 'unknown')
-            scene_number = context.get('scene_number', 1)
-            character = context.get('character')
-            
-            if character:
-                filename = f"EP{episode_id[:8]}_S{scene_number:02d}_{character}_art.png"
-            else:
-                filename = f"EP{episode_id[:8]}_S{scene_number:02d}_background.png"
-            
-            # Create folder structure
-            skysky_root = os.getenv('SKYSKY_ROOT', '/mnt/qnap/SkySkyShow')
-            save_dir = Path(skysky_root) / f"Episode_{episode_id}" / "Midjourney_Art" / f"Scene_{scene_number:02d}"
-            save_dir.mkdir(parents=True, exist_ok=True)
-            
-            save_path = save_dir / filename
+            save_path = self._image_path(context)
             
             # Download image
             async with httpx.AsyncClient() as client:
@@ -209,6 +219,24 @@ class MidjourneyGenerator:
         except Exception as e:
             raise Exception(f"Failed to save image: {str(e)}")
     
+    def _image_path(self, context: Dict[str, Any]) -> Path:
+        """Where an image for this context is saved on the NAS"""
+        episode_id = context.get('episode_id', 'unknown')
+        scene_number = context.get('scene_number', 1)
+        character = context.get('character')
+        
+        if character:
+            filename = f"EP{episode_id[:8]}_S{scene_number:02d}_{character}_art.png"
+        else:
+            filename = f"EP{episode_id[:8]}_S{scene_number:02d}_background.png"
+        
+        # Create folder structure
+        skysky_root = os.getenv('SKYSKY_ROOT', '/mnt/qnap/SkySkyShow')
+        save_dir = Path(skysky_root) / f"Episode_{episode_id}" / "Midjourney_Art" / f"Scene_{scene_number:02d}"
+        save_dir.mkdir(parents=True, exist_ok=True)
+        
+        return save_dir / filename
+    
     def _get_scene_type(self, scene_number: int) -> str:
         """Map scene number to scene type"""
         scene_types = {
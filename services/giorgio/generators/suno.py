@@ -10,6 +10,12 @@ from typing import Dict, Any, List, Optional
 from pathlib import Path
 import yaml
 
+from shared.governor import get_governor
+from generation_cache import get_generation_cache
+
+# Output settings sent with every prompt; part of the generation cache key
+MUSIC_SETTINGS = {"quality": "high", "format": "mp3"}
+
 
 class SunoGenerator:
     """Generates music using Suno API"""
@@ -22,6 +28,10 @@ class SunoGenerator:
             "Content-Type": "application/json"
         }
         
+        # Shared rate limit and concurrency quota across Giorgio replicas
+        self.governor = get_governor().provider('suno')
+        self.cache = get_generation_cache()
+        
         # Load scene templates
         self.templates = self._load_templates()
     
@@ -55,6 +65,12 @@ class SunoGenerator:
             style = suno_config.get('style', 'children')
             duration = suno_config.get('duration', 60)
             
+            # Reuse an identical earlier generation unless asked to regenerate
+            cache_key = self.cache.key('suno', prompt, settings={'style': style, 'duration': duration, **MUSIC_SETTINGS})
+            cached = await self.cache.fetch(cache_key, self._music_path(scene_data), scene_data.get('force_regenerate', False))
+            if cached:
+                return cached
+            
             # Generate music
             result = await self._generate_music(prompt, style, duration, scene_data)
             
@@ -62,6 +78,7 @@ class SunoGenerator:
                 # Save to appropriate folder
                 save_path = await self._save_music(result['audio_data'], scene_data)
                 result['file_path'] = save_path
+                await self.cache.store(cache_key, save_path, result)
             
             return result
             
@@ -82,6 +99,12 @@ class SunoGenerator:
             # Build prompt with lyrics
             prompt = f"{title} - {style} song, {duration} seconds, {lyrics}"
             
+            # Reuse an identical earlier generation unless asked to regenerate
+            cache_key = self.cache.key('suno', prompt, settings={'style': style, 'duration': duration, **MUSIC_SETTINGS})
+            cached = await self.cache.fetch(cache_key, self._music_path(song_data), song_data.get('force_regenerate', False))
+            if cached:
+                return cached
+            
             # Generate song
             result = await self._generate_music(prompt, style, duration, song_data)
             
@@ -89,6 +112,7 @@ class SunoGenerator:
                 # Save to appropriate folder
                 save_path = await self._save_music(result['audio_data'], song_data)
                 result['file_path'] = save_path
+                await self.cache.store(cache_key, save_path, result)
             
             return result
             
@@ -153,16 +177,16 @@ class SunoGenerator:
                             context: Dict[str, Any]) -> Dict[str, Any]:
         """Call Suno API to generate music"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
+            async with self.governor.slot(), httpx.AsyncClient() as client:
+                response = await self.governor.call(
+                    client.post,
                     f"{self.base_url}/music/generate",
                     headers=self.headers,
                     json={
                         "prompt": prompt,
                         "style": style,
                         "duration": duration,
-                        "quality": "high",
-                        "format": "mp3"
+                        **MUSIC_SETTINGS
                     },
                     timeout=120.0
                 )
@@ -205,23 +229,7 @@ class SunoGenerator:
     async def _save_music(self, audio_data: bytes, context: Dict[str, Any]) -> str:
         """Save music to NAS"""
         try:
-            # Determine save path
-            episode_id = context.get('episode_id', 'unknown')
-            scene_number = context.get('scene_number', 1)
-            song_title = context.get('title', 'music')
-            
-            # Clean filename
-            clean_title = "".join(c for c in song_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            clean_title = clean_title.replace(' ', '_')
-            
-            filename = f"EP{episode_id[:8]}_S{scene_number:02d}_{clean_title}.mp3"
-            
-            # Create folder structure
-            skysky_root = os.getenv('SKYSKY_ROOT', '/mnt/qnap/SkySkyShow')
-            save_dir = Path(skysky_root) / f"Episode_{episode_id}" / "Suno_Audio" / f"Scene_{scene_number:02d}"
-            save_dir.mkdir(parents=True, exist_ok=True)
-            
-            save_path = save_dir / filename
+            save_path = self._music_path(context)
             
             # Save audio file
             with open(save_path, 'wb') as f:
@@ -232,6 +240,25 @@ class SunoGenerator:
         except Exception as e:
             raise Exception(f"Failed to save music: {str(e)}")
     
+    def _music_path(self, context: Dict[str, Any]) -> Path:
+        """Where music for this context is saved on the NAS"""
+        episode_id = context.get('episode_id', 'unknown')
+        scene_number = context.get('scene_number', 1)
+        song_title = context.get('title', 'music')
+        
+        # Clean filename
+        clean_title = "".join(c for c in song_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        clean_title = clean_title.replace(' ', '_')
+        
+        filename = f"EP{episode_id[:8]}_S{scene_number:02d}_{clean_title}.mp3"
+        
+        # Create folder structure
+        skysky_root = os.getenv('SKYSKY_ROOT', '/mnt/qnap/SkySkyShow')
+        save_dir = Path(skysky_root) / f"Episode_{episode_id}" / "Suno_Audio" / f"Scene_{scene_number:02d}"
+        save_dir.mkdir(parents=True, exist_ok=True)
+        
+        return save_dir / filename
+    
     def _get_scene_type(self, scene_number: int) -> str:
         """Map scene number to scene type"""
         scene_types = {
@@ -4,20 +4,26 @@ SkyRas v2 Creative Generator Agent
 """
 
 import os
+import json
 import asyncio
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, AsyncIterator
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, FileResponse
 from contextlib import asynccontextmanager
 
 from shared.models import APIResponse
 from shared.redis_client import get_redis_client
 from shared.events import get_event_bus, EventTypes
+from shared.asgi import create_app
+from shared.governor import get_governor
 from generators.midjourney import MidjourneyGenerator
 from generators.heygen import HeyGenGenerator
 from generators.elevenlabs import ElevenLabsGenerator
 from generators.suno import SunoGenerator
+from task_graph import TaskGraph, GenerationJob
+from generation_cache import get_generation_cache
 
 
 # Initialize Redis and Event Bus
@@ -52,7 +58,7 @@ async def lifespan(app: FastAPI):
     print("🛑 Shutting down Giorgio Agent...")
 
 
-app = FastAPI(
+app = create_app(
     title="Giorgio Agent",
     description="Creative Asset Generation Agent for SkyRas v2",
     version="1.0.0",
@@ -109,6 +115,7 @@ async def generate_midjourney_assets(asset_data: Dict[str, Any], background_task
                 {
                     "type": "image",
                     "tool": "midjourney",
+                    "episode_id": asset_data.get('episode_id'),
                     "scene_number": asset_data.get('scene_number'),
                     "file_path": result.get('file_path')
                 }
@@ -147,6 +154,7 @@ async def generate_heygen_video(video_data: Dict[str, Any], background_tasks: Ba
                 {
                     "type": "video",
                     "tool": "heygen",
+                    "episode_id": video_data.get('episode_id'),
                     "scene_number": video_data.get('scene_number'),
                     "file_path": result.get('file_path')
                 }
@@ -178,7 +186,8 @@ async def generate_elevenlabs_audio(audio_data: Dict[str, Any], background_tasks
         result = await elevenlabs.generate_voice_over(
             character=audio_data.get('character', 'sky_sky'),
             text=audio_data.get('text', ''),
-            scene_context=audio_data.get('scene_context')
+            scene_context=audio_data.get('scene_context'),
+            force_regenerate=audio_data.get('force_regenerate', False)
         )
         
         if result['success']:
@@ -189,6 +198,8 @@ async def generate_elevenlabs_audio(audio_data: Dict[str, Any], background_tasks
                 {
                     "type": "audio",
                     "tool": "elevenlabs",
+                    "episode_id": audio_data.get('episode_id'),
+                    "scene_number": audio_data.get('scene_number'),
                     "character": audio_data.get('character'),
                     "file_path": result.get('file_path')
                 }
@@ -230,6 +241,7 @@ async def generate_suno_music(music_data: Dict[str, Any], background_tasks: Back
                 {
                     "type": "music",
                     "tool": "suno",
+                    "episode_id": music_data.get('episode_id'),
                     "scene_number": music_data.get('scene_number'),
                     "file_path": result.get('file_path')
                 }
@@ -247,12 +259,143 @@ async def generate_suno_music(music_data: Dict[str, Any], background_tasks: Back
 
 
 # Batch generation endpoints
+ASSET_TYPES = {'midjourney': 'image', 'heygen': 'video', 'elevenlabs': 'audio', 'suno': 'music'}
+
+
+def batch_scenes_error(scenes: Any) -> Optional[str]:
+    """Why a batch's scenes can't be run, or None; jobs and results are keyed by scene number"""
+    if not isinstance(scenes, list):
+        return "scenes must be a list"
+    seen = set()
+    for position, scene in enumerate(scenes, 1):
+        if not isinstance(scene, dict):
+            return f"Scene at position {position} is not an object"
+        scene_number = scene.get('scene_number')
+        if not isinstance(scene_number, (int, str)) or isinstance(scene_number, bool):
+            return f"Scene at position {position} has no scene_number"
+        # Job ids use the number as text, so 1 and "1" are the same scene
+        if str(scene_number) in seen:
+            return f"Scene {scene_number} appears more than once"
+        seen.add(str(scene_number))
+    return None
+
+
+def build_batch_graph(episode_id: str, scenes: List[Dict[str, Any]], force_regenerate: bool = False) -> TaskGraph:
+    """Every configured provider call for an episode, with the real dependencies as edges"""
+    graph = TaskGraph()
+    for scene in scenes:
+        scene_number = scene.get('scene_number')
+        scene_type = scene.get('scene_type', 'intro')
+        request = {
+            'scene_type': scene_type,
+            'episode_id': episode_id,
+            'scene_number': scene_number,
+            'force_regenerate': force_regenerate or bool(scene.get('force_regenerate'))
+        }
+        
+        # Midjourney background, which HeyGen uses as its backdrop
+        background_job = None
+        if midjourney.is_configured():
+            background_job = graph.add(GenerationJob(
+                f"scene_{scene_number}:midjourney", 'midjourney', scene_number,
+                lambda inputs, request=request, scene=scene: midjourney.generate_scene_background({
+                    **request, 'scene_name': scene.get('name')
+                })
+            ))
+        
+        # HeyGen video
+        if heygen.is_configured():
+            def heygen_job(inputs, request=request, scene=scene, background_job=background_job):
+                background = inputs.get(background_job) or {}
+                return heygen.generate_scene_video({
+                    **request,
+                    'scene_name': scene.get('name'),
+                    'background_image_url': (background.get('image_url') or '') if background.get('success') else ''
+                })
+            graph.add(GenerationJob(
+                f"scene_{scene_number}:heygen", 'heygen', scene_number, heygen_job,
+                depends_on=[background_job] if background_job else []
+            ))
+        
+        # ElevenLabs audio
+        if elevenlabs.is_configured():
+            graph.add(GenerationJob(
+                f"scene_{scene_number}:elevenlabs", 'elevenlabs', scene_number,
+                lambda inputs, request=request, scene=scene: elevenlabs.generate_scene_audio({
+                    **request, 'description': scene.get('description')
+                })
+            ))
+        
+        # Suno music (for specific scenes)
+        if suno.is_configured() and scene_type in ['reflection', 'song_performance']:
+            graph.add(GenerationJob(
+                f"scene_{scene_number}:suno", 'suno', scene_number,
+                lambda inputs, request=request: suno.generate_scene_music(dict(request))
+            ))
+    
+    return graph
+
+
+async def run_batch(episode_id: str, scenes: List[Dict[str, Any]],
+                    force_regenerate: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """Run an episode's batch, yielding each job's outcome as it completes, then the summary"""
+    results = {
+        'episode_id': episode_id,
+        'scenes': [
+            {
+                'scene_number': scene.get('scene_number'),
+                'scene_type': scene.get('scene_type', 'intro'),
+                'assets': []
+            }
+            for scene in scenes
+        ],
+        'generated_assets': [],
+        'errors': []
+    }
+    by_scene = {scene['scene_number']: scene for scene in results['scenes']}
+    
+    async for job, result in build_batch_graph(episode_id, scenes, force_regenerate).run():
+        outcome = {'job': job.id, 'tool': job.tool, 'scene_number': job.scene_number, 'success': result['success']}
+        if result['success']:
+            asset = {
+                'type': ASSET_TYPES[job.tool],
+                'tool': job.tool,
+                'file_path': result.get('file_path'),
+                'cached': bool(result.get('cached'))
+            }
+            by_scene[job.scene_number]['assets'].append(asset)
+            results['generated_assets'].append(asset)
+            outcome['asset'] = asset
+            
+            event = await event_bus.create_event(
+                "asset.generated",
+                "giorgio",
+                {**asset, 'episode_id': episode_id, 'scene_number': job.scene_number}
+            )
+            await event_bus.publish(event)
+        else:
+            outcome['error'] = result.get('error')
+            results['errors'].append({'job': job.id, 'error': result.get('error')})
+        yield outcome
+    
+    # Publish batch completion event
+    event = await event_bus.create_event(
+        "batch.assets.generated",
+        "giorgio",
+        results
+    )
+    await event_bus.publish(event)
+    yield {'done': True, 'results': results}
+
+
 @app.post("/api/generate/batch")
-async def generate_batch_assets(episode_data: Dict[str, Any], background_tasks: BackgroundTasks):
-    """Generate all assets for an episode"""
+async def generate_batch_assets(episode_data: Dict[str, Any], background_tasks: BackgroundTasks,
+                                stream: bool = False):
+    """Generate all assets for an episode; with stream=true each asset is sent as an SSE event as it lands"""
     try:
         episode_id = episode_data.get('episode_id')
         scenes = episode_data.get('scenes', [])
+        force_regenerate = bool(episode_data.get('force_regenerate'))
         
         if not episode_id or not scenes:
             return APIResponse(
@@ -261,95 +404,26 @@ async def generate_batch_assets(episode_data: Dict[str, Any], background_tasks:
                 data={"error": "Invalid episode data"}
             )
         
-        results = {
-            'episode_id': episode_id,
-            'scenes': [],
-            'generated_assets': []
-        }
+        scenes_error = batch_scenes_error(scenes)
+        if scenes_error:
+            raise HTTPException(status_code=400, detail=scenes_error)
         
-        # Generate assets for each scene
-        for scene in scenes:
-            scene_number = scene.get('scene_number')
-            scene_type = scene.get('scene_type', 'intro')
-            
-            scene_results = {
-                'scene_number': scene_number,
-                'scene_type': scene_type,
-                'assets': []
-            }
-            
-            # Generate Midjourney assets
-            if midjourney.is_configured():
-                midjourney_result = await midjourney.generate_scene_background({
-                    'scene_type': scene_type,
-                    'episode_id': episode_id,
-                    'scene_number': scene_number,
-                    'scene_name': scene.get('name')
-                })
-                if midjourney_result['success']:
-                    scene_results['assets'].append({
-                        'type': 'image',
-                        'tool': 'midjourney',
-                        'file_path': midjourney_result.get('file_path')
-                    })
-            
-            # Generate HeyGen video
-            if heygen.is_configured():
-                heygen_result = await heygen.generate_scene_video({
-                    'scene_type': scene_type,
-                    'episode_id': episode_id,
-                    'scene_number': scene_number,
-                    'scene_name': scene.get('name')
-                })
-                if heygen_result['success']:
-                    scene_results['assets'].append({
-                        'type': 'video',
-                        'tool': 'heygen',
-                        'file_path': heygen_result.get('file_path')
-                    })
+        if stream:
+            async def event_source():
+                async for update in run_batch(episode_id, scenes, force_regenerate):
+                    name = 'batch.completed' if update.get('done') else 'job.completed'
+                    yield f"event: {name}\ndata: {json.dumps(update)}\n\n"
             
-            # Generate ElevenLabs audio
-            if elevenlabs.is_configured():
-                elevenlabs_result = await elevenlabs.generate_scene_audio({
-                    'scene_type': scene_type,
-                    'episode_id': episode_id,
-                    'scene_number': scene_number,
-                    'description': scene.get('description')
-                })
-                if elevenlabs_result['success']:
-                    scene_results['assets'].append({
-                        'type': 'audio',
-                        'tool': 'elevenlabs',
-                        'file_path': elevenlabs_result.get('file_path')
-                    })
-            
-            # Generate Suno music (for specific scenes)
-            if suno.is_configured() and scene_type in ['reflection', 'song_performance']:
-                suno_result = await suno.generate_scene_music({
-                    'scene_type': scene_type,
-                    'episode_id': episode_id,
-                    'scene_number': scene_number
-                })
-                if suno_result['success']:
-                    scene_results['assets'].append({
-                        'type': 'music',
-                        'tool': 'suno',
-                        'file_path': suno_result.get('file_path')
-                    })
-            
-            results['scenes'].append(scene_results)
-            
-            # Collect all generated assets
-            for asset in scene_results['assets']:
-                results['generated_assets'].append(asset)
+            return StreamingResponse(
+                event_source(),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
         
-        # Publish batch completion event
-        event = await event_bus.create_event(
-            "batch.assets.generated",
-            "giorgio",
-            results
-        )
-        await event_bus.publish(event)
+        results = None
+        async for update in run_batch(episode_id, scenes, force_regenerate):
+            if update.get('done'):
+                results = update['results']
         
         return APIResponse(
             success=True,
@@ -357,10 +431,47 @@ async def generate_batch_assets(episode_data: Dict[str, Any], background_tasks:
             data=results
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating batch assets: {str(e)}")
 
 
+@app.get("/api/providers/limits")
+async def get_provider_limits():
+    """Current shared rate, slot usage and 429 count for each provider"""
+    try:
+        return APIResponse(
+            success=True,
+            message="Provider limits",
+            data=get_governor().stats()
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting provider limits: {str(e)}")
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Generation cache hit rate per provider and disk usage"""
+    try:
+        return APIResponse(
+            success=True,
+            message="Generation cache stats",
+            data=get_generation_cache().stats()
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting cache stats: {str(e)}")
+
+
+@app.get("/api/cache/blobs/{provider}/{digest}")
+async def get_cache_blob(provider: str, digest: str):
+    """A cached asset at a stable URL, e.g. a cached background handed to HeyGen"""
+    path = get_generation_cache().blob_path(f"{provider}:{digest}")
+    if not path:
+        raise HTTPException(status_code=404, detail="Cached asset not found")
+    return FileResponse(path)
+
+
 # Event handlers
 async def handle_episode_created(event):
     """Handle episode created event from Marcus"""
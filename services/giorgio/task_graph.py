@@ -0,0 +1,103 @@
+"""
+SkyRas v2 Giorgio Task Graph
+Runs generation jobs as soon as their dependencies finish and yields each result as it lands
+"""
+
+import asyncio
+from typing import Dict, Any, List, Callable, Awaitable, AsyncIterator, Tuple
+
+
+class GenerationJob:
+    """One provider call; run() receives the results of the jobs it depends on"""
+
+    __slots__ = ('id', 'tool', 'scene_number', 'depends_on', 'run')
+
+    def __init__(self, job_id: str, tool: str, scene_number: Any,
+                 run: Callable[[Dict[str, Dict[str, Any]]], Awaitable[Dict[str, Any]]],
+                 depends_on: List[str] = None):
+        self.id = job_id
+        self.tool = tool
+        self.scene_number = scene_number
+        self.run = run
+        self.depends_on = list(depends_on or [])
+
+
+class TaskGraph:
+    """DAG of generation jobs
+
+    Every job whose dependencies are done runs at once, so an episode takes as long
+    as its slowest chain of dependent calls rather than the sum of all of them. A
+    dependent still runs when a dependency fails; it gets the failed result and
+    falls back to its defaults.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, GenerationJob] = {}
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def add(self, job: GenerationJob) -> str:
+        if job.id in self.jobs:
+            raise ValueError(f"Duplicate job {job.id}")
+        self.jobs[job.id] = job
+        return job.id
+
+    def validate(self) -> None:
+        """Raise ValueError for unknown dependencies or cycles"""
+        remaining = {}
+        for job in self.jobs.values():
+            unknown = [dependency for dependency in job.depends_on if dependency not in self.jobs]
+            if unknown:
+                raise ValueError(f"Job {job.id} depends on unknown jobs {unknown}")
+            remaining[job.id] = set(job.depends_on)
+
+        while remaining:
+            ready = [job_id for job_id, dependencies in remaining.items() if not dependencies]
+            if not ready:
+                raise ValueError(f"Dependency cycle among {sorted(remaining)}")
+            for job_id in ready:
+                del remaining[job_id]
+            for dependencies in remaining.values():
+                dependencies.difference_update(ready)
+
+    async def run(self) -> AsyncIterator[Tuple[GenerationJob, Dict[str, Any]]]:
+        """Run every job, yielding (job, result) in completion order"""
+        self.validate()
+        results: Dict[str, Dict[str, Any]] = {}
+        waiting = {job_id: len(job.depends_on) for job_id, job in self.jobs.items()}
+        dependents: Dict[str, List[str]] = {}
+        for job in self.jobs.values():
+            for dependency in job.depends_on:
+                dependents.setdefault(dependency, []).append(job.id)
+
+        running: Dict[asyncio.Future, GenerationJob] = {}
+
+        def start(job: GenerationJob) -> None:
+            inputs = {dependency: results[dependency] for dependency in job.depends_on}
+            running[asyncio.ensure_future(job.run(inputs))] = job
+
+        for job_id, count in waiting.items():
+            if count == 0:
+                start(self.jobs[job_id])
+
+        try:
+            while running:
+                done, _ = await asyncio.wait(set(running), return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {'success': False, 'error': f"{job.tool} failed: {str(e)}"}
+                    results[job.id] = result
+
+                    for dependent in dependents.get(job.id, []):
+                        waiting[dependent] -= 1
+                        if waiting[dependent] == 0:
+                            start(self.jobs[dependent])
+                    yield job, result
+        finally:
+            # The consumer went away (e.g. a streaming client disconnected)
+            for future in running:
+                future.cancel()
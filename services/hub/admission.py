@@ -0,0 +1,229 @@
+"""
+SkyRas v2 Hub Admission Control
+Redis-backed token-bucket rate limiting and load shedding for the Hub
+"""
+
+import os
+import json
+import time
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+
+from shared.redis_client import RedisClient
+
+
+# Consumes one token from every bucket in KEYS, or from none of them.
+# ARGV holds a rate,burst pair per key. Uses the Redis clock so all Hub replicas agree.
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local states = {}
+local retry_after = 0
+
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    if tokens < 1 then
+        retry_after = math.max(retry_after, (1 - tokens) / rate)
+    end
+    states[i] = tokens
+end
+
+local allowed = 0
+if retry_after == 0 then
+    allowed = 1
+end
+
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    local tokens = states[i]
+    if allowed == 1 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+end
+
+return {allowed, tostring(retry_after)}
+"""
+
+# Requests the Hub always admits: health probes, metrics and long-lived event streams
+EXEMPT_PATHS = ("/health", "/api/v2/metrics", "/api/v2/events/stream", "/api/v2/events/ws")
+
+# Client address the batch executor uses for in-process sub-requests
+INTERNAL_CLIENT_HOST = "hub-batch"
+
+# Scope key set only by the batch executor's in-process transport; it holds the id of
+# the client that sent the batch. Never derived from anything a client can send.
+BATCH_CLIENT_SCOPE_KEY = "skyras.batch_client"
+
+
+def _parse_limit(value: str) -> Tuple[float, float]:
+    """Parse "rate:burst" (requests per second, bucket size)"""
+    rate, _, burst = value.partition(':')
+    return float(rate), float(burst or rate)
+
+
+def _parse_route_limits(value: str) -> Dict[str, Tuple[float, float]]:
+    """Parse "METHOD /path=rate:burst,..." into per-route limits"""
+    limits = {}
+    for entry in value.split(','):
+        if '=' not in entry:
+            continue
+        route, _, limit = entry.partition('=')
+        limits[route.strip()] = _parse_limit(limit.strip())
+    return limits
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a short sleep"""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            # Smooth so a single slow tick doesn't trigger shedding on its own
+            self.lag = self.lag * 0.7 + lag * 0.3
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+
+class AdmissionController:
+    """Decides whether the Hub admits a request"""
+
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+        self.enabled = os.getenv('HUB_RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.client_limit = _parse_limit(os.getenv('HUB_RATE_LIMIT_CLIENT', '20:40'))
+        self.route_limits = _parse_route_limits(os.getenv(
+            'HUB_RATE_LIMIT_ROUTES',
+            'POST /api/v2/agents/marcus/task=10:20,POST /api/v2/agents/letitia/search=30:60'
+        ))
+        self.trust_forwarded = os.getenv('HUB_TRUST_FORWARDED_FOR', 'false').lower() in ('1', 'true', 'yes')
+        self.max_in_flight = int(os.getenv('HUB_MAX_IN_FLIGHT', '512'))
+        self.max_loop_lag = float(os.getenv('HUB_MAX_LOOP_LAG_MS', '250')) / 1000
+        self.script = self.redis_client.client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.lag_monitor = LoopLagMonitor()
+
+        self.in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+
+    def client_id(self, scope: Dict[str, Any]) -> str:
+        """Identify the caller, honouring X-Forwarded-For only behind a trusted proxy"""
+        if BATCH_CLIENT_SCOPE_KEY in scope:
+            return scope[BATCH_CLIENT_SCOPE_KEY]
+        if self.trust_forwarded:
+            for name, value in scope.get("headers", []):
+                if name == b"x-forwarded-for":
+                    return value.decode().split(',')[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def should_shed(self) -> Optional[float]:
+        """Retry-After seconds if the Hub is overloaded, else None"""
+        if self.in_flight >= self.max_in_flight:
+            return 1.0
+        if self.lag_monitor.lag > self.max_loop_lag:
+            return max(1.0, self.lag_monitor.lag * 4)
+        return None
+
+    async def check_rate(self, method: str, path: str, client_id: str) -> Optional[float]:
+        """Retry-After seconds if a token bucket is empty, else None"""
+        keys: List[str] = [f"ratelimit:client:{client_id}"]
+        args: List[float] = list(self.client_limit)
+        route = f"{method} {path}"
+        if route in self.route_limits:
+            keys.append(f"ratelimit:route:{route}")
+            args.extend(self.route_limits[route])
+
+        try:
+            allowed, retry_after = await asyncio.get_event_loop().run_in_executor(
+                None, lambda: self.script(keys=keys, args=args)
+            )
+        except Exception as e:
+            # Fail open: losing Redis must not take the Hub down with it
+            print(f"❌ Rate limiter error: {e}")
+            return None
+
+        if int(allowed) == 1:
+            return None
+        return max(1.0, float(retry_after))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed": self.shed,
+            "loop_lag_ms": round(self.lag_monitor.lag * 1000, 2)
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying AdmissionController to every HTTP request"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        client_id = controller.client_id(scope)
+
+        # Batch sub-requests ride on their admitted batch, so they aren't shed, but each
+        # one is charged to the batch caller and to its route like a direct call
+        if BATCH_CLIENT_SCOPE_KEY not in scope:
+            retry_after = controller.should_shed()
+            if retry_after is not None:
+                controller.shed += 1
+                await self._reject(send, 503, "Hub overloaded, retry later", retry_after)
+                return
+
+        if controller.enabled:
+            retry_after = await controller.check_rate(scope["method"], scope["path"], client_id)
+            if retry_after is not None:
+                controller.rate_limited += 1
+                await self._reject(send, 429, "Rate limit exceeded", retry_after)
+                return
+
+        controller.admitted += 1
+        controller.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.in_flight -= 1
+
+    async def _reject(self, send, status: int, detail: str, retry_after: float) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(int(retry_after + 0.999)).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,131 @@
+"""
+SkyRas v2 Hub Batch Executor
+Runs many sub-requests concurrently and returns them in one response
+"""
+
+import os
+import time
+import asyncio
+from typing import List, Optional
+
+import httpx
+
+from shared.models import BatchSubRequest, BatchItemResult
+from admission import INTERNAL_CLIENT_HOST, BATCH_CLIENT_SCOPE_KEY
+
+
+BATCH_MAX_CONCURRENCY = int(os.getenv('HUB_BATCH_MAX_CONCURRENCY', '16'))
+
+# The Hub routes a batch may call; anything else (streams, the batch itself) is refused
+BATCHABLE_ROUTES = {
+    ("GET", "/api/v2/agents/status"),
+    ("POST", "/api/v2/agents/marcus/task"),
+    ("GET", "/api/v2/agents/marcus/tasks"),
+    ("GET", "/api/v2/agents/letitia/files"),
+    ("POST", "/api/v2/agents/letitia/search"),
+    ("POST", "/api/v2/agents/letitia/upload"),
+    ("GET", "/api/v2/events"),
+    ("GET", "/api/v2/metrics"),
+    ("POST", "/api/v2/agents/associate-file-task"),
+}
+
+# Header the executor uses to hand the caller's id to _InProcessApp; never read from outside
+BATCH_CLIENT_HEADER = b"x-skyras-batch-client"
+
+# Agent-addressed items name the agent's own route; each maps onto the Hub route that proxies it
+AGENT_ROUTES = {
+    ("marcus", "GET", "/api/tasks"): "/api/v2/agents/marcus/tasks",
+    ("marcus", "POST", "/api/tasks"): "/api/v2/agents/marcus/task",
+    ("letitia", "GET", "/api/files"): "/api/v2/agents/letitia/files",
+    ("letitia", "POST", "/api/search"): "/api/v2/agents/letitia/search",
+    ("letitia", "POST", "/api/files"): "/api/v2/agents/letitia/upload",
+}
+
+class _InProcessApp:
+    """Marks requests from the batch executor's own transport with the batch caller's id"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            headers = [(name, value) for name, value in scope["headers"] if name != BATCH_CLIENT_HEADER]
+            client_id = dict(scope["headers"]).get(BATCH_CLIENT_HEADER, b"").decode() or INTERNAL_CLIENT_HOST
+            scope = {**scope, "headers": headers, BATCH_CLIENT_SCOPE_KEY: client_id}
+        await self.app(scope, receive, send)
+
+
+class BatchExecutor:
+    """Runs batch sub-requests in-process through the Hub's own routes
+
+    Every item goes through the same handlers, validation, event publishing and
+    admission control as a direct call, so a batch can't reach anything the Hub
+    doesn't expose.
+    """
+
+    def __init__(self, hub_app, max_concurrency: int = BATCH_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self.local_client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=_InProcessApp(hub_app), client=(INTERNAL_CLIENT_HOST, 0)),
+            base_url="http://hub"
+        )
+
+    async def run(self, items: List[BatchSubRequest], client_id: str) -> List[BatchItemResult]:
+        """Run all sub-requests concurrently on behalf of client_id; results keep the request order"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_limited(item: BatchSubRequest) -> BatchItemResult:
+            async with semaphore:
+                return await self._run_one(item, client_id)
+
+        return await asyncio.gather(*(run_limited(item) for item in items))
+
+    @staticmethod
+    def resolve(item: BatchSubRequest) -> Optional[str]:
+        """The Hub path serving an item, or None if it isn't batchable"""
+        path = item.path.split('?', 1)[0]
+        if item.agent == "hub":
+            return path if (item.method, path) in BATCHABLE_ROUTES else None
+        return AGENT_ROUTES.get((item.agent, item.method, path))
+
+    async def _run_one(self, item: BatchSubRequest, client_id: str) -> BatchItemResult:
+        started = time.perf_counter()
+
+        def result(status: int, data=None, error: str = None) -> BatchItemResult:
+            return BatchItemResult(
+                id=item.id,
+                status=status,
+                data=data,
+                error=error,
+                elapsed_ms=round((time.perf_counter() - started) * 1000, 2)
+            )
+
+        hub_path = self.resolve(item)
+        if hub_path is None:
+            return result(400, error=f"{item.method} {item.path} on {item.agent} cannot be batched")
+
+        try:
+            response = await self.local_client.request(
+                item.method,
+                hub_path,
+                params=item.params,
+                json=item.body,
+                headers={BATCH_CLIENT_HEADER.decode(): client_id}
+            )
+        except Exception as e:
+            return result(502, error=f"Error calling {item.agent}: {str(e)}")
+
+        try:
+            if response.headers.get("content-type", "").startswith("application/json"):
+                data = response.json()
+            else:
+                data = response.text
+        except ValueError as e:
+            return result(502, error=f"Invalid response from {item.agent}: {str(e)}")
+
+        if response.status_code >= 400:
+            return result(response.status_code, data=data, error=response.reason_phrase)
+        return result(response.status_code, data=data)
+
+    async def aclose(self) -> None:
+        await self.local_client.aclose()
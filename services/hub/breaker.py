@@ -0,0 +1,91 @@
+"""
+SkyRas v2 Hub Circuit Breaker
+Fast-fails calls to an upstream that keeps failing
+"""
+
+import os
+import time
+from typing import Dict, Any
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"{name} circuit open, retry in {retry_after:.0f}s")
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker for one upstream"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = None, reset_timeout: float = None,
+                 half_open_max_calls: int = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or int(os.getenv('HUB_BREAKER_FAILURE_THRESHOLD', '5'))
+        self.reset_timeout = reset_timeout or float(os.getenv('HUB_BREAKER_RESET_TIMEOUT', '30'))
+        self.half_open_max_calls = half_open_max_calls or int(os.getenv('HUB_BREAKER_HALF_OPEN_CALLS', '1'))
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpenError"""
+        if self.state == self.OPEN:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+            # Cool-down over: let a limited number of probes through
+            self.state = self.HALF_OPEN
+            self.half_open_calls = 0
+
+        if self.state == self.HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.reset_timeout)
+            self.half_open_calls += 1
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            print(f"✅ {self.name} circuit closed")
+        self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def record_abandoned(self) -> None:
+        """A call ended without an outcome (e.g. cancelled); free its half-open slot"""
+        if self.state == self.HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def _open(self) -> None:
+        if self.state != self.OPEN:
+            self.times_opened += 1
+            print(f"⚡ {self.name} circuit opened after {self.consecutive_failures} failures")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        retry_after = None
+        if self.state == self.OPEN:
+            retry_after = max(0.0, round(self.reset_timeout - (time.monotonic() - self.opened_at), 1))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after": retry_after
+        }
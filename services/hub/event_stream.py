@@ -0,0 +1,130 @@
+"""
+SkyRas v2 Hub Event Stream
+Fans bus events out to connected SSE and WebSocket clients
+"""
+
+import os
+import json
+import asyncio
+from collections import deque
+from fnmatch import fnmatchcase
+from typing import Dict, Any, List, Optional, Set
+
+from shared.events import SkyRasEvent
+
+
+# Per-connection buffer size and how many events a slow consumer may lose before it is cut off
+EVENT_STREAM_BUFFER = int(os.getenv('EVENT_STREAM_BUFFER', '256'))
+EVENT_STREAM_MAX_DROPS = int(os.getenv('EVENT_STREAM_MAX_DROPS', '1024'))
+
+
+def _split_filter(value: Optional[str]) -> List[str]:
+    """Parse a comma-separated filter query parameter"""
+    if not value:
+        return []
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def event_episode_id(event: SkyRasEvent) -> Optional[str]:
+    """Episode an event belongs to, if any"""
+    data = event.data or {}
+    if data.get('episode_id'):
+        return str(data['episode_id'])
+    if event.event_type.startswith('episode.') and data.get('id'):
+        return str(data['id'])
+    return None
+
+
+class EventSubscription:
+    """One connected client: its filters and a bounded event buffer"""
+
+    def __init__(self, event_types: Optional[str] = None, agents: Optional[str] = None,
+                 episode_ids: Optional[str] = None, max_buffer: int = EVENT_STREAM_BUFFER,
+                 max_drops: int = EVENT_STREAM_MAX_DROPS):
+        self.event_types = _split_filter(event_types)
+        self.agents = set(_split_filter(agents))
+        self.episode_ids = set(_split_filter(episode_ids))
+        self.buffer: deque = deque(maxlen=max_buffer)
+        self.max_drops = max_drops
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def matches(self, event: SkyRasEvent) -> bool:
+        """Check the event against this client's filters (event types accept * wildcards)"""
+        if self.event_types and not any(fnmatchcase(event.event_type, pattern) for pattern in self.event_types):
+            return False
+        if self.agents and event.agent not in self.agents:
+            return False
+        if self.episode_ids and event_episode_id(event) not in self.episode_ids:
+            return False
+        return True
+
+    def offer(self, event: SkyRasEvent) -> bool:
+        """Buffer an event without blocking; a full buffer drops its oldest event"""
+        if self.closed:
+            return False
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+            if self.dropped > self.max_drops:
+                # The client has stalled for good: stop buffering for it
+                self.close()
+                return False
+        self.buffer.append(event)
+        self._ready.set()
+        return True
+
+    async def next_event(self, timeout: float) -> Optional[SkyRasEvent]:
+        """Wait for the next buffered event, or None on timeout/close"""
+        if not self.buffer and not self.closed:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.buffer:
+            return self.buffer.popleft()
+        return None
+
+    def close(self) -> None:
+        self.closed = True
+        self.buffer.clear()
+        self._ready.set()
+
+
+class EventBroadcaster:
+    """Receives events from the bus once and fans them out to every subscription"""
+
+    def __init__(self):
+        self.subscriptions: Set[EventSubscription] = set()
+        self.delivered = 0
+        self.disconnected_slow = 0
+
+    def subscribe(self, subscription: EventSubscription) -> EventSubscription:
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        if subscription.closed and subscription.dropped > subscription.max_drops:
+            self.disconnected_slow += 1
+        subscription.close()
+        self.subscriptions.discard(subscription)
+
+    async def dispatch(self, event: SkyRasEvent) -> None:
+        """Event bus callback: hand the event to every matching client"""
+        for subscription in list(self.subscriptions):
+            if subscription.matches(event) and subscription.offer(event):
+                self.delivered += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self.subscriptions),
+            "delivered": self.delivered,
+            "dropped": sum(s.dropped for s in self.subscriptions),
+            "disconnected_slow": self.disconnected_slow
+        }
+
+
+def format_sse(event: SkyRasEvent) -> str:
+    """Render an event as a Server-Sent Events frame"""
+    return f"event: {event.event_type}\ndata: {json.dumps(event.to_dict())}\n\n"
@@ -4,21 +4,31 @@ Central orchestration API for agent communication
 """
 
 import os
+import json
 import asyncio
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Type
 import httpx
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
 from contextlib import asynccontextmanager
 
 from shared.models import (
     TaskCreate, Task, TaskListResponse, APIResponse, 
     FileCreate, File, FileListResponse, SearchQuery, SearchResponse,
-    AgentStatus, HealthCheck
+    AgentStatus, HealthCheck, BatchRequest, BatchResponse
 )
 from shared.redis_client import get_redis_client
 from shared.events import get_event_bus, EventTypes
+from shared.asgi import create_app
+from upstream import UpstreamClient
+from breaker import CircuitOpenError
+from event_stream import EventBroadcaster, EventSubscription, format_sse
+from batch import BatchExecutor
+from admission import AdmissionController, AdmissionMiddleware
 
 
 # Service URLs
@@ -29,27 +39,58 @@ LETITIA_SERVICE_URL = os.getenv('LETITIA_SERVICE_URL', 'http://localhost:8002')
 redis_client = get_redis_client()
 event_bus = get_event_bus()
 
+# Pooled upstream clients (comma-separated *_SERVICE_URLS lists replicas for hedging)
+marcus_upstream = UpstreamClient("marcus", os.getenv('MARCUS_SERVICE_URLS', MARCUS_SERVICE_URL))
+letitia_upstream = UpstreamClient("letitia", os.getenv('LETITIA_SERVICE_URLS', LETITIA_SERVICE_URL))
+upstreams = {
+    "marcus": marcus_upstream,
+    "letitia": letitia_upstream
+}
+
+# How listing responses are relayed: "buffered" forwards the upstream bytes as-is (coalesced),
+# "stream" forwards them chunk by chunk, "validate" decodes and validates them (debug)
+HUB_PROXY_MODE = os.getenv('HUB_PROXY_MODE', 'buffered').lower()
+
+# Rate limiting and load shedding
+admission_controller = AdmissionController(redis_client)
+
+# Fan-out of bus events to streaming clients
+event_broadcaster = EventBroadcaster()
+EVENT_STREAM_KEEPALIVE = float(os.getenv('EVENT_STREAM_KEEPALIVE', '15'))
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     print("🚀 Starting SkyRas v2 FastAPI Hub...")
     
+    # Feed every bus channel to the event stream
+    for channel in event_bus.all_channels():
+        await event_bus.subscribe(channel, event_broadcaster.dispatch)
+    
     # Start event listener in background
     asyncio.create_task(event_bus.listen())
+    admission_controller.lag_monitor.start()
     
     yield
     
     print("🛑 Shutting down SkyRas v2 FastAPI Hub...")
+    admission_controller.lag_monitor.stop()
+    await batch_executor.aclose()
+    for upstream in upstreams.values():
+        await upstream.aclose()
 
 
-app = FastAPI(
+app = create_app(
     title="SkyRas v2 Hub",
     description="Central orchestration API for SkyRas v2 agents",
     version="1.0.0",
     lifespan=lifespan
 )
 
+# Admission control (registered first so CORS headers wrap its 429/503 responses)
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -59,6 +100,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+batch_executor = BatchExecutor(app)
+
 
 # Health check endpoint
 @app.get("/health")
@@ -71,43 +114,69 @@ async def health_check():
     }
 
 
+def circuit_open_error(error: CircuitOpenError) -> HTTPException:
+    """Fast-fail response for an upstream whose circuit is open"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(max(1, int(error.retry_after)))}
+    )
+
+
+async def proxy_upstream(upstream: UpstreamClient, method: str, path: str, model: Type[BaseModel],
+                         params: Optional[Dict[str, Any]] = None, json_body: Any = None,
+                         coalesce: bool = True):
+    """Relay an upstream response, decoding and validating it only in "validate" proxy mode"""
+    if HUB_PROXY_MODE == "stream":
+        response = await upstream.open_stream(method, path, params=params, json_body=json_body)
+        if response.status_code != 200:
+            await response.aread()
+            await response.aclose()
+            raise HTTPException(status_code=response.status_code, detail=response.text)
+        
+        # Upstreams were asked for identity; aiter_bytes still decodes one that compresses anyway
+        return StreamingResponse(
+            response.aiter_bytes(),
+            status_code=response.status_code,
+            media_type=response.headers.get("content-type", "application/json"),
+            background=BackgroundTask(response.aclose)
+        )
+    
+    response = await upstream.request(method, path, params=params, json_body=json_body, coalesce=coalesce)
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+    
+    if HUB_PROXY_MODE == "validate":
+        return model.model_validate_json(response.content)
+    
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        media_type=response.headers.get("content-type", "application/json")
+    )
+
+
 # Agent status endpoint
 @app.get("/api/v2/agents/status")
 async def get_agent_status():
     """Get status of all agents"""
-    agents = {}
-    
-    # Check Marcus
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{MARCUS_SERVICE_URL}/health", timeout=5.0)
-            agents["marcus"] = AgentStatus(
-                name="Marcus",
-                status="healthy" if response.status_code == 200 else "unhealthy",
-                last_seen=datetime.utcnow()
-            )
-    except Exception:
-        agents["marcus"] = AgentStatus(
-            name="Marcus",
-            status="unhealthy",
-            last_seen=datetime.utcnow()
+    async def check(key: str, upstream: UpstreamClient) -> AgentStatus:
+        try:
+            response = await upstream.get("/health", timeout=5.0)
+            status = "healthy" if response.status_code == 200 else "unhealthy"
+        except Exception:
+            status = "unhealthy"
+        
+        return AgentStatus(
+            name=key.capitalize(),
+            status=status,
+            last_seen=datetime.utcnow(),
+            circuit=upstream.breaker.stats()
         )
     
-    # Check Letitia
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{LETITIA_SERVICE_URL}/health", timeout=5.0)
-            agents["letitia"] = AgentStatus(
-                name="Letitia",
-                status="healthy" if response.status_code == 200 else "unhealthy",
-                last_seen=datetime.utcnow()
-            )
-    except Exception:
-        agents["letitia"] = AgentStatus(
-            name="Letitia",
-            status="unhealthy",
-            last_seen=datetime.utcnow()
-        )
+    # Check all agents concurrently
+    statuses = await asyncio.gather(*(check(key, upstream) for key, upstream in upstreams.items()))
+    agents = dict(zip(upstreams.keys(), statuses))
     
     return HealthCheck(
         status="healthy",
@@ -121,85 +190,100 @@ async def get_agent_status():
 async def create_task_via_marcus(task: TaskCreate, background_tasks: BackgroundTasks):
     """Create a task via Marcus agent"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{MARCUS_SERVICE_URL}/api/tasks",
-                json=task.dict(),
-                timeout=10.0
+        response = await marcus_upstream.post("/api/tasks", json_body=task.model_dump(mode="json"))
+        
+        if response.status_code == 200:
+            task_data = response.json()
+            
+            # Publish task created event
+            event = await event_bus.create_event(
+                EventTypes.TASK_CREATED,
+                "marcus",
+                task_data
             )
+            await event_bus.publish(event)
             
-            if response.status_code == 200:
-                task_data = response.json()
-                
-                # Publish task created event
-                event = await event_bus.create_event(
-                    EventTypes.TASK_CREATED,
-                    "marcus",
-                    task_data
-                )
-                await event_bus.publish(event)
-                
-                return APIResponse(
-                    success=True,
-                    message="Task created successfully",
-                    data=task_data
-                )
-            else:
-                raise HTTPException(status_code=response.status_code, detail=response.text)
+            return APIResponse(
+                success=True,
+                message="Task created successfully",
+                data=task_data
+            )
+        else:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
                 
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Marcus service timeout")
+    except CircuitOpenError as e:
+        raise circuit_open_error(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating task: {str(e)}")
 
 
 @app.get("/api/v2/agents/marcus/tasks", response_model=TaskListResponse)
-async def get_tasks_via_marcus():
-    """Get all tasks via Marcus agent"""
+async def get_tasks_via_marcus(status: Optional[str] = None, priority: Optional[str] = None,
+                               due_after: Optional[str] = None, due_before: Optional[str] = None,
+                               created_after: Optional[str] = None, created_before: Optional[str] = None,
+                               limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Get a page of tasks via Marcus agent, forwarding its filters and cursor"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{MARCUS_SERVICE_URL}/api/tasks", timeout=10.0)
-            
-            if response.status_code == 200:
-                tasks = response.json()
-                return TaskListResponse(
-                    success=True,
-                    message="Tasks retrieved successfully",
-                    data=tasks
-                )
-            else:
-                raise HTTPException(status_code=response.status_code, detail=response.text)
+        params = {
+            name: value for name, value in (
+                ("status", status), ("priority", priority),
+                ("due_after", due_after), ("due_before", due_before),
+                ("created_after", created_after), ("created_before", created_before),
+                ("limit", limit), ("cursor", cursor)
+            ) if value is not None
+        }
+        
+        # Concurrent identical reads share one upstream request
+        return await proxy_upstream(marcus_upstream, "GET", "/api/tasks", TaskListResponse, params=params)
                 
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Marcus service timeout")
+    except CircuitOpenError as e:
+        raise circuit_open_error(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving tasks: {str(e)}")
 
 
 # Letitia agent routes
+@app.get("/api/v2/agents/letitia/files", response_model=FileListResponse)
+async def get_files_via_letitia(limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Get a page of files via Letitia agent, forwarding its cursor"""
+    try:
+        params = {name: value for name, value in (("limit", limit), ("cursor", cursor)) if value is not None}
+        return await proxy_upstream(letitia_upstream, "GET", "/api/files", FileListResponse, params=params)
+                
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Letitia service timeout")
+    except CircuitOpenError as e:
+        raise circuit_open_error(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving files: {str(e)}")
+
+
 @app.post("/api/v2/agents/letitia/search", response_model=SearchResponse)
 async def search_via_letitia(query: SearchQuery):
     """Search files via Letitia agent"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{LETITIA_SERVICE_URL}/api/search",
-                json=query.dict(),
-                timeout=10.0
-            )
-            
-            if response.status_code == 200:
-                search_data = response.json()
-                return SearchResponse(
-                    success=True,
-                    message="Search completed successfully",
-                    **search_data
-                )
-            else:
-                raise HTTPException(status_code=response.status_code, detail=response.text)
+        # Search is idempotent, so identical concurrent queries are coalesced
+        return await proxy_upstream(
+            letitia_upstream, "POST", "/api/search", SearchResponse,
+            json_body=query.dict(), coalesce=True
+        )
                 
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Letitia service timeout")
+    except CircuitOpenError as e:
+        raise circuit_open_error(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching files: {str(e)}")
 
@@ -208,45 +292,45 @@ async def search_via_letitia(query: SearchQuery):
 async def upload_file_via_letitia(file_data: FileCreate):
     """Upload a file via Letitia agent"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{LETITIA_SERVICE_URL}/api/files",
-                json=file_data.dict(),
-                timeout=10.0
+        response = await letitia_upstream.post("/api/files", json_body=file_data.dict())
+        
+        if response.status_code == 200:
+            file_info = response.json()
+            
+            # Publish file uploaded event
+            event = await event_bus.create_event(
+                EventTypes.FILE_UPLOADED,
+                "letitia",
+                file_info
             )
+            await event_bus.publish(event)
             
-            if response.status_code == 200:
-                file_info = response.json()
-                
-                # Publish file uploaded event
-                event = await event_bus.create_event(
-                    EventTypes.FILE_UPLOADED,
-                    "letitia",
-                    file_info
-                )
-                await event_bus.publish(event)
-                
-                return APIResponse(
-                    success=True,
-                    message="File uploaded successfully",
-                    data=file_info
-                )
-            else:
-                raise HTTPException(status_code=response.status_code, detail=response.text)
+            return APIResponse(
+                success=True,
+                message="File uploaded successfully",
+                data=file_info
+            )
+        else:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
                 
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Letitia service timeout")
+    except CircuitOpenError as e:
+        raise circuit_open_error(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
 
 
-# Event stream endpoint
+# Event stream endpoints
 @app.get("/api/v2/events")
-async def get_events():
+async def get_events(limit: int = 100):
     """Get recent events from Redis"""
     try:
-        # Get recent events from Redis
-        events = redis_client.lrange("skyras:events", 0, 99)  # Last 100 events
+        # Get recent events from Redis (newest first)
+        raw_events = redis_client.lrange("skyras:events", 0, max(1, min(limit, 1000)) - 1)
+        events = [json.loads(raw) for raw in raw_events]
         return APIResponse(
             success=True,
             message="Events retrieved successfully",
@@ -256,13 +340,122 @@ async def get_events():
         raise HTTPException(status_code=500, detail=f"Error retrieving events: {str(e)}")
 
 
+@app.get("/api/v2/events/stream")
+async def stream_events(request: Request, event_type: Optional[str] = None,
+                        agent: Optional[str] = None, episode_id: Optional[str] = None):
+    """Stream bus events as Server-Sent Events, optionally filtered"""
+    subscription = event_broadcaster.subscribe(
+        EventSubscription(event_types=event_type, agents=agent, episode_ids=episode_id)
+    )
+    
+    async def event_source():
+        try:
+            while not subscription.closed:
+                if await request.is_disconnected():
+                    break
+                event = await subscription.next_event(timeout=EVENT_STREAM_KEEPALIVE)
+                if event is None:
+                    # Comment frame keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event)
+            if subscription.closed:
+                yield "event: stream.overflow\ndata: {}\n\n"
+        finally:
+            event_broadcaster.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.websocket("/api/v2/events/ws")
+async def websocket_events(websocket: WebSocket, event_type: Optional[str] = None,
+                           agent: Optional[str] = None, episode_id: Optional[str] = None):
+    """Stream bus events over a WebSocket, optionally filtered"""
+    await websocket.accept()
+    subscription = event_broadcaster.subscribe(
+        EventSubscription(event_types=event_type, agents=agent, episode_ids=episode_id)
+    )
+    
+    async def close_on_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            subscription.close()
+    
+    watcher = asyncio.create_task(close_on_disconnect())
+    
+    try:
+        while not subscription.closed:
+            event = await subscription.next_event(timeout=EVENT_STREAM_KEEPALIVE)
+            if event is None:
+                if not subscription.closed:
+                    await websocket.send_json({"event_type": "stream.keepalive"})
+                continue
+            await websocket.send_json(event.to_dict())
+        
+        if subscription.dropped > subscription.max_drops:
+            # Slow consumer exceeded its drop budget
+            await websocket.close(code=1013, reason="Event buffer overflow")
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"❌ Event stream websocket error: {e}")
+    finally:
+        watcher.cancel()
+        event_broadcaster.unsubscribe(subscription)
+
+
+# Batch endpoint
+@app.post("/api/v2/batch", response_model=BatchResponse)
+async def run_batch(batch: BatchRequest, request: Request):
+    """Run several sub-requests concurrently and return every result in one response"""
+    # Each sub-request spends the caller's own rate-limit tokens
+    results = await batch_executor.run(batch.requests, admission_controller.client_id(request.scope))
+    succeeded = sum(1 for item in results if item.status < 400)
+    
+    return BatchResponse(
+        success=succeeded == len(results),
+        message=f"Batch completed: {succeeded}/{len(results)} succeeded",
+        data=results
+    )
+
+
+# Hub metrics endpoint
+@app.get("/api/v2/metrics")
+async def get_hub_metrics():
+    """Get Hub counters, including how many upstream requests were coalesced"""
+    return APIResponse(
+        success=True,
+        message="Hub metrics retrieved successfully",
+        data={
+            "upstreams": {key: upstream.stats() for key, upstream in upstreams.items()},
+            "event_stream": event_broadcaster.stats(),
+            "admission": admission_controller.stats()
+        }
+    )
+
+
 # Cross-agent operations
 @app.post("/api/v2/agents/associate-file-task")
-async def associate_file_with_task(task_id: str, file_id: str):
-    """Associate a file with a task (cross-agent operation)"""
+async def associate_file_with_task(task_id: str, file_id: str, role: str = "input"):
+    """Associate a file with a task (cross-agent operation)
+    
+    role is "input" (the task uses the file) or "output" (the task produces it);
+    Marcus schedules a file's consumers after its producers.
+    """
+    if role not in ("input", "output"):
+        raise HTTPException(status_code=400, detail="role must be 'input' or 'output'")
+    
     try:
         # Notify both agents
-        event_data = {"task_id": task_id, "file_id": file_id}
+        event_data = {"task_id": task_id, "file_id": file_id, "role": role}
         
         # Create association event
         event = await event_bus.create_event(
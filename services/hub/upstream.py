@@ -0,0 +1,221 @@
+"""
+SkyRas v2 Hub Upstream Clients
+Pooled HTTP clients for the agent services behind the Hub
+"""
+
+import os
+import json
+import time
+import asyncio
+import itertools
+from collections import deque
+from typing import Dict, Any, List, Optional, Union
+import httpx
+
+from singleflight import SingleFlight
+from breaker import CircuitBreaker
+
+
+# Hedge idempotent GETs across replicas once enough latency samples exist
+HEDGE_REQUESTS = os.getenv('HUB_HEDGE_REQUESTS', 'false').lower() in ('1', 'true', 'yes')
+HEDGE_MIN_SAMPLES = int(os.getenv('HUB_HEDGE_MIN_SAMPLES', '20'))
+HEDGE_MIN_DELAY = float(os.getenv('HUB_HEDGE_MIN_DELAY_MS', '10')) / 1000
+
+
+class LatencyWindow:
+    """Rolling window of recent request latencies"""
+
+    def __init__(self, size: int = 200):
+        self.samples: deque = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+class UpstreamClient:
+    """Pooled, coalescing HTTP client for one upstream agent service"""
+
+    def __init__(self, name: str, base_urls: Union[str, List[str]], timeout: float = None):
+        self.name = name
+        if isinstance(base_urls, str):
+            base_urls = [url for url in base_urls.split(',') if url.strip()]
+        self.base_urls = [url.strip().rstrip('/') for url in base_urls]
+        self.base_url = self.base_urls[0]
+        self.timeout = timeout or float(os.getenv('HUB_UPSTREAM_TIMEOUT', '10'))
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=int(os.getenv('HUB_UPSTREAM_MAX_CONNECTIONS', '100')),
+                max_keepalive_connections=int(os.getenv('HUB_UPSTREAM_MAX_KEEPALIVE', '20'))
+            )
+        )
+        self.singleflight = SingleFlight()
+        self.breaker = CircuitBreaker(name)
+        self.latency = LatencyWindow()
+        self._replicas = itertools.cycle(range(len(self.base_urls)))
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None,
+                  timeout: Optional[float] = None, coalesce: bool = True) -> httpx.Response:
+        """GET from the upstream; concurrent identical GETs share one request"""
+        return await self.request("GET", path, params=params, timeout=timeout, coalesce=coalesce)
+
+    async def post(self, path: str, json_body: Any = None, timeout: Optional[float] = None,
+                   coalesce: bool = False) -> httpx.Response:
+        """POST to the upstream; only pass coalesce=True for idempotent calls such as search"""
+        return await self.request("POST", path, json_body=json_body, timeout=timeout, coalesce=coalesce)
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                      json_body: Any = None, timeout: Optional[float] = None,
+                      coalesce: bool = False) -> httpx.Response:
+        """Send a request, coalescing it with identical in-flight requests if asked"""
+        async def send() -> httpx.Response:
+            return await self._guarded_send(method, path, params, json_body, timeout)
+
+        if not coalesce:
+            return await send()
+
+        return await self.singleflight.do(self._request_key(method, path, params, json_body), send)
+
+    async def _guarded_send(self, method: str, path: str, params: Optional[Dict[str, Any]],
+                            json_body: Any, timeout: Optional[float]) -> httpx.Response:
+        """Send through the circuit breaker, hedging idempotent GETs when enabled"""
+        self.breaker.before_call()
+        started = time.perf_counter()
+
+        try:
+            if method == "GET" and self._hedge_delay() is not None:
+                response = await self._hedged_send(method, path, params, timeout)
+            else:
+                response = await self._send_to(next(self._replicas), method, path, params, json_body, timeout)
+        except httpx.TransportError:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.record_abandoned()
+            raise
+
+        self.latency.add(time.perf_counter() - started)
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def open_stream(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                          json_body: Any = None, timeout: Optional[float] = None) -> httpx.Response:
+        """Send through the circuit breaker and return the response with its body unread
+
+        The caller owns the response and must aclose() it once the body has been forwarded.
+        The body is requested uncompressed so its raw bytes can be relayed as-is; the Hub's
+        own compression then negotiates with the actual client.
+        """
+        self.breaker.before_call()
+        started = time.perf_counter()
+        request = self.client.build_request(
+            method,
+            f"{self.base_urls[next(self._replicas)]}{path}",
+            params=params,
+            json=json_body,
+            headers={"Accept-Encoding": "identity"},
+            timeout=timeout or self.timeout
+        )
+
+        try:
+            response = await self.client.send(request, stream=True)
+        except httpx.TransportError:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.record_abandoned()
+            raise
+
+        # Time to headers: the body is streamed after this call returns
+        self.latency.add(time.perf_counter() - started)
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def _send_to(self, replica: int, method: str, path: str, params: Optional[Dict[str, Any]],
+                       json_body: Any, timeout: Optional[float]) -> httpx.Response:
+        return await self.client.request(
+            method,
+            f"{self.base_urls[replica]}{path}",
+            params=params,
+            json=json_body,
+            timeout=timeout or self.timeout
+        )
+
+    def _hedge_delay(self) -> Optional[float]:
+        """p95-derived delay before a hedge is sent, or None when hedging doesn't apply"""
+        if not HEDGE_REQUESTS or len(self.base_urls) < 2:
+            return None
+        if len(self.latency.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DELAY, self.latency.percentile(0.95))
+
+    async def _hedged_send(self, method: str, path: str, params: Optional[Dict[str, Any]],
+                           timeout: Optional[float]) -> httpx.Response:
+        """Send to one replica; if it is slower than p95, race a second replica"""
+        primary_replica = next(self._replicas)
+        primary = asyncio.ensure_future(self._send_to(primary_replica, method, path, params, None, timeout))
+        pending = {primary}
+        error = None
+
+        # Everything, including the first wait, sits inside the try so a
+        # cancelled caller never leaves a request running behind it
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self._hedge_delay())
+            if done:
+                return primary.result()
+
+            self.hedged += 1
+            hedge_replica = (primary_replica + 1) % len(self.base_urls)
+            hedge = asyncio.ensure_future(self._send_to(hedge_replica, method, path, params, None, timeout))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _request_key(self, method: str, path: str, params: Optional[Dict[str, Any]],
+                     json_body: Any) -> str:
+        """Canonical key identifying identical requests"""
+        return json.dumps(
+            [method, path, sorted((params or {}).items()), json_body],
+            sort_keys=True,
+            default=str
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for this upstream"""
+        p95 = self.latency.percentile(0.95)
+        return {
+            "base_urls": self.base_urls,
+            "singleflight": self.singleflight.stats(),
+            "circuit": self.breaker.stats(),
+            "latency_p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins
+        }
+
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        await self.client.aclose()
@@ -4,11 +4,12 @@ SkyRas v2 Asset Library & Metadata Agent
 """
 
 import os
+import json
 import asyncio
 import uuid
 from datetime import datetime
-from typing import Dict, Any, List
-from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File as FastAPIFile
+from typing import Dict, Any, List, Optional
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, UploadFile, File as FastAPIFile
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
@@ -18,12 +19,17 @@ sys.path.append('/app')
 from shared.models import FileCreate, File, FileListResponse, APIResponse, SearchQuery, SearchResponse
 from shared.redis_client import get_redis_client
 from shared.events import get_event_bus, EventTypes
+from shared.asgi import create_app
+from shared.pagination import zset_page, timestamp_score, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 
 # Initialize Redis and Event Bus
 redis_client = get_redis_client()
 event_bus = get_event_bus()
 
+# All files, scored by upload time
+FILES_BY_UPLOADED_KEY = "files:by_uploaded"
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -46,7 +52,7 @@ async def lifespan(app: FastAPI):
     print("🛑 Shutting down Letitia Agent...")
 
 
-app = FastAPI(
+app = create_app(
     title="Letitia Agent",
     description="Library & Asset Management Agent for SkyRas v2",
     version="1.0.0",
@@ -91,20 +97,24 @@ async def create_file(file_data: FileCreate, background_tasks: BackgroundTasks):
             uploaded_at=datetime.utcnow()
         )
         
-        redis_client.set(f"file:{file_id}", new_file.dict())
-        redis_client.lpush("files:list", file_id)
+        file_info = new_file.model_dump(mode="json")
+        
+        pipe = redis_client.client.pipeline()
+        pipe.set(f"file:{file_id}", json.dumps(file_info))
+        pipe.zadd(FILES_BY_UPLOADED_KEY, {file_id: timestamp_score(new_file.uploaded_at)})
+        pipe.execute()
         
         event = await event_bus.create_event(
             EventTypes.FILE_UPLOADED,
             "letitia",
-            new_file.dict()
+            file_info
         )
         await event_bus.publish(event)
         
         return APIResponse(
             success=True,
             message="File created successfully",
-            data=new_file.dict()
+            data=file_info
         )
         
     except Exception as e:
@@ -112,23 +122,22 @@ async def create_file(file_data: FileCreate, background_tasks: BackgroundTasks):
 
 
 @app.get("/api/files", response_model=FileListResponse)
-async def get_files():
-    """Get all files"""
+async def get_files(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                    cursor: Optional[str] = None):
+    """Get a page of files, newest first; pass next_cursor as cursor for the following page"""
     try:
-        file_ids = redis_client.lrange("files:list", 0, -1) or []
-        files = []
-        
-        for file_id in file_ids:
-            file_data = redis_client.get(f"file:{file_id}")
-            if file_data:
-                files.append(file_data)
+        file_ids, next_cursor = zset_page(redis_client.client, FILES_BY_UPLOADED_KEY, limit, cursor)
+        files = [file_data for file_data in redis_client.mget([f"file:{file_id}" for file_id in file_ids]) if file_data]
         
         return FileListResponse(
             success=True,
             message="Files retrieved successfully",
-            data=files
+            data=files,
+            next_cursor=next_cursor
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving files: {str(e)}")
 
@@ -138,11 +147,10 @@ async def search_files(query: SearchQuery):
     """Search files (mock implementation)"""
     try:
         # Simple mock search - just return all files
-        file_ids = redis_client.lrange("files:list", 0, query.limit - 1) or []
+        file_ids = redis_client.zrange(FILES_BY_UPLOADED_KEY, 0, query.limit - 1, desc=True)
         results = []
         
-        for file_id in file_ids:
-            file_data = redis_client.get(f"file:{file_id}")
+        for file_data in redis_client.mget([f"file:{file_id}" for file_id in file_ids]):
             if file_data and query.query.lower() in file_data.get('filename', '').lower():
                 results.append({
                     "id": file_data['id'],
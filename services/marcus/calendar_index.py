@@ -0,0 +1,160 @@
+"""
+SkyRas v2 Marcus Calendar Index
+Interval tree over calendar events for conflict checks and free-slot search
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from shared.pagination import timestamp_score
+
+
+DEFAULT_EVENT_DURATION = timedelta(hours=1)
+# How far ahead next_free_slot looks before giving up
+DEFAULT_SEARCH_HORIZON = timedelta(days=90)
+
+
+class _Node:
+    """Treap node keyed by (start, id), augmented with the largest end in its subtree"""
+
+    __slots__ = ('key', 'end', 'priority', 'max_end', 'left', 'right')
+
+    def __init__(self, key: Tuple[float, str], end: float):
+        self.key = key
+        self.end = end
+        self.priority = random.random()
+        self.max_end = end
+        self.left = None
+        self.right = None
+
+    def refresh(self) -> None:
+        self.max_end = max(
+            self.end,
+            self.left.max_end if self.left else float('-inf'),
+            self.right.max_end if self.right else float('-inf')
+        )
+
+
+def _split(node: Optional[_Node], key: Tuple[float, str]) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Split into keys < key and keys >= key"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        node.refresh()
+        return node, right
+    left, node.left = _split(node.left, key)
+    node.refresh()
+    return left, node
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    """Merge two treaps where every key in left sorts before every key in right"""
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.refresh()
+        return left
+    right.left = _merge(left, right.left)
+    right.refresh()
+    return right
+
+
+def _event_bounds(event: Dict[str, Any]) -> Tuple[float, float]:
+    """Event start/end as scores; a missing or inverted end means the default duration"""
+    start = timestamp_score(event['start'])
+    end = timestamp_score(event['end']) if event.get('end') else None
+    if end is None or end <= start:
+        end = start + DEFAULT_EVENT_DURATION.total_seconds()
+    return start, end
+
+
+class CalendarIndex:
+    """In-memory interval index over calendar events
+
+    Insert, remove and update are O(log n); find_conflicts is O(log n + k) for k hits.
+    """
+
+    def __init__(self):
+        self.root: Optional[_Node] = None
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self.bounds: Dict[str, Tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def load(self, events: List[Dict[str, Any]]) -> None:
+        """Replace the index contents"""
+        self.root = None
+        self.events.clear()
+        self.bounds.clear()
+        for event in events:
+            self.add(event)
+
+    def add(self, event: Dict[str, Any]) -> None:
+        """Insert an event, replacing any earlier version with the same id"""
+        event_id = str(event['id'])
+        if event_id in self.events:
+            self.remove(event_id)
+
+        start, end = _event_bounds(event)
+        key = (start, event_id)
+        left, right = _split(self.root, key)
+        self.root = _merge(_merge(left, _Node(key, end)), right)
+        self.events[event_id] = event
+        self.bounds[event_id] = (start, end)
+
+    def remove(self, event_id: str) -> bool:
+        event_id = str(event_id)
+        if event_id not in self.events:
+            return False
+
+        start, _ = self.bounds.pop(event_id)
+        del self.events[event_id]
+        key = (start, event_id)
+        left, rest = _split(self.root, key)
+        _, right = _split(rest, (start, event_id + '\0'))
+        self.root = _merge(left, right)
+        return True
+
+    def find_conflicts(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Events overlapping [start, end), earliest first"""
+        low, high = timestamp_score(start), timestamp_score(end)
+        hits: List[Tuple[float, str]] = []
+        stack = [self.root] if self.root else []
+        # Iterative walk that skips subtrees ending before the range or starting after it
+        while stack:
+            node = stack.pop()
+            if node is None or node.max_end <= low:
+                continue
+            if node.key[0] < high:
+                stack.append(node.right)
+                if node.end > low:
+                    hits.append(node.key)
+            stack.append(node.left)
+
+        return [self.events[event_id] for _, event_id in sorted(hits)]
+
+    def next_free_slot(self, duration: timedelta, after: Optional[datetime] = None,
+                       until: Optional[datetime] = None) -> Optional[Tuple[datetime, datetime]]:
+        """Earliest [start, start + duration) at or after `after` that overlaps no event"""
+        candidate = datetime.utcfromtimestamp(timestamp_score(after)) if after else datetime.utcnow()
+        limit = datetime.utcfromtimestamp(timestamp_score(until)) if until else candidate + DEFAULT_SEARCH_HORIZON
+        while candidate + duration <= limit:
+            conflicts = self.find_conflicts(candidate, candidate + duration)
+            if not conflicts:
+                return candidate, candidate + duration
+            # Jump past everything in the way; each step clears at least one event
+            latest_end = max(self.bounds[str(event['id'])][1] for event in conflicts)
+            candidate = datetime.utcfromtimestamp(latest_end)
+        return None
+
+    def apply_change(self, change: Dict[str, Any]) -> None:
+        """Apply a schedule.changed payload ({'action': created|updated|deleted, 'event': ...})"""
+        event = change.get('event') or {}
+        if change.get('action') == 'deleted':
+            self.remove(event.get('id'))
+        elif event.get('id') is not None:
+            self.add(event)
@@ -0,0 +1,60 @@
+"""
+SkyRas v2 Marcus Job Handlers
+Side effects Marcus runs through the shared job queue instead of inside the request
+"""
+
+from typing import Dict, Any, List
+
+from shared.jobs import JobQueue
+from shared.n8n import N8nDispatcher
+
+
+# Per-queue caps across every worker, sized to what each downstream service tolerates.
+# n8n is uncapped here: the dispatcher limits its own requests and batches better the
+# more jobs hand it payloads at once
+QUEUE_LIMITS = {
+    "n8n": 0,
+    "calendar": 4,
+    "notion": 3
+}
+
+
+class N8nWebhooks:
+    """Task workflow triggers sent to a real n8n through the shared dispatcher"""
+
+    def __init__(self, dispatcher: N8nDispatcher):
+        self.dispatcher = dispatcher
+
+    async def trigger_task_created(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.dispatcher.dispatch("task-created", task_data)
+
+    async def trigger_task_updated(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.dispatcher.dispatch("task-updated", task_data)
+
+    async def trigger_task_deleted(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.dispatcher.dispatch("task-deleted", task_data)
+
+    async def trigger_tasks_bulk(self, action: str, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self.dispatcher.dispatch_many(f"task-{action}", tasks)
+
+
+def register_job_handlers(job_queue: JobQueue, calendar_mock, n8n_mock, notion_client,
+                          n8n_dispatcher: N8nDispatcher) -> None:
+    """Register Marcus's handlers; the API process and worker processes both call this"""
+    for queue, limit in QUEUE_LIMITS.items():
+        job_queue.set_limit(queue, limit)
+
+    # Fall back to the mock until an n8n instance is configured
+    n8n = N8nWebhooks(n8n_dispatcher) if n8n_dispatcher.is_configured() else n8n_mock
+    job_queue.register("n8n.task_created", n8n.trigger_task_created, queue="n8n")
+    job_queue.register("n8n.task_updated", n8n.trigger_task_updated, queue="n8n")
+    job_queue.register("n8n.task_deleted", n8n.trigger_task_deleted, queue="n8n")
+    job_queue.register("n8n.tasks_bulk", n8n.trigger_tasks_bulk, queue="n8n")
+    job_queue.register("n8n.workflow", n8n_dispatcher.dispatch, queue="n8n")
+
+    job_queue.register("calendar.create_event", calendar_mock.create_event, queue="calendar")
+    job_queue.register("calendar.create_events", calendar_mock.create_events, queue="calendar")
+
+    job_queue.register("notion.create_episode_page", notion_client.create_episode_page, queue="notion")
+    job_queue.register("notion.create_scene_tasks", notion_client.create_scene_tasks, queue="notion")
+    job_queue.register("notion.update_scene_status", notion_client.update_scene_status, queue="notion")
@@ -7,16 +7,30 @@ import os
 import asyncio
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from typing import Dict, Any, List, Optional
+from fastapi import FastAPI, HTTPException, Query, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
+from pydantic import ValidationError
+
 from shared.models import (
-    TaskCreate, Task, TaskUpdate, TaskListResponse, APIResponse
+    TaskCreate, Task, TaskUpdate, TaskListResponse, APIResponse, TaskStatus, TaskPriority,
+    TaskBulkUpdate, BulkTaskCreateRequest, BulkTaskUpdateRequest, BulkTaskDeleteRequest,
+    BulkItemResult, BulkTaskResponse
 )
 from shared.redis_client import get_redis_client
 from shared.events import get_event_bus, EventTypes
+from shared.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from shared.asgi import create_app
+from shared.jobs import get_job_queue, JobWorker
+from shared.n8n import get_n8n_dispatcher
+from task_repository import TaskRepository
+from calendar_index import CalendarIndex, DEFAULT_EVENT_DURATION
+from scheduler import TaskScheduler, TASK_FILES_KEY, FILE_ROLES, OPEN_STATUSES
+from job_handlers import register_job_handlers
+from workflow_engine import get_workflow_engine
+from workflow_actions import GiorgioTools, register_workflow_actions
 from mocks.calendar import CalendarMock
 from mocks.plane import PlaneMock
 from mocks.n8n import N8nMock
@@ -28,9 +42,15 @@ from skysky.notion_client import NotionClient
 # Initialize Redis and Event Bus
 redis_client = get_redis_client()
 event_bus = get_event_bus()
+task_repository = TaskRepository(redis_client)
+scheduler = TaskScheduler()
+
+# Attempts at an update without If-Match before giving up on a contended task
+UPDATE_MAX_ATTEMPTS = int(os.getenv('UPDATE_MAX_ATTEMPTS', '10'))
 
 # Initialize mock services
 calendar_mock = CalendarMock()
+calendar_index = CalendarIndex()
 plane_mock = PlaneMock()
 n8n_mock = N8nMock()
 
@@ -39,15 +59,48 @@ episode_manager = EpisodeManager()
 resolve_api = ResolveAPI()
 notion_client = NotionClient()
 
+# Side effects go through the durable job queue; the API process also runs a worker
+# unless MARCUS_INLINE_WORKER is off and separate `python worker.py` processes are used
+job_queue = get_job_queue()
+n8n_dispatcher = get_n8n_dispatcher()
+register_job_handlers(job_queue, calendar_mock, n8n_mock, notion_client, n8n_dispatcher)
+job_worker = JobWorker(job_queue) if os.getenv('MARCUS_INLINE_WORKER', 'true').lower() == 'true' else None
+
+# Declarative workflows (workflows/*.yaml); runs live in Redis and survive restarts
+workflow_engine = get_workflow_engine()
+giorgio_tools = GiorgioTools()
+register_workflow_actions(workflow_engine, giorgio_tools)
+
+# Events folded into the materialized episode summaries
+EPISODE_SUMMARY_EVENTS = {"scene.updated", "asset.generated", "batch.assets.generated"}
+
+# Workflow a SkySky episode runs through
+SKYSKY_WORKFLOW_ID = os.getenv('SKYSKY_WORKFLOW_ID', 'skysky_episode_v1')
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     print("🚀 Starting Marcus Agent (Task Management)...")
     
+    await task_repository.start()
+    
+    # Build the calendar index once; schedule.changed events keep it current
+    calendar_index.load(await calendar_mock.get_events())
+    await load_scheduler()
+    await setup_event_subscriptions()
+    
     # Start event listener in background
     asyncio.create_task(event_bus.listen())
     
+    if job_worker:
+        asyncio.create_task(job_worker.run())
+    
+    # Pick up workflow runs left unfinished by this or another Marcus process
+    workflow_engine.load_definitions()
+    await workflow_engine.resume()
+    asyncio.create_task(workflow_engine.watch())
+    
     # Publish agent started event
     event = await event_bus.create_event(
         EventTypes.AGENT_STARTED,
@@ -59,9 +112,16 @@ async def lifespan(app: FastAPI):
     yield
     
     print("🛑 Shutting down Marcus Agent...")
+    if job_worker:
+        await job_worker.stop()
+    await workflow_engine.close()
+    await giorgio_tools.close()
+    await episode_manager.close()
+    await n8n_dispatcher.close()
+    await task_repository.close()
 
 
-app = FastAPI(
+app = create_app(
     title="Marcus Agent",
     description="Task Management & Scheduling Agent for SkyRas v2",
     version="1.0.0",
@@ -90,9 +150,22 @@ async def health_check():
     }
 
 
+@app.get("/api/jobs", response_model=APIResponse)
+async def get_job_stats():
+    """Background job counts per queue (ready, scheduled, running, dead)"""
+    try:
+        return APIResponse(
+            success=True,
+            message="Job queue stats retrieved",
+            data={"queues": job_queue.stats()}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving job stats: {str(e)}")
+
+
 # Task management endpoints
 @app.post("/api/tasks", response_model=APIResponse)
-async def create_task(task: TaskCreate, background_tasks: BackgroundTasks):
+async def create_task(task: TaskCreate):
     """Create a new task"""
     try:
         # Generate task ID
@@ -107,30 +180,30 @@ async def create_task(task: TaskCreate, background_tasks: BackgroundTasks):
             priority=task.priority,
             due_date=task.due_date,
             created_by=task.created_by or "marcus",
+            depends_on=task.depends_on,
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
         
-        # Store in Redis (in production, this would be in database)
-        redis_client.set(f"task:{task_id}", new_task.dict())
+        task_data = new_task.model_dump(mode="json")
         
-        # Add to task list
-        redis_client.lpush("tasks:list", task_id)
+        await task_repository.add([task_data])
         
         # Publish task created event
         event = await event_bus.create_event(
             EventTypes.TASK_CREATED,
             "marcus",
-            new_task.dict()
+            task_data
         )
         await event_bus.publish(event)
         
         # Trigger n8n webhook (mock)
-        background_tasks.add_task(n8n_mock.trigger_task_created, new_task.dict())
+        job_queue.enqueue("n8n.task_created", task_data)
         
         # Create calendar event if due date is set
         if task.due_date:
-            background_tasks.add_task(calendar_mock.create_event, {
+            job_queue.enqueue("calendar.create_event", {
+                "task_id": task_id,
                 "title": task.title,
                 "start": task.due_date.isoformat(),
                 "description": task.description
@@ -139,44 +212,288 @@ async def create_task(task: TaskCreate, background_tasks: BackgroundTasks):
         return APIResponse(
             success=True,
             message="Task created successfully",
-            data=new_task.dict()
+            data=task_data
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating task: {str(e)}")
 
 
+def parse_enum_list(value: Optional[str], enum_type, name: str) -> Optional[List[str]]:
+    """Split a comma-separated filter and validate each value against an enum"""
+    if not value:
+        return None
+    values = [item.strip() for item in value.split(',') if item.strip()]
+    allowed = {member.value for member in enum_type}
+    invalid = [item for item in values if item not in allowed]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {', '.join(invalid)}")
+    return values
+
+
 @app.get("/api/tasks", response_model=TaskListResponse)
-async def get_tasks():
-    """Get all tasks"""
+async def get_tasks(status: Optional[str] = None, priority: Optional[str] = None,
+                    due_after: Optional[datetime] = None, due_before: Optional[datetime] = None,
+                    created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+                    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                    cursor: Optional[str] = None):
+    """Get a page of tasks, newest first, optionally filtered by status, priority and dates
+    
+    status and priority accept comma-separated values, e.g. ?status=pending,in-progress&priority=urgent.
+    Pass the returned next_cursor as cursor to fetch the following page.
+    """
     try:
-        # Get all task IDs
-        task_ids = redis_client.lrange("tasks:list", 0, -1)
-        tasks = []
-        
-        for task_id in task_ids:
-            task_data = redis_client.get(f"task:{task_id}")
-            if task_data:
-                tasks.append(task_data)
-        
+        # Only the page's tasks are loaded, whichever store backs the repository
+        tasks, next_cursor = await task_repository.query(
+            limit,
+            cursor,
+            statuses=parse_enum_list(status, TaskStatus, "status"),
+            priorities=parse_enum_list(priority, TaskPriority, "priority"),
+            due_after=due_after,
+            due_before=due_before,
+            created_after=created_after,
+            created_before=created_before
+        )
         return TaskListResponse(
             success=True,
             message="Tasks retrieved successfully",
-            data=tasks
+            data=tasks,
+            next_cursor=next_cursor
         )
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving tasks: {str(e)}")
 
 
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Version a client expects from an If-Match header (None for absent or *)"""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be a version ETag such as \"3\"")
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def version_conflict(kind: str, current_version: int) -> HTTPException:
+    """409 telling the client which version it should re-read"""
+    return HTTPException(
+        status_code=409,
+        detail=f"Version conflict: {kind} is at version {current_version}",
+        headers={"ETag": etag(current_version)}
+    )
+
+
+def validation_error_message(error: ValidationError) -> str:
+    """Compact one-line summary of a pydantic validation error"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}" for err in error.errors()
+    )
+
+
+def bulk_response(action: str, results: List[BulkItemResult]) -> BulkTaskResponse:
+    """Summarise per-item bulk results"""
+    succeeded = sum(1 for result in results if result.success)
+    return BulkTaskResponse(
+        success=succeeded > 0,
+        message=f"{succeeded} of {len(results)} tasks {action}",
+        data=results,
+        succeeded=succeeded,
+        failed=len(results) - succeeded
+    )
+
+
+@app.post("/api/tasks/bulk", response_model=BulkTaskResponse)
+async def create_tasks_bulk(request: BulkTaskCreateRequest):
+    """Create many tasks in one write; invalid items are reported, not fatal"""
+    try:
+        results: List[BulkItemResult] = []
+        created: List[Dict[str, Any]] = []
+        now = datetime.utcnow()
+        
+        for index, item in enumerate(request.tasks):
+            try:
+                task = TaskCreate.model_validate(item)
+            except ValidationError as e:
+                results.append(BulkItemResult(index=index, success=False, error=validation_error_message(e)))
+                continue
+            
+            task_data = Task(
+                id=uuid.uuid4(),
+                created_by=task.created_by or "marcus",
+                created_at=now,
+                updated_at=now,
+                **task.model_dump(exclude={"created_by"})
+            ).model_dump(mode="json")
+            
+            created.append(task_data)
+            results.append(BulkItemResult(index=index, id=task_data["id"], success=True, data=task_data))
+        
+        if created:
+            await task_repository.add(created)
+            
+            # One event and one downstream call per batch instead of per task
+            event = await event_bus.create_event(
+                EventTypes.TASKS_BULK_CREATED,
+                "marcus",
+                {"count": len(created), "tasks": created}
+            )
+            await event_bus.publish(event)
+            
+            job_queue.enqueue("n8n.tasks_bulk", "created", created)
+            
+            calendar_events = [
+                {"task_id": task["id"], "title": task["title"], "start": task["due_date"], "description": task["description"]}
+                for task in created if task.get("due_date")
+            ]
+            if calendar_events:
+                job_queue.enqueue("calendar.create_events", calendar_events)
+        
+        return bulk_response("created", results)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating tasks: {str(e)}")
+
+
+@app.put("/api/tasks/bulk", response_model=BulkTaskResponse)
+async def update_tasks_bulk(request: BulkTaskUpdateRequest):
+    """Update many tasks with one read and one write round trip
+    
+    An item carrying "version" is only applied if the task is at that version. Items whose
+    task changed concurrently fail with a version conflict and should be re-read and retried.
+    """
+    try:
+        results: List[Optional[BulkItemResult]] = [None] * len(request.tasks)
+        updates: List[tuple] = []
+        
+        for index, item in enumerate(request.tasks):
+            try:
+                update = TaskBulkUpdate.model_validate(item)
+            except ValidationError as e:
+                raw_id = item.get("id") if isinstance(item, dict) else None
+                results[index] = BulkItemResult(index=index, id=str(raw_id) if raw_id is not None else None,
+                                                success=False, error=validation_error_message(e))
+                continue
+            updates.append((
+                index, str(update.id), update.version,
+                update.model_dump(mode="json", exclude_unset=True, exclude={"id", "version"})
+            ))
+        
+        task_ids = list(dict.fromkeys(task_id for _, task_id, _, _ in updates))
+        stored = dict(zip(task_ids, await task_repository.get_many(task_ids, fresh=True)))
+        current = {task_id: dict(task_data) for task_id, task_data in stored.items() if task_data}
+        now = datetime.utcnow().isoformat()
+        # depends_on changes accepted so far, so the cycle check sees the batch's own edges
+        pending_edges: Dict[str, List[str]] = {}
+        
+        # Items are applied in order, so repeated ids see earlier updates
+        for index, task_id, version, fields in updates:
+            if task_id not in current:
+                results[index] = BulkItemResult(index=index, id=task_id, success=False, error="Task not found")
+                continue
+            stored_version = stored[task_id].get("version", 1)
+            if version is not None and version != stored_version:
+                results[index] = BulkItemResult(index=index, id=task_id, success=False,
+                                                error=f"Version conflict: task is at version {stored_version}")
+                continue
+            if fields.get("depends_on") and scheduler.creates_cycle(task_id, fields["depends_on"], pending_edges):
+                results[index] = BulkItemResult(index=index, id=task_id, success=False,
+                                                error="depends_on would create a dependency cycle")
+                continue
+            if "depends_on" in fields:
+                pending_edges[task_id] = fields["depends_on"] or []
+            current[task_id].update(fields)
+            current[task_id]["updated_at"] = now
+            results[index] = BulkItemResult(index=index, id=task_id, success=True, data=current[task_id])
+        
+        applied = {result.id for result in results if result.success}
+        updated = [current[task_id] for task_id in task_ids if task_id in applied]
+        
+        if updated:
+            conflicts = set(await task_repository.save([(stored[task_data["id"]], task_data) for task_data in updated]))
+            for result in results:
+                if result.success and result.id in conflicts:
+                    result.success = False
+                    result.data = None
+                    result.error = "Version conflict: task changed during the update"
+                elif result.success:
+                    result.data = current[result.id]
+            updated = [task_data for task_data in updated if task_data["id"] not in conflicts]
+        
+        if updated:
+            event = await event_bus.create_event(
+                EventTypes.TASKS_BULK_UPDATED,
+                "marcus",
+                {"count": len(updated), "tasks": updated}
+            )
+            await event_bus.publish(event)
+            
+            job_queue.enqueue("n8n.tasks_bulk", "updated", updated)
+        
+        return bulk_response("updated", results)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating tasks: {str(e)}")
+
+
+@app.delete("/api/tasks/bulk", response_model=BulkTaskResponse)
+async def delete_tasks_bulk(request: BulkTaskDeleteRequest):
+    """Delete many tasks with one read and one write round trip"""
+    try:
+        results: List[BulkItemResult] = []
+        deleted: List[Dict[str, Any]] = []
+        stored = await task_repository.get_many(request.ids)
+        removed: List[Dict[str, Any]] = []
+        seen = set()
+        
+        for index, (task_id, task_data) in enumerate(zip(request.ids, stored)):
+            if not task_data or task_id in seen:
+                results.append(BulkItemResult(index=index, id=task_id, success=False, error="Task not found"))
+                continue
+            seen.add(task_id)
+            
+            removed.append(task_data)
+            deleted.append({"task_id": task_id})
+            results.append(BulkItemResult(index=index, id=task_id, success=True))
+        
+        if deleted:
+            await task_repository.remove(removed)
+            
+            event = await event_bus.create_event(
+                EventTypes.TASKS_BULK_DELETED,
+                "marcus",
+                {"count": len(deleted), "task_ids": [item["task_id"] for item in deleted]}
+            )
+            await event_bus.publish(event)
+            
+            job_queue.enqueue("n8n.tasks_bulk", "deleted", deleted)
+        
+        return bulk_response("deleted", results)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting tasks: {str(e)}")
+
+
 @app.get("/api/tasks/{task_id}", response_model=APIResponse)
-async def get_task(task_id: str):
-    """Get a specific task"""
+async def get_task(task_id: str, response: Response):
+    """Get a specific task; the ETag is its version, for use in If-Match"""
     try:
-        task_data = redis_client.get(f"task:{task_id}")
+        task_data = await task_repository.get(task_id)
         if not task_data:
             raise HTTPException(status_code=404, detail="Task not found")
         
+        response.headers["ETag"] = etag(task_data.get("version", 1))
         return APIResponse(
             success=True,
             message="Task retrieved successfully",
@@ -190,23 +507,38 @@ async def get_task(task_id: str):
 
 
 @app.put("/api/tasks/{task_id}", response_model=APIResponse)
-async def update_task(task_id: str, task_update: TaskUpdate, background_tasks: BackgroundTasks):
-    """Update a task"""
+async def update_task(task_id: str, task_update: TaskUpdate,
+                      response: Response, if_match: Optional[str] = Header(None)):
+    """Update a task
+    
+    With If-Match the update only applies to that version and a 409 is returned otherwise.
+    Without it the changed fields are applied to whatever version is current, retrying
+    if another writer gets in between, so concurrent updates are never silently lost.
+    """
     try:
-        # Get existing task
-        task_data = redis_client.get(f"task:{task_id}")
-        if not task_data:
-            raise HTTPException(status_code=404, detail="Task not found")
+        expected_version = parse_if_match(if_match)
+        fields = task_update.model_dump(mode="json", exclude_unset=True)
+        if fields.get("depends_on") and scheduler.creates_cycle(task_id, fields["depends_on"]):
+            raise HTTPException(status_code=400, detail="depends_on would create a dependency cycle")
         
-        # Update task with new data
-        updated_data = task_data.copy()
-        for field, value in task_update.dict(exclude_unset=True).items():
-            updated_data[field] = value
+        for _ in range(UPDATE_MAX_ATTEMPTS):
+            # Get existing task
+            task_data = await task_repository.get(task_id, fresh=True)
+            if not task_data:
+                raise HTTPException(status_code=404, detail="Task not found")
+            if expected_version is not None and task_data.get("version", 1) != expected_version:
+                raise version_conflict("task", task_data.get("version", 1))
+            
+            # Update task with new data
+            updated_data = {**task_data, **fields, "updated_at": datetime.utcnow().isoformat()}
+            
+            # Compare-and-set against the version just read
+            if not await task_repository.save([(task_data, updated_data)]):
+                break
+        else:
+            raise HTTPException(status_code=409, detail="Task is being updated concurrently, retry")
         
-        updated_data["updated_at"] = datetime.utcnow().isoformat()
-        
-        # Store updated task
-        redis_client.set(f"task:{task_id}", updated_data)
+        response.headers["ETag"] = etag(updated_data["version"])
         
         # Publish task updated event
         event = await event_bus.create_event(
@@ -217,7 +549,7 @@ async def update_task(task_id: str, task_update: TaskUpdate, background_tasks: B
         await event_bus.publish(event)
         
         # Trigger n8n webhook (mock)
-        background_tasks.add_task(n8n_mock.trigger_task_updated, updated_data)
+        job_queue.enqueue("n8n.task_updated", updated_data)
         
         return APIResponse(
             success=True,
@@ -232,17 +564,15 @@ async def update_task(task_id: str, task_update: TaskUpdate, background_tasks: B
 
 
 @app.delete("/api/tasks/{task_id}", response_model=APIResponse)
-async def delete_task(task_id: str, background_tasks: BackgroundTasks):
+async def delete_task(task_id: str):
     """Delete a task"""
     try:
         # Get existing task
-        task_data = redis_client.get(f"task:{task_id}")
+        task_data = await task_repository.get(task_id)
         if not task_data:
             raise HTTPException(status_code=404, detail="Task not found")
         
-        # Remove from Redis
-        redis_client.delete(f"task:{task_id}")
-        redis_client.lrem("tasks:list", 0, task_id)
+        await task_repository.remove([task_data])
         
         # Publish task deleted event
         event = await event_bus.create_event(
@@ -253,7 +583,7 @@ async def delete_task(task_id: str, background_tasks: BackgroundTasks):
         await event_bus.publish(event)
         
         # Trigger n8n webhook (mock)
-        background_tasks.add_task(n8n_mock.trigger_task_deleted, {"task_id": task_id})
+        job_queue.enqueue("n8n.task_deleted", {"task_id": task_id})
         
         return APIResponse(
             success=True,
@@ -282,6 +612,87 @@ async def get_calendar_events():
         raise HTTPException(status_code=500, detail=f"Error retrieving calendar events: {str(e)}")
 
 
+@app.get("/api/calendar/conflicts")
+async def get_calendar_conflicts(start: datetime, end: Optional[datetime] = None):
+    """Calendar events overlapping [start, end) (end defaults to one hour after start)"""
+    end = end or start + DEFAULT_EVENT_DURATION
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    
+    conflicts = calendar_index.find_conflicts(start, end)
+    return APIResponse(
+        success=True,
+        message=f"{len(conflicts)} conflicting events",
+        data={"conflicts": conflicts}
+    )
+
+
+@app.get("/api/calendar/free-slot")
+async def get_calendar_free_slot(duration_minutes: int = Query(60, ge=1, le=24 * 60),
+                                 after: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Earliest slot of the given length that collides with no calendar event"""
+    slot = calendar_index.next_free_slot(timedelta(minutes=duration_minutes), after=after, until=until)
+    if slot is None:
+        raise HTTPException(status_code=404, detail="No free slot in the search window")
+    
+    return APIResponse(
+        success=True,
+        message="Free slot found",
+        data={"start": slot[0].isoformat(), "end": slot[1].isoformat()}
+    )
+
+
+@app.get("/api/tasks/{task_id}/conflicts")
+async def get_task_conflicts(task_id: str):
+    """Calendar events colliding with a task's due date (other than the task's own event)"""
+    try:
+        task_data = await task_repository.get(task_id)
+        if not task_data:
+            raise HTTPException(status_code=404, detail="Task not found")
+        if not task_data.get("due_date"):
+            return APIResponse(success=True, message="Task has no due date", data={"conflicts": []})
+        
+        start = datetime.fromisoformat(task_data["due_date"].replace('Z', '+00:00'))
+        conflicts = [
+            event for event in calendar_index.find_conflicts(start, start + DEFAULT_EVENT_DURATION)
+            if event.get("task_id") != task_id
+        ]
+        return APIResponse(
+            success=True,
+            message=f"{len(conflicts)} conflicting events",
+            data={"conflicts": conflicts}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error checking task conflicts: {str(e)}")
+
+
+@app.get("/api/schedule/next")
+async def get_next_tasks(n: int = Query(10, ge=1, le=100)):
+    """The n most urgent pending tasks whose dependencies are all done"""
+    tasks = scheduler.next(n)
+    return APIResponse(
+        success=True,
+        message=f"{len(tasks)} tasks ready",
+        data={"tasks": tasks, "open": len(scheduler)}
+    )
+
+
+async def load_scheduler():
+    """Seed the scheduler with every open task and the task/file links"""
+    tasks: List[Dict[str, Any]] = []
+    cursor = None
+    while True:
+        page, cursor = await task_repository.query(MAX_PAGE_SIZE, cursor, statuses=sorted(OPEN_STATUSES))
+        tasks.extend(page)
+        if not cursor:
+            break
+    scheduler.load(tasks, redis_client.client.hgetall(TASK_FILES_KEY))
+    print(f"🗓️ Scheduler loaded {len(scheduler)} open tasks")
+
+
 # Plane.so integration endpoints
 @app.get("/api/plane/issues")
 async def get_plane_issues():
@@ -297,9 +708,76 @@ async def get_plane_issues():
         raise HTTPException(status_code=500, detail=f"Error retrieving Plane.so issues: {str(e)}")
 
 
+# Workflow endpoints
+@app.get("/api/workflows")
+async def list_workflows():
+    """Loaded workflow definitions with their compiled dependencies"""
+    return APIResponse(
+        success=True,
+        message=f"Found {len(workflow_engine.definitions)} workflows",
+        data={"workflows": [definition.summary() for definition in workflow_engine.definitions.values()]}
+    )
+
+
+@app.post("/api/workflows/{workflow_id}/runs")
+async def start_workflow_run(workflow_id: str, context: Optional[Dict[str, Any]] = None):
+    """Start a workflow run with the given context"""
+    try:
+        result = await workflow_engine.start(workflow_id, context)
+        if not result['success']:
+            raise HTTPException(status_code=404, detail=result.get('error'))
+        
+        return APIResponse(
+            success=True,
+            message="Workflow run started",
+            data=result['run']
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting workflow run: {str(e)}")
+
+
+@app.get("/api/workflows/runs/{run_id}")
+async def get_workflow_run(run_id: str):
+    """Current state of a workflow run"""
+    run = workflow_engine.get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Workflow run not found")
+    
+    return APIResponse(success=True, message="Workflow run retrieved", data=run)
+
+
+@app.post("/api/workflows/runs/{run_id}/inputs/{name}")
+async def provide_workflow_input(run_id: str, name: str, payload: Dict[str, Any]):
+    """Supply an external input a state is waiting for, e.g. {"value": {"blockers": []}} as feedback"""
+    result = workflow_engine.provide(run_id, name, payload.get('value'))
+    if not result['success']:
+        raise HTTPException(status_code=409 if result.get('finished') else 404, detail=result.get('error'))
+    
+    return APIResponse(success=True, message=f"Input {name} accepted", data={"run_id": run_id})
+
+
+@app.post("/api/workflows/runs/{run_id}/states/{state}/complete")
+async def complete_workflow_state(run_id: str, state: str, payload: Dict[str, Any]):
+    """Report the outcome of a state handed to another agent ({"success", "outputs", "error"})"""
+    result = workflow_engine.complete_state(
+        run_id,
+        state,
+        outputs=payload.get('outputs'),
+        success=payload.get('success', True),
+        error=payload.get('error')
+    )
+    if not result['success']:
+        raise HTTPException(status_code=409 if result.get('finished') else 404, detail=result.get('error'))
+    
+    return APIResponse(success=True, message=f"State {state} result accepted", data={"run_id": run_id})
+
+
 # SkySky Show endpoints
 @app.post("/api/skysky/episodes")
-async def create_episode(episode_data: Dict[str, Any], background_tasks: BackgroundTasks):
+async def create_episode(episode_data: Dict[str, Any]):
     """Create a new SkySky Show episode"""
     try:
         result = await episode_manager.create_episode(
@@ -312,12 +790,9 @@ async def create_episode(episode_data: Dict[str, Any], background_tasks: Backgro
         if result['success']:
             # Create Notion page if configured
             if notion_client.is_configured():
-                background_tasks.add_task(
-                    notion_client.create_episode_page,
-                    result['episode']
-                )
-                background_tasks.add_task(
-                    notion_client.create_scene_tasks,
+                job_queue.enqueue("notion.create_episode_page", result['episode'])
+                job_queue.enqueue(
+                    "notion.create_scene_tasks",
                     result['episode']['id'],
                     result['scenes']
                 )
@@ -332,6 +807,24 @@ async def create_episode(episode_data: Dict[str, Any], background_tasks: Backgro
         raise HTTPException(status_code=500, detail=f"Error creating episode: {str(e)}")
 
 
+@app.get("/api/skysky/episodes")
+async def list_episodes(limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        cursor: Optional[str] = None):
+    """A page of episode summaries (scene status counts, asset counts, last activity), newest first"""
+    try:
+        result = episode_manager.list_episodes(limit, cursor)
+        return APIResponse(
+            success=True,
+            message=f"Found {len(result['episodes'])} episodes",
+            data=result
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing episodes: {str(e)}")
+
+
 @app.get("/api/skysky/episodes/{episode_id}")
 async def get_episode_status(episode_id: str):
     """Get episode status with scenes"""
@@ -347,20 +840,27 @@ async def get_episode_status(episode_id: str):
 
 
 @app.put("/api/skysky/episodes/{episode_id}/scene")
-async def update_scene_status(episode_id: str, scene_data: Dict[str, Any], background_tasks: BackgroundTasks):
-    """Update scene status"""
+async def update_scene_status(episode_id: str, scene_data: Dict[str, Any],
+                              response: Response, if_match: Optional[str] = Header(None)):
+    """Update scene status (If-Match makes it conditional on the scene's version)"""
     try:
         result = await episode_manager.update_scene_status(
             episode_id=episode_id,
             scene_number=scene_data.get('scene_number'),
             status=scene_data.get('status'),
-            error_message=scene_data.get('error_message')
+            error_message=scene_data.get('error_message'),
+            expected_version=parse_if_match(if_match)
         )
         
+        if result.get('conflict'):
+            raise version_conflict("scene", result['current_version'])
+        if result['success']:
+            response.headers["ETag"] = etag(result['scene']['version'])
+        
         if result['success'] and notion_client.is_configured():
             # Update Notion task status
-            background_tasks.add_task(
-                notion_client.update_scene_status,
+            job_queue.enqueue(
+                "notion.update_scene_status",
                 scene_data.get('task_id'),
                 scene_data.get('status'),
                 scene_data.get('error_message')
@@ -372,10 +872,41 @@ async def update_scene_status(episode_id: str, scene_data: Dict[str, Any], backg
             data=result
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating scene status: {str(e)}")
 
 
+@app.post("/api/skysky/episodes/{episode_id}/workflow")
+async def start_episode_workflow(episode_id: str, brief: Optional[Dict[str, Any]] = None):
+    """Run an episode through the SkySky workflow; the body adds brief inputs such as prompt or moral_lesson"""
+    try:
+        result = await episode_manager.get_episode_status(episode_id)
+        if not result['success']:
+            raise HTTPException(status_code=404, detail=result.get('error', 'Episode not found'))
+        
+        episode = result['episode']
+        context = {**(brief or {}), 'episode_id': episode_id, 'scenes': episode['scenes']}
+        for field in ('title', 'theme', 'tagline', 'folder_path'):
+            context.setdefault(field, episode.get(field))
+        
+        result = await workflow_engine.start(SKYSKY_WORKFLOW_ID, context)
+        if not result['success']:
+            raise HTTPException(status_code=400, detail=result.get('error'))
+        
+        return APIResponse(
+            success=True,
+            message="Episode workflow started",
+            data=result['run']
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting episode workflow: {str(e)}")
+
+
 @app.post("/api/skysky/resolve/create")
 async def create_resolve_project(project_data: Dict[str, Any]):
     """Create DaVinci Resolve project"""
@@ -482,10 +1013,50 @@ async def handle_file_uploaded(event):
     pass
 
 
-# Subscribe to file events
+async def handle_system_event(event):
+    """Keep the calendar index and episode summaries in sync with events from any process"""
+    if event.event_type == EventTypes.SCHEDULE_CHANGED:
+        calendar_index.apply_change(event.data)
+    elif event.event_type in EPISODE_SUMMARY_EVENTS:
+        episode_manager.apply_summary_event(event.event_type, event.data, event.timestamp)
+
+
+async def handle_file_associated(event):
+    """Record task/file links; an input file makes the task wait for the file's producers"""
+    if event.event_type != EventTypes.FILE_ASSOCIATED:
+        return
+    task_id, file_id = event.data.get("task_id"), event.data.get("file_id")
+    role = event.data.get("role") or "input"
+    if not task_id or not file_id or role not in FILE_ROLES:
+        return
+    redis_client.client.hset(TASK_FILES_KEY, f"{file_id}:{task_id}", role)
+    scheduler.link_file(task_id, file_id, role)
+
+
+async def handle_task_event(event):
+    """Update the schedule incrementally from task events of every Marcus process"""
+    if event.event_type in (EventTypes.TASK_CREATED, EventTypes.TASK_UPDATED):
+        # The Hub republishes Marcus's APIResponse, which carries the task under "data"
+        task = event.data if "id" in event.data else event.data.get("data")
+        if isinstance(task, dict) and task.get("id"):
+            scheduler.upsert(task)
+    elif event.event_type in (EventTypes.TASKS_BULK_CREATED, EventTypes.TASKS_BULK_UPDATED):
+        for task in event.data.get("tasks", []):
+            scheduler.upsert(task)
+    elif event.event_type == EventTypes.TASK_DELETED:
+        scheduler.remove(event.data.get("task_id"))
+    elif event.event_type == EventTypes.TASKS_BULK_DELETED:
+        for task_id in event.data.get("task_ids", []):
+            scheduler.remove(task_id)
+
+
+# Subscribe to task, file and system events
 async def setup_event_subscriptions():
     """Set up event subscriptions"""
+    await event_bus.subscribe("skyras:tasks", handle_task_event)
     await event_bus.subscribe("skyras:files", handle_file_uploaded)
+    await event_bus.subscribe("skyras:files", handle_file_associated)
+    await event_bus.subscribe("skyras:system", handle_system_event)
 
 
 if __name__ == "__main__":
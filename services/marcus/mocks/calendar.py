@@ -6,13 +6,41 @@ Simulates calendar event management
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 import asyncio
+import json
+import uuid
+
+from shared.events import get_event_bus, EventTypes
+from shared.redis_client import RedisClient, get_redis_client
+
+
+EVENTS_KEY = "calendar:events"      # hash: event id -> event JSON
+SEEDED_KEY = "calendar:seeded"      # set once the sample events have been written
 
 
 class CalendarMock:
-    """Mock Cal.com calendar service"""
+    """Mock Cal.com calendar service
+    
+    Events live in Redis rather than in the process, so the API process and every
+    marcus-worker (which runs the calendar jobs) see the same calendar.
+    """
     
-    def __init__(self):
-        self.events = [
+    def __init__(self, redis_client: RedisClient = None):
+        self.redis_client = redis_client or get_redis_client()
+        self.event_bus = get_event_bus()
+        self.seeded = False
+    
+    def _seed(self) -> None:
+        """Write the sample events the first time any process uses the calendar"""
+        if self.seeded:
+            return
+        client = self.redis_client.client
+        if client.set(SEEDED_KEY, 1, nx=True):
+            client.hset(EVENTS_KEY, mapping={event["id"]: json.dumps(event) for event in self._sample_events()})
+        self.seeded = True
+    
+    @staticmethod
+    def _sample_events() -> List[Dict[str, Any]]:
+        return [
             {
                 "id": "1",
                 "title": "Team Standup",
@@ -39,47 +67,83 @@ class CalendarMock:
     async def get_events(self) -> List[Dict[str, Any]]:
         """Get all calendar events"""
         await asyncio.sleep(0.1)  # Simulate API delay
-        return self.events
+        self._seed()
+        return [json.loads(event) for event in self.redis_client.client.hvals(EVENTS_KEY)]
     
     async def create_event(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new calendar event"""
         await asyncio.sleep(0.1)  # Simulate API delay
         
-        new_event = {
-            "id": str(len(self.events) + 1),
-            "title": event_data.get("title", "New Event"),
-            "start": event_data.get("start", datetime.utcnow().isoformat()),
-            "end": event_data.get("end", (datetime.utcnow() + timedelta(hours=1)).isoformat()),
-            "description": event_data.get("description", "")
-        }
-        
-        self.events.append(new_event)
+        self._seed()
+        new_event = self._build_event(event_data)
+        self.redis_client.client.hset(EVENTS_KEY, new_event["id"], json.dumps(new_event))
+        await self._publish_change("created", new_event)
         print(f"📅 Calendar event created: {new_event['title']}")
         return new_event
     
+    async def create_events(self, events_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several calendar events in one call"""
+        await asyncio.sleep(0.1)  # Simulate API delay
+        
+        self._seed()
+        created = [self._build_event(event_data) for event_data in events_data]
+        if created:
+            self.redis_client.client.hset(EVENTS_KEY, mapping={event["id"]: json.dumps(event) for event in created})
+        for new_event in created:
+            await self._publish_change("created", new_event)
+        
+        print(f"📅 Calendar events created: {len(created)}")
+        return created
+    
     async def update_event(self, event_id: str, event_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update a calendar event"""
         await asyncio.sleep(0.1)  # Simulate API delay
         
-        for event in self.events:
-            if event["id"] == event_id:
-                event.update(event_data)
-                print(f"📅 Calendar event updated: {event['title']}")
-                return event
+        self._seed()
+        stored = self.redis_client.client.hget(EVENTS_KEY, event_id)
+        if stored is None:
+            raise ValueError(f"Event {event_id} not found")
         
-        raise ValueError(f"Event {event_id} not found")
+        event = {**json.loads(stored), **event_data}
+        self.redis_client.client.hset(EVENTS_KEY, event_id, json.dumps(event))
+        await self._publish_change("updated", event)
+        print(f"📅 Calendar event updated: {event['title']}")
+        return event
     
     async def delete_event(self, event_id: str) -> bool:
         """Delete a calendar event"""
         await asyncio.sleep(0.1)  # Simulate API delay
         
-        for i, event in enumerate(self.events):
-            if event["id"] == event_id:
-                deleted_event = self.events.pop(i)
-                print(f"📅 Calendar event deleted: {deleted_event['title']}")
-                return True
+        self._seed()
+        client = self.redis_client.client
+        stored = client.hget(EVENTS_KEY, event_id)
+        # HDEL decides the winner if two processes delete the same event
+        if stored is None or not client.hdel(EVENTS_KEY, event_id):
+            return False
+        deleted_event = json.loads(stored)
         
-        return False
-
-
-
+        await self._publish_change("deleted", deleted_event)
+        print(f"📅 Calendar event deleted: {deleted_event['title']}")
+        return True
+    
+    def _build_event(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        start = event_data.get("start") or datetime.utcnow().isoformat()
+        new_event = {
+            "id": str(uuid.uuid4()),
+            "title": event_data.get("title", "New Event"),
+            "start": start,
+            "end": event_data.get("end") or (datetime.fromisoformat(start.replace("Z", "+00:00")) + timedelta(hours=1)).isoformat(),
+            "description": event_data.get("description", "")
+        }
+        if event_data.get("task_id"):
+            new_event["task_id"] = event_data["task_id"]
+        return new_event
+    
+    async def _publish_change(self, action: str, event: Dict[str, Any]) -> None:
+        """Let every Marcus process keep its calendar index in sync"""
+        change = await self.event_bus.create_event(
+            EventTypes.SCHEDULE_CHANGED,
+            "marcus",
+            {"action": action, "event": event}
+        )
+        await self.event_bus.publish(change)
@@ -4,7 +4,7 @@ Simulates workflow automation triggers
 """
 
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 import asyncio
 import uuid
 
@@ -95,6 +95,25 @@ class N8nMock:
         print(f"🔄 n8n workflow triggered: {execution['workflow_id']} for task deletion")
         return execution
     
+    async def trigger_tasks_bulk(self, action: str, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Trigger one workflow run covering a batch of created, updated or deleted tasks"""
+        await asyncio.sleep(0.2)  # Simulate API delay
+        
+        execution = {
+            "id": str(uuid.uuid4()),
+            "workflow_id": self.workflows[f"task-{action}"]["id"],
+            "status": "success",
+            "triggered_at": datetime.utcnow().isoformat(),
+            "data": {
+                "task_ids": [task.get("id") or task.get("task_id") for task in tasks],
+                "action": f"tasks_bulk_{action}"
+            }
+        }
+        
+        self.executions.append(execution)
+        print(f"🔄 n8n workflow triggered: {execution['workflow_id']} for {len(tasks)} tasks ({action})")
+        return execution
+    
     async def get_workflows(self) -> Dict[str, Any]:
         """Get all workflows"""
         await asyncio.sleep(0.1)  # Simulate API delay
@@ -0,0 +1,184 @@
+"""
+SkyRas v2 Marcus Scheduler
+Orders open tasks by priority, due date and dependencies for agents to pull work from
+"""
+
+import heapq
+from typing import Dict, Any, List, Set, Tuple
+
+from shared.pagination import timestamp_score
+
+
+PRIORITY_RANK = {"urgent": 0, "high": 1, "medium": 2, "low": 3}
+OPEN_STATUSES = {"pending", "in-progress"}
+SCHEDULABLE_STATUS = "pending"
+
+# task <-> file links as role per "<file_id>:<task_id>"; a task that takes a file as
+# input depends on the tasks that produce it as output
+TASK_FILES_KEY = "task_files"
+FILE_ROLES = ("input", "output")
+
+
+class TaskScheduler:
+    """Heap of ready tasks over a dependency DAG, updated incrementally
+
+    Only open tasks are tracked; a prerequisite that is not tracked (completed,
+    cancelled or deleted) counts as satisfied. Heap entries are invalidated lazily:
+    each task has a generation that bumps on every change, and stale or blocked
+    entries are dropped when they reach the top.
+    """
+
+    def __init__(self):
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.heap: List[Tuple[int, float, float, str, int]] = []
+        self.generation: Dict[str, int] = {}
+        self.queued: Dict[str, int] = {}
+
+        self.depends_on: Dict[str, Set[str]] = {}
+        self.required_by: Dict[str, Set[str]] = {}
+        self.inputs: Dict[str, Set[str]] = {}
+        self.outputs: Dict[str, Set[str]] = {}
+        self.producers: Dict[str, Set[str]] = {}
+        self.consumers: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def load(self, tasks: List[Dict[str, Any]], file_links: Dict[str, str] = None) -> None:
+        for field, role in (file_links or {}).items():
+            file_id, task_id = field.split(':', 1)
+            self._link(task_id, file_id, role)
+        for task in tasks:
+            self.upsert(task)
+
+    def upsert(self, task: Dict[str, Any]) -> None:
+        """Track a created or updated task and re-check whatever it affects"""
+        task_id = task["id"]
+        if task.get("status") not in OPEN_STATUSES:
+            self.remove(task_id)
+            return
+
+        for prerequisite in self.depends_on.get(task_id, set()):
+            self.required_by.get(prerequisite, set()).discard(task_id)
+        explicit = {str(dependency) for dependency in task.get("depends_on") or []} - {task_id}
+        self.depends_on[task_id] = explicit
+        for prerequisite in explicit:
+            self.required_by.setdefault(prerequisite, set()).add(task_id)
+
+        was_schedulable = task_id in self.tasks and self.tasks[task_id]["status"] == SCHEDULABLE_STATUS
+        self.tasks[task_id] = task
+        self.generation[task_id] = self.generation.get(task_id, 0) + 1
+        self._queue_if_ready(task_id)
+
+        # Dependents only care whether this task still blocks them, which is always
+        # true while it is open; they need a look when it stops or starts being open
+        if not was_schedulable:
+            self._recheck(self.dependents(task_id))
+
+    def remove(self, task_id: str) -> None:
+        """Stop tracking a task (completed, cancelled or deleted); unblocks its dependents"""
+        if task_id not in self.tasks:
+            return
+        del self.tasks[task_id]
+        self.generation[task_id] = self.generation.get(task_id, 0) + 1
+        self.queued.pop(task_id, None)
+        for prerequisite in self.depends_on.pop(task_id, set()):
+            self.required_by.get(prerequisite, set()).discard(task_id)
+        self._recheck(self.dependents(task_id))
+
+    def link_file(self, task_id: str, file_id: str, role: str) -> None:
+        """Record a task_files link; may block or unblock the tasks around it"""
+        self._link(task_id, file_id, role)
+        self._recheck({task_id} | self.consumers.get(file_id, set()))
+
+    def prerequisites(self, task_id: str, depends_on: Set[str] = None) -> Set[str]:
+        """Tasks this task waits for: explicit links plus producers of its input files
+
+        depends_on replaces the tracked explicit links, e.g. with a change not applied yet.
+        """
+        found = set(self.depends_on.get(task_id, set()) if depends_on is None else depends_on)
+        for file_id in self.inputs.get(task_id, set()):
+            found |= self.producers.get(file_id, set())
+        found.discard(task_id)
+        return found
+
+    def dependents(self, task_id: str) -> Set[str]:
+        found = set(self.required_by.get(task_id, set()))
+        for file_id in self.outputs.get(task_id, set()):
+            found |= self.consumers.get(file_id, set())
+        found.discard(task_id)
+        return found
+
+    def is_ready(self, task_id: str) -> bool:
+        task = self.tasks.get(task_id)
+        if task is None or task["status"] != SCHEDULABLE_STATUS:
+            return False
+        return not any(prerequisite in self.tasks for prerequisite in self.prerequisites(task_id))
+
+    def creates_cycle(self, task_id: str, depends_on: List[str],
+                      pending: Dict[str, List[str]] = None) -> bool:
+        """Whether making task_id depend on depends_on would close a dependency cycle
+
+        pending maps task ids to depends_on changes that are not tracked yet (earlier
+        items of the same bulk update); they are used in place of the tracked links.
+        """
+        pending = {task: {str(dependency) for dependency in links} for task, links in (pending or {}).items()}
+        stack = [str(dependency) for dependency in depends_on]
+        seen: Set[str] = set()
+        while stack:
+            current = stack.pop()
+            if current == task_id:
+                return True
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend(self.prerequisites(current, pending.get(current)))
+        return False
+
+    def next(self, n: int) -> List[Dict[str, Any]]:
+        """The n most urgent ready tasks, without claiming them (O(n log N))"""
+        picked = []
+        while self.heap and len(picked) < n:
+            entry = heapq.heappop(self.heap)
+            task_id, generation = entry[3], entry[4]
+            if generation != self.generation.get(task_id) or not self.is_ready(task_id):
+                if self.queued.get(task_id) == generation:
+                    del self.queued[task_id]
+                continue
+            picked.append(entry)
+
+        for entry in picked:
+            heapq.heappush(self.heap, entry)
+        return [self.tasks[entry[3]] for entry in picked]
+
+    def _link(self, task_id: str, file_id: str, role: str) -> None:
+        if role == "output":
+            self.outputs.setdefault(task_id, set()).add(file_id)
+            self.producers.setdefault(file_id, set()).add(task_id)
+        else:
+            self.inputs.setdefault(task_id, set()).add(file_id)
+            self.consumers.setdefault(file_id, set()).add(task_id)
+
+    def _recheck(self, task_ids: Set[str]) -> None:
+        for task_id in task_ids:
+            self._queue_if_ready(task_id)
+
+    def _queue_if_ready(self, task_id: str) -> None:
+        generation = self.generation.get(task_id)
+        if self.queued.get(task_id) == generation or not self.is_ready(task_id):
+            return
+        task = self.tasks[task_id]
+        due = timestamp_score(task.get("due_date"))
+        heapq.heappush(self.heap, (
+            PRIORITY_RANK.get(task.get("priority"), len(PRIORITY_RANK)),
+            due if due is not None else float('inf'),
+            timestamp_score(task.get("created_at")) or 0.0,
+            task_id,
+            generation
+        ))
+        self.queued[task_id] = generation
+
+        # Superseded entries normally leave when they surface; bound them if next() is rarely called
+        if len(self.heap) > 4 * max(len(self.tasks), 64):
+            self.heap = [entry for entry in self.heap if self.queued.get(entry[3]) == entry[4]]
+            heapq.heapify(self.heap)
@@ -4,15 +4,26 @@ Handles episode creation, scene management, and orchestration
 """
 
 import os
+import json
 import uuid
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 import asyncio
-import httpx
-from pathlib import Path
+from redis.exceptions import WatchError
 
 from shared.redis_client import get_redis_client
+from shared.jobs import get_job_queue
 from shared.events import get_event_bus, EventTypes
+from shared.pagination import timestamp_score
+from skysky.scaffold import EpisodeScaffolder
+from skysky.episode_summary import EpisodeSummaries
+
+
+# All episodes, scored by creation time
+EPISODES_KEY = "episodes:by_created"
+# Per episode: scene number -> scene id, and how many scenes are completed
+SCENE_BY_NUMBER_KEY = "episode:{}:scene_by_number"
+SCENES_COMPLETED_KEY = "episode:{}:scenes_completed"
 
 
 class EpisodeManager:
@@ -24,6 +35,9 @@ class EpisodeManager:
         self.skysky_root = os.getenv('SKYSKY_ROOT', '/mnt/qnap/SkySkyShow')
         self.n8n_url = os.getenv('N8N_URL', 'http://localhost:5678')
         self.n8n_api_key = os.getenv('N8N_API_KEY')
+        self.scaffolder = EpisodeScaffolder(self.skysky_root)
+        self.summaries = EpisodeSummaries(self.redis_client, EPISODES_KEY)
+        self.provisioning: set = set()
         
     async def create_episode(self, title: str, episode_number: int = None, 
                            theme: str = None, tagline: str = None) -> Dict[str, Any]:
@@ -32,8 +46,8 @@ class EpisodeManager:
             # Generate episode ID
             episode_id = str(uuid.uuid4())
             
-            # Create folder structure
-            episode_folder = self._create_episode_folder(title, episode_id)
+            # The folder structure is built in the background; the episode starts out provisioning
+            episode_folder = self.scaffolder.folder_path(title)
             
             # Create episode record in database
             episode_data = {
@@ -42,38 +56,32 @@ class EpisodeManager:
                 'episode_number': episode_number,
                 'theme': theme,
                 'tagline': tagline,
-                'status': 'planning',
+                'status': 'provisioning',
                 'folder_path': episode_folder,
                 'created_at': datetime.utcnow().isoformat(),
                 'updated_at': datetime.utcnow().isoformat()
             }
             
-            # Store in Redis (in production, this would be Supabase)
-            self.redis_client.set(f"episode:{episode_id}", episode_data)
-            self.redis_client.lpush("episodes:list", episode_id)
-            
-            # Create 5 scenes
-            scenes = await self._create_scenes(episode_id, title)
-            
-            # Trigger n8n workflow for episode creation
-            await self._trigger_n8n_workflow('episode-created', {
-                'episode_id': episode_id,
-                'title': title,
-                'folder_path': episode_folder,
-                'scenes': scenes
-            })
+            # Episode, scenes and their indexes go to Redis in one atomic round trip
+            # (in production, this would be Supabase)
+            scenes = self._build_scenes(episode_id)
+            self._store_episode(episode_data, scenes)
             
-            # Publish episode created event
+            # Notify other agents and start on the folders concurrently once everything is stored
             event = await self.event_bus.create_event(
                 'episode.created',
                 'marcus',
                 episode_data
             )
+            provisioning = asyncio.ensure_future(self._provision_episode(episode_data, scenes))
+            self.provisioning.add(provisioning)
+            provisioning.add_done_callback(self.provisioning.discard)
             await self.event_bus.publish(event)
             
             return {
                 'success': True,
                 'episode_id': episode_id,
+                'episode': episode_data,
                 'folder_path': episode_folder,
                 'scenes': scenes
             }
@@ -84,47 +92,56 @@ class EpisodeManager:
                 'error': f"Failed to create episode: {str(e)}"
             }
     
-    def _create_episode_folder(self, title: str, episode_id: str) -> str:
-        """Create the episode folder structure on NAS"""
-        # Clean title for folder name
-        clean_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        clean_title = clean_title.replace(' ', '_')
-        
-        episode_folder = f"{self.skysky_root}/Episode_{clean_title}"
-        
-        # Create folder structure
-        folders = [
-            'Script',
-            'Midjourney_Art',
-            'HeyGen_Video', 
-            'ElevenLabs_VO',
-            'Suno_Audio',
-            'Resolve_Project',
-            'Resolve_Media',
-            'Finals'
-        ]
-        
-        # Create main episode folder
-        Path(episode_folder).mkdir(parents=True, exist_ok=True)
+    async def _provision_episode(self, episode_data: Dict[str, Any], scenes: List[Dict[str, Any]]) -> None:
+        """Build the episode folders, then move the episode to planning and hand off to n8n"""
+        episode_id = episode_data['id']
+        try:
+            await self.scaffolder.scaffold(episode_data['folder_path'], episode_id, episode_data['title'])
+            status, error = 'planning', None
+        except Exception as e:
+            print(f"❌ Failed to provision folders for episode {episode_id}: {e}")
+            status, error = 'provisioning_failed', str(e)
         
-        # Create subfolders
-        for folder in folders:
-            Path(f"{episode_folder}/{folder}").mkdir(exist_ok=True)
+        try:
+            episode = self.redis_client.get(f"episode:{episode_id}")
+            if episode and episode.get('status') == 'provisioning':
+                episode['status'] = status
+                episode['updated_at'] = datetime.utcnow().isoformat()
+                if error:
+                    episode['error_message'] = error
+                self.redis_client.set(f"episode:{episode_id}", episode)
+                self.summaries.set_status(episode_id, status, episode['updated_at'])
             
-            # Create scene subfolders for asset folders
-            if folder in ['Midjourney_Art', 'HeyGen_Video', 'ElevenLabs_VO', 'Resolve_Media']:
-                for i in range(1, 6):  # 5 scenes
-                    Path(f"{episode_folder}/{folder}/Scene_{i:02d}").mkdir(exist_ok=True)
-        
-        # Create script file
-        script_path = f"{episode_folder}/Script/EP{episode_id[:8]}_Script.md"
-        with open(script_path, 'w') as f:
-            f.write(f"# {title}\n\nEpisode script will be generated here.\n")
-        
-        return episode_folder
+            event = await self.event_bus.create_event(
+                'episode.provisioned' if error is None else 'episode.provisioning_failed',
+                'marcus',
+                episode or episode_data
+            )
+            if error is not None:
+                await self.event_bus.publish(event)
+                return
+            
+            # n8n picks up from the folders, so it only hears about the episode once they exist
+            await asyncio.gather(
+                self._trigger_n8n_workflow('episode-created', {
+                    'episode_id': episode_id,
+                    'title': episode_data['title'],
+                    'folder_path': episode_data['folder_path'],
+                    'scenes': scenes
+                }),
+                self.event_bus.publish(event)
+            )
+        except Exception as e:
+            print(f"Error finishing episode provisioning: {e}")
     
-    async def _create_scenes(self, episode_id: str, title: str) -> List[Dict[str, Any]]:
-        """Create 5 scenes for the episode"""
+    async def close(self) -> None:
+        """Let in-flight folder provisioning finish, then stop the scaffolding threads"""
+        if self.provisioning:
+            await asyncio.gather(*list(self.provisioning), return_exceptions=True)
+        self.scaffolder.close()
+    
+    def _build_scenes(self, episode_id: str) -> List[Dict[str, Any]]:
+        """Build the 5 scene records for a new episode"""
         scenes = []
         
         scene_templates = [
@@ -155,53 +172,70 @@ class EpisodeManager:
             }
         ]
         
+        created_at = datetime.utcnow().isoformat()
         for i, template in enumerate(scene_templates, 1):
-            scene_id = str(uuid.uuid4())
-            scene_data = {
-                'id': scene_id,
+            scenes.append({
+                'id': str(uuid.uuid4()),
                 'episode_id': episode_id,
                 'scene_number': i,
                 'name': template['name'],
                 'description': template['description'],
                 'status': 'todo',
                 'duration_seconds': template['duration'],
-                'created_at': datetime.utcnow().isoformat(),
-                'updated_at': datetime.utcnow().isoformat()
-            }
-            
-            # Store scene in Redis
-            self.redis_client.set(f"scene:{scene_id}", scene_data)
-            self.redis_client.lpush(f"episode:{episode_id}:scenes", scene_id)
-            
-            scenes.append(scene_data)
+                'created_at': created_at,
+                'updated_at': created_at,
+                'version': 1
+            })
         
         return scenes
     
+    def _store_episode(self, episode_data: Dict[str, Any], scenes: List[Dict[str, Any]]) -> None:
+        """Write an episode with its scenes and lookups in a single MULTI/EXEC"""
+        episode_id = episode_data['id']
+        pipe = self.redis_client.client.pipeline()
+        pipe.set(f"episode:{episode_id}", json.dumps(episode_data))
+        pipe.zadd(EPISODES_KEY, {episode_id: timestamp_score(episode_data['created_at'])})
+        for scene in scenes:
+            pipe.set(f"scene:{scene['id']}", json.dumps(scene))
+        # The episode's scene set is ordered by scene number
+        pipe.zadd(f"episode:{episode_id}:scenes", {scene['id']: scene['scene_number'] for scene in scenes})
+        pipe.hset(SCENE_BY_NUMBER_KEY.format(episode_id), mapping={scene['scene_number']: scene['id'] for scene in scenes})
+        pipe.set(SCENES_COMPLETED_KEY.format(episode_id), 0)
+        self.summaries.seed(pipe, episode_data, scenes)
+        pipe.execute()
+    
     async def update_scene_status(self, episode_id: str, scene_number: int, 
-                                status: str, error_message: str = None) -> Dict[str, Any]:
-        """Update scene status and notify other agents"""
+                                status: str, error_message: str = None,
+                                expected_version: int = None) -> Dict[str, Any]:
+        """Update scene status and notify other agents
+        
+        With expected_version the update only applies if the scene is still at that version.
+        """
         try:
-            # Get scene data
-            scene_ids = self.redis_client.lrange(f"episode:{episode_id}:scenes", 0, -1)
-            scene_data = None
-            
-            for scene_id in scene_ids:
-                data = self.redis_client.get(f"scene:{scene_id}")
-                if data and data.get('scene_number') == scene_number:
-                    scene_data = data
-                    break
-            
-            if not scene_data:
+            scene_id = self._scene_id(episode_id, scene_number)
+            if not scene_id:
                 return {'success': False, 'error': 'Scene not found'}
             
-            # Update scene status
-            scene_data['status'] = status
-            scene_data['updated_at'] = datetime.utcnow().isoformat()
-            if error_message:
-                scene_data['error_message'] = error_message
+            # Update and store the scene atomically against its current version
+            def apply(current: Dict[str, Any]) -> None:
+                current['status'] = status
+                current['updated_at'] = datetime.utcnow().isoformat()
+                if error_message:
+                    current['error_message'] = error_message
+            
+            # The completed-scenes counter moves in the same transaction as the scene
+            def count_completion(pipe, previous_status: str) -> None:
+                counter = SCENES_COMPLETED_KEY.format(episode_id)
+                if status == 'completed' and previous_status != 'completed':
+                    pipe.incr(counter)
+                    pipe.hlen(SCENE_BY_NUMBER_KEY.format(episode_id))
+                elif previous_status == 'completed' and status != 'completed':
+                    pipe.decr(counter)
             
-            # Store updated scene
-            self.redis_client.set(f"scene:{scene_data['id']}", scene_data)
+            result = self._compare_and_set(f"scene:{scene_id}", apply, expected_version, count_completion)
+            if not result['success']:
+                return result
+            scene_data = result['document']
             
             # Publish scene updated event
             event = await self.event_bus.create_event(
@@ -211,42 +245,96 @@ class EpisodeManager:
             )
             await self.event_bus.publish(event)
             
-            # Check if all scenes are complete
-            if status == 'completed':
-                await self._check_episode_completion(episode_id)
+            # Exactly one update sees the counter reach the scene count
+            extra = result['results']
+            if status == 'completed' and len(extra) == 2 and extra[0] == extra[1]:
+                await self._complete_episode(episode_id)
             
             return {'success': True, 'scene': scene_data}
             
         except Exception as e:
             return {'success': False, 'error': f"Failed to update scene: {str(e)}"}
     
-    async def _check_episode_completion(self, episode_id: str):
-        """Check if all scenes are complete and trigger next steps"""
+    async def _complete_episode(self, episode_id: str):
+        """All scenes are complete: trigger next steps"""
         try:
-            scene_ids = self.redis_client.lrange(f"episode:{episode_id}:scenes", 0, -1)
-            all_complete = True
-            
-            for scene_id in scene_ids:
-                scene_data = self.redis_client.get(f"scene:{scene_id}")
-                if scene_data and scene_data.get('status') != 'completed':
-                    all_complete = False
-                    break
+            # All scenes complete - trigger timeline building
+            await self._trigger_n8n_workflow('episode-scenes-complete', {
+                'episode_id': episode_id
+            })
             
-            if all_complete:
-                # All scenes complete - trigger timeline building
-                await self._trigger_n8n_workflow('episode-scenes-complete', {
-                    'episode_id': episode_id
-                })
-                
-                # Update episode status
-                episode_data = self.redis_client.get(f"episode:{episode_id}")
-                if episode_data:
-                    episode_data['status'] = 'ready_for_assembly'
-                    episode_data['updated_at'] = datetime.utcnow().isoformat()
-                    self.redis_client.set(f"episode:{episode_id}", episode_data)
+            # Update episode status
+            episode_data = self.redis_client.get(f"episode:{episode_id}")
+            if episode_data:
+                episode_data['status'] = 'ready_for_assembly'
+                episode_data['updated_at'] = datetime.utcnow().isoformat()
+                self.redis_client.set(f"episode:{episode_id}", episode_data)
+                self.summaries.set_status(episode_id, 'ready_for_assembly', episode_data['updated_at'])
         
         except Exception as e:
-            print(f"Error checking episode completion: {e}")
+            print(f"Error completing episode: {e}")
+    
+    def _compare_and_set(self, key: str, apply, expected_version: int = None, also=None) -> Dict[str, Any]:
+        """Read-modify-write a JSON document under WATCH, bumping its version
+        
+        also(pipe, previous_status) can queue more commands into the same transaction;
+        their replies come back as 'results'.
+        """
+        with self.redis_client.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    if raw is None:
+                        pipe.unwatch()
+                        return {'success': False, 'error': 'Scene not found'}
+                    
+                    document = json.loads(raw)
+                    version = document.get('version', 1)
+                    if expected_version is not None and version != expected_version:
+                        pipe.unwatch()
+                        return {
+                            'success': False,
+                            'error': 'Version conflict',
+                            'conflict': True,
+                            'current_version': version
+                        }
+                    
+                    previous_status = document.get('status')
+                    apply(document)
+                    document['version'] = version + 1
+                    pipe.multi()
+                    pipe.set(key, json.dumps(document))
+                    if also:
+                        also(pipe, previous_status)
+                    results = pipe.execute()
+                    return {'success': True, 'document': document, 'results': results[1:]}
+                except WatchError:
+                    # Another writer got in first; re-read and apply to the newer version
+                    continue
+    
+    def _scene_id(self, episode_id: str, scene_number: int) -> Optional[str]:
+        """Scene id by number in one HGET, building the lookup for episodes that predate it"""
+        client = self.redis_client.client
+        lookup = SCENE_BY_NUMBER_KEY.format(episode_id)
+        scene_id = client.hget(lookup, scene_number)
+        if scene_id or client.exists(lookup):
+            return scene_id
+        
+        scenes = self._get_scenes(episode_id)
+        if not scenes:
+            return None
+        pipe = client.pipeline()
+        pipe.hset(lookup, mapping={scene['scene_number']: scene['id'] for scene in scenes})
+        pipe.setnx(SCENES_COMPLETED_KEY.format(episode_id),
+                   sum(1 for scene in scenes if scene.get('status') == 'completed'))
+        pipe.execute()
+        return next((scene['id'] for scene in scenes if scene['scene_number'] == scene_number), None)
+    
+    def _get_scenes(self, episode_id: str) -> List[Dict[str, Any]]:
+        """An episode's scenes in scene order, fetched in one round trip"""
+        scene_ids = self.redis_client.zrange(f"episode:{episode_id}:scenes", 0, -1)
+        return [scene for scene in self.redis_client.mget([f"scene:{scene_id}" for scene_id in scene_ids]) if scene]
     
     async def trigger_agent(self, agent_name: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """Trigger another agent via n8n workflow"""
@@ -266,24 +354,16 @@ class EpisodeManager:
             return {'success': False, 'error': f"Failed to trigger {agent_name}: {str(e)}"}
     
     async def _trigger_n8n_workflow(self, workflow_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Trigger n8n workflow via webhook"""
+        """Queue an n8n workflow webhook; the job worker delivers it through the shared dispatcher"""
         try:
             if not self.n8n_api_key:
                 print(f"n8n API key not configured, skipping workflow: {workflow_name}")
                 return {'success': False, 'error': 'n8n not configured'}
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.n8n_url}/webhook/{workflow_name}",
-                    json=data,
-                    headers={'Authorization': f'Bearer {self.n8n_api_key}'},
-                    timeout=10.0
-                )
-                
-                if response.status_code == 200:
-                    return {'success': True, 'response': response.json()}
-                else:
-                    return {'success': False, 'error': f"n8n error: {response.text}"}
+            job_id = await asyncio.get_event_loop().run_in_executor(
+                None, get_job_queue().enqueue, "n8n.workflow", workflow_name, data
+            )
+            return {'success': True, 'job_id': job_id}
                     
         except Exception as e:
             return {'success': False, 'error': f"Failed to trigger n8n: {str(e)}"}
@@ -295,19 +375,24 @@ class EpisodeManager:
             if not episode_data:
                 return {'success': False, 'error': 'Episode not found'}
             
-            # Get all scenes
-            scene_ids = self.redis_client.lrange(f"episode:{episode_id}:scenes", 0, -1)
-            scenes = []
-            
-            for scene_id in scene_ids:
-                scene_data = self.redis_client.get(f"scene:{scene_id}")
-                if scene_data:
-                    scenes.append(scene_data)
-            
-            episode_data['scenes'] = scenes
+            episode_data['scenes'] = self._get_scenes(episode_id)
             return {'success': True, 'episode': episode_data}
             
         except Exception as e:
             return {'success': False, 'error': f"Failed to get episode status: {str(e)}"}
-
-
+    
+    def list_episodes(self, limit: int, cursor: str = None) -> Dict[str, Any]:
+        """A page of episode summaries, newest first; raises ValueError for a bad cursor"""
+        summaries, next_cursor = self.summaries.page(limit, cursor)
+        return {'success': True, 'episodes': summaries, 'next_cursor': next_cursor}
+    
+    def apply_summary_event(self, event_type: str, data: Dict[str, Any], timestamp: str) -> None:
+        """Fold a scene or asset event into the episode summaries"""
+        at = timestamp.rstrip('Z')
+        if event_type == 'scene.updated':
+            self.summaries.apply_scene(data, data.get('updated_at') or at)
+        elif event_type == 'asset.generated':
+            self.summaries.apply_asset(data, at)
+        elif event_type == 'batch.assets.generated':
+            for asset in data.get('generated_assets', []):
+                self.summaries.apply_asset({**asset, 'episode_id': data.get('episode_id')}, at)
@@ -0,0 +1,180 @@
+"""
+SkySky Show Episode Summaries
+Per-episode dashboard counters kept current from scene and asset events
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+
+from shared.redis_client import RedisClient
+from shared.pagination import zset_page
+
+
+SUMMARY_KEY = "episode:{}:summary"               # hash: episode fields, scenes_<status>, assets_<type>, last_activity
+SCENE_STATES_KEY = "episode:{}:summary_scenes"   # hash: scene id -> "<version>:<status>" last counted
+ASSETS_SEEN_KEY = "episode:{}:summary_assets"    # set: assets already counted
+
+SUMMARY_FIELDS = ('id', 'title', 'episode_number', 'status', 'created_at', 'folder_path')
+
+# Count a scene under its new status unless an event at least as new was already
+# applied; repeated and out-of-order deliveries (one per Marcus process) are no-ops
+APPLY_SCENE_SCRIPT = """
+local summary, scenes = KEYS[1], KEYS[2]
+local scene_id, version, status, at = ARGV[1], tonumber(ARGV[2]), ARGV[3], ARGV[4]
+if redis.call('EXISTS', summary) == 0 then
+    return -1
+end
+
+local counted = redis.call('HGET', scenes, scene_id)
+if counted then
+    local sep = string.find(counted, ':', 1, true)
+    if tonumber(string.sub(counted, 1, sep - 1)) >= version then
+        return 0
+    end
+    redis.call('HINCRBY', summary, 'scenes_' .. string.sub(counted, sep + 1), -1)
+else
+    redis.call('HINCRBY', summary, 'scenes_total', 1)
+end
+redis.call('HSET', scenes, scene_id, version .. ':' .. status)
+redis.call('HINCRBY', summary, 'scenes_' .. status, 1)
+
+local last = redis.call('HGET', summary, 'last_activity')
+if not last or at > last then
+    redis.call('HSET', summary, 'last_activity', at)
+end
+return 1
+"""
+
+APPLY_ASSET_SCRIPT = """
+local summary, seen = KEYS[1], KEYS[2]
+local asset, asset_type, at = ARGV[1], ARGV[2], ARGV[3]
+if redis.call('EXISTS', summary) == 0 then
+    return -1
+end
+if redis.call('SADD', seen, asset) == 0 then
+    return 0
+end
+redis.call('HINCRBY', summary, 'assets_total', 1)
+redis.call('HINCRBY', summary, 'assets_' .. asset_type, 1)
+
+local last = redis.call('HGET', summary, 'last_activity')
+if not last or at > last then
+    redis.call('HSET', summary, 'last_activity', at)
+end
+return 1
+"""
+
+
+class EpisodeSummaries:
+    """Materialized per-episode summaries for the dashboard listing
+
+    Each summary is a Redis hash seeded when the episode is stored and adjusted in
+    O(1) per event, so listing a page of episodes costs one ZREVRANGEBYSCORE plus
+    one HGETALL per episode on the page.
+    """
+
+    def __init__(self, redis_client: RedisClient, episodes_key: str):
+        self.redis_client = redis_client
+        self.episodes_key = episodes_key
+        self.apply_scene_script = redis_client.client.register_script(APPLY_SCENE_SCRIPT)
+        self.apply_asset_script = redis_client.client.register_script(APPLY_ASSET_SCRIPT)
+
+    def seed(self, pipe, episode: Dict[str, Any], scenes: List[Dict[str, Any]]) -> None:
+        """Queue the initial summary of an episode into the pipeline that stores it"""
+        episode_id = episode['id']
+        summary = {field: episode[field] for field in SUMMARY_FIELDS if episode.get(field) is not None}
+        summary['last_activity'] = episode.get('updated_at') or episode.get('created_at')
+        summary['scenes_total'] = len(scenes)
+        summary['assets_total'] = 0
+        for scene in scenes:
+            key = f"scenes_{scene.get('status')}"
+            summary[key] = summary.get(key, 0) + 1
+
+        pipe.delete(SCENE_STATES_KEY.format(episode_id), ASSETS_SEEN_KEY.format(episode_id))
+        pipe.hset(SUMMARY_KEY.format(episode_id), mapping=summary)
+        if scenes:
+            pipe.hset(SCENE_STATES_KEY.format(episode_id), mapping={
+                scene['id']: f"{scene.get('version', 1)}:{scene.get('status')}" for scene in scenes
+            })
+
+    def set_status(self, episode_id: str, status: str, at: str) -> None:
+        """Mirror an episode status change"""
+        self.redis_client.client.hset(SUMMARY_KEY.format(episode_id), mapping={'status': status, 'last_activity': at})
+
+    def apply_scene(self, scene: Dict[str, Any], at: str) -> bool:
+        """Apply a scene.updated event; False if it was stale, repeated or for an unknown episode"""
+        episode_id, scene_id = scene.get('episode_id'), scene.get('id')
+        if not episode_id or not scene_id or not scene.get('status'):
+            return False
+        applied = self.apply_scene_script(
+            keys=[SUMMARY_KEY.format(episode_id), SCENE_STATES_KEY.format(episode_id)],
+            args=[scene_id, scene.get('version', 1), scene['status'], at]
+        )
+        return applied == 1
+
+    def apply_asset(self, asset: Dict[str, Any], at: str) -> bool:
+        """Apply an asset.generated event; each asset is counted once however often it arrives"""
+        episode_id = asset.get('episode_id')
+        if not episode_id:
+            return False
+        identity = asset.get('file_path') or f"{asset.get('tool')}:{asset.get('scene_number')}:{at}"
+        applied = self.apply_asset_script(
+            keys=[SUMMARY_KEY.format(episode_id), ASSETS_SEEN_KEY.format(episode_id)],
+            args=[identity, asset.get('type') or 'other', at]
+        )
+        return applied == 1
+
+    def get(self, episode_id: str) -> Optional[Dict[str, Any]]:
+        summaries = self._load([episode_id])
+        return summaries[0] if summaries else None
+
+    def page(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """A page of summaries, newest episode first"""
+        episode_ids, next_cursor = zset_page(self.redis_client.client, self.episodes_key, limit, cursor)
+        return self._load(episode_ids), next_cursor
+
+    def rebuild(self, episode: Dict[str, Any], scenes: List[Dict[str, Any]]) -> None:
+        """Recompute a summary from the stored episode (for episodes that predate summaries)"""
+        pipe = self.redis_client.client.pipeline()
+        self.seed(pipe, episode, scenes)
+        pipe.execute()
+
+    def _load(self, episode_ids: List[str]) -> List[Dict[str, Any]]:
+        pipe = self.redis_client.client.pipeline(transaction=False)
+        for episode_id in episode_ids:
+            pipe.hgetall(SUMMARY_KEY.format(episode_id))
+
+        summaries = []
+        for episode_id, raw in zip(episode_ids, pipe.execute()):
+            if not raw:
+                raw = self._backfill(episode_id)
+                if not raw:
+                    continue
+            summaries.append(self._format(raw))
+        return summaries
+
+    def _backfill(self, episode_id: str) -> Optional[Dict[str, Any]]:
+        episode = self.redis_client.get(f"episode:{episode_id}")
+        if not episode:
+            return None
+        scene_ids = self.redis_client.zrange(f"episode:{episode_id}:scenes", 0, -1)
+        scenes = [scene for scene in self.redis_client.mget([f"scene:{scene_id}" for scene_id in scene_ids]) if scene]
+        self.rebuild(episode, scenes)
+        return self.redis_client.client.hgetall(SUMMARY_KEY.format(episode_id))
+
+    @staticmethod
+    def _format(raw: Dict[str, str]) -> Dict[str, Any]:
+        summary = {field: raw.get(field) for field in SUMMARY_FIELDS}
+        if summary['episode_number'] is not None and summary['episode_number'].lstrip('-').isdigit():
+            summary['episode_number'] = int(summary['episode_number'])
+        summary['last_activity'] = raw.get('last_activity')
+        summary['scenes_total'] = int(raw.get('scenes_total', 0))
+        summary['assets_total'] = int(raw.get('assets_total', 0))
+        summary['scenes'] = {
+            field[len('scenes_'):]: int(value) for field, value in raw.items()
+            if field.startswith('scenes_') and field != 'scenes_total' and int(value) > 0
+        }
+        summary['assets'] = {
+            field[len('assets_'):]: int(value) for field, value in raw.items()
+            if field.startswith('assets_') and field != 'assets_total'
+        }
+        return summary
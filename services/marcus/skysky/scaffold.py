@@ -0,0 +1,103 @@
+"""
+SkySky Show Episode Scaffolder
+Creates episode folder structures on the NAS without blocking the event loop
+"""
+
+import os
+import shutil
+import asyncio
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+
+EPISODE_FOLDERS = [
+    'Script',
+    'Midjourney_Art',
+    'HeyGen_Video',
+    'ElevenLabs_VO',
+    'Suno_Audio',
+    'Resolve_Project',
+    'Resolve_Media',
+    'Finals'
+]
+# Asset folders get one subfolder per scene
+SCENE_FOLDERS = ['Midjourney_Art', 'HeyGen_Video', 'ElevenLabs_VO', 'Resolve_Media']
+SCENE_COUNT = 5
+
+
+def episode_layout() -> List[str]:
+    """Leaf directories of an episode, relative to its folder"""
+    leaves = []
+    for folder in EPISODE_FOLDERS:
+        if folder in SCENE_FOLDERS:
+            leaves.extend(f"{folder}/Scene_{i:02d}" for i in range(1, SCENE_COUNT + 1))
+        else:
+            leaves.append(folder)
+    return leaves
+
+
+class EpisodeScaffolder:
+    """Builds episode folders on a dedicated thread pool
+
+    With SKYSKY_EPISODE_TEMPLATE set, a skeleton folder at that path is built once
+    and copied into each new episode in one pass. Otherwise the leaf directories are
+    created in parallel. Either way at most SKYSKY_SCAFFOLD_WORKERS filesystem calls
+    are in flight, so a slow share can't exhaust the default executor.
+    """
+
+    def __init__(self, skysky_root: str, template_path: str = None, max_workers: int = None):
+        self.skysky_root = skysky_root
+        self.template_path = template_path or os.getenv('SKYSKY_EPISODE_TEMPLATE') or None
+        self.max_workers = max_workers or int(os.getenv('SKYSKY_SCAFFOLD_WORKERS', '8'))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='skysky-scaffold')
+        self.template_lock = threading.Lock()
+        self.template_ready = False
+
+    def folder_path(self, title: str) -> str:
+        """Episode folder for a title"""
+        clean_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        clean_title = clean_title.replace(' ', '_')
+        return f"{self.skysky_root}/Episode_{clean_title}"
+
+    async def scaffold(self, episode_folder: str, episode_id: str, title: str) -> None:
+        """Create the folder structure and script file for an episode"""
+        loop = asyncio.get_running_loop()
+        if self.template_path:
+            await loop.run_in_executor(self.executor, self._copy_template, episode_folder)
+        else:
+            await loop.run_in_executor(self.executor, lambda: Path(episode_folder).mkdir(parents=True, exist_ok=True))
+            await asyncio.gather(*(
+                loop.run_in_executor(self.executor, self._mkdir, f"{episode_folder}/{leaf}")
+                for leaf in episode_layout()
+            ))
+
+        script_path = f"{episode_folder}/Script/EP{episode_id[:8]}_Script.md"
+        await loop.run_in_executor(self.executor, self._write_script, script_path, title)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    def _copy_template(self, episode_folder: str) -> None:
+        self._ensure_template()
+        shutil.copytree(self.template_path, episode_folder, dirs_exist_ok=True)
+
+    def _ensure_template(self) -> None:
+        """Build the skeleton folder the first time it is needed"""
+        if self.template_ready:
+            return
+        with self.template_lock:
+            if not self.template_ready:
+                for leaf in episode_layout():
+                    self._mkdir(f"{self.template_path}/{leaf}")
+                self.template_ready = True
+
+    @staticmethod
+    def _mkdir(path: str) -> None:
+        Path(path).mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _write_script(script_path: str, title: str) -> None:
+        with open(script_path, 'w') as f:
+            f.write(f"# {title}\n\nEpisode script will be generated here.\n")
@@ -0,0 +1,109 @@
+"""
+SkyRas v2 Marcus Task Index
+Redis secondary indexes for filtering tasks by status, priority and dates
+"""
+
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from shared.redis_client import RedisClient
+from shared.pagination import zset_page, list_page, timestamp_score
+
+
+STATUS_KEY = "tasks:status:{}"
+PRIORITY_KEY = "tasks:priority:{}"
+DUE_KEY = "tasks:by_due"
+CREATED_KEY = "tasks:by_created"
+
+
+class TaskIndex:
+    """Maintains and queries the task secondary indexes"""
+
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+
+    def add(self, pipe, task: Dict[str, Any]) -> None:
+        """Queue index entries for a new task on a pipeline"""
+        task_id = task["id"]
+        pipe.sadd(STATUS_KEY.format(task["status"]), task_id)
+        pipe.sadd(PRIORITY_KEY.format(task["priority"]), task_id)
+        pipe.zadd(CREATED_KEY, {task_id: timestamp_score(task["created_at"])})
+        if task.get("due_date"):
+            pipe.zadd(DUE_KEY, {task_id: timestamp_score(task["due_date"])})
+
+    def remove(self, pipe, task: Dict[str, Any]) -> None:
+        """Queue removal of a task's index entries on a pipeline"""
+        task_id = task["id"]
+        pipe.srem(STATUS_KEY.format(task["status"]), task_id)
+        pipe.srem(PRIORITY_KEY.format(task["priority"]), task_id)
+        pipe.zrem(CREATED_KEY, task_id)
+        pipe.zrem(DUE_KEY, task_id)
+
+    def update(self, pipe, old: Dict[str, Any], new: Dict[str, Any]) -> None:
+        """Queue only the index changes between two versions of a task"""
+        task_id = new["id"]
+        if old["status"] != new["status"]:
+            pipe.smove(STATUS_KEY.format(old["status"]), STATUS_KEY.format(new["status"]), task_id)
+        if old["priority"] != new["priority"]:
+            pipe.smove(PRIORITY_KEY.format(old["priority"]), PRIORITY_KEY.format(new["priority"]), task_id)
+        if old.get("due_date") != new.get("due_date"):
+            if new.get("due_date"):
+                pipe.zadd(DUE_KEY, {task_id: timestamp_score(new["due_date"])})
+            else:
+                pipe.zrem(DUE_KEY, task_id)
+
+    def query(self, limit: int, cursor: Optional[str] = None,
+              statuses: Optional[List[str]] = None, priorities: Optional[List[str]] = None,
+              due_after: Optional[datetime] = None, due_before: Optional[datetime] = None,
+              created_after: Optional[datetime] = None,
+              created_before: Optional[datetime] = None) -> Tuple[List[str], Optional[str]]:
+        """One page of ids of tasks matching every filter, newest first, and the next cursor
+
+        Values within one filter are OR'd; different filters are AND'd.
+        """
+        client = self.redis_client.client
+
+        if not (statuses or priorities or due_after or due_before):
+            # Unfiltered (or creation-range only) listings page straight off the sorted set
+            return zset_page(
+                client, CREATED_KEY, limit, cursor,
+                min_score=timestamp_score(created_after) if created_after else float('-inf'),
+                max_score=timestamp_score(created_before) if created_before else float('inf')
+            )
+
+        candidates: Optional[Set[str]] = None
+
+        for key_format, values in ((STATUS_KEY, statuses), (PRIORITY_KEY, priorities)):
+            if values:
+                members = client.sunion([key_format.format(value) for value in values])
+                candidates = members if candidates is None else candidates & members
+
+        ranges = [
+            (key, low, high)
+            for key, low, high in ((DUE_KEY, due_after, due_before), (CREATED_KEY, created_after, created_before))
+            if low is not None or high is not None
+        ]
+        for key, low, high in ranges:
+            low_score = timestamp_score(low) if low is not None else float('-inf')
+            high_score = timestamp_score(high) if high is not None else float('inf')
+            if candidates is None:
+                candidates = set(client.zrangebyscore(key, low_score, high_score))
+            elif candidates:
+                # Check only the ids the set filters left, not the whole range
+                ids = list(candidates)
+                scores = client.zmscore(key, ids)
+                candidates = {
+                    task_id for task_id, score in zip(ids, scores)
+                    if score is not None and low_score <= score <= high_score
+                }
+
+        if not candidates:
+            return [], None
+
+        ids = list(candidates)
+        scored = sorted(
+            ((task_id, score or 0.0) for task_id, score in zip(ids, client.zmscore(CREATED_KEY, ids))),
+            key=lambda item: (item[1], item[0]),
+            reverse=True
+        )
+        return list_page(scored, limit, cursor)
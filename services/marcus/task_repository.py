@@ -0,0 +1,344 @@
+"""
+SkyRas v2 Marcus Task Repository
+PostgreSQL task storage on a pooled asyncpg connection, with Redis as a write-through cache
+"""
+
+import os
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from redis.exceptions import WatchError
+
+from shared.redis_client import RedisClient
+from shared.models import Task
+from shared.pagination import encode_cursor, decode_cursor, timestamp_score
+from task_index import TaskIndex, CREATED_KEY
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+
+TASK_COLUMNS = "id, title, description, status, priority, due_date, created_by, created_at, updated_at, version, depends_on"
+
+INSERT_TASK_SQL = f"""
+INSERT INTO tasks ({TASK_COLUMNS})
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+"""
+
+# Compare-and-set: a row is only written if it is still at the version the caller read.
+# unnest() flattens nested arrays, so each row's depends_on travels as a comma-joined string
+UPDATE_TASKS_SQL = """
+UPDATE tasks AS t
+SET title = u.title, description = u.description, status = u.status, priority = u.priority,
+    due_date = u.due_date, updated_at = u.updated_at, version = t.version + 1,
+    depends_on = string_to_array(u.depends_on, ',')::uuid[]
+FROM unnest($1::uuid[], $2::text[], $3::text[], $4::text[], $5::text[], $6::timestamp[], $7::timestamp[], $8::int[], $9::text[])
+    AS u(id, title, description, status, priority, due_date, updated_at, version, depends_on)
+WHERE t.id = u.id AND t.version = u.version
+RETURNING t.id
+"""
+
+DELETE_TASKS_SQL = "DELETE FROM tasks WHERE id = ANY($1::uuid[])"
+
+SELECT_TASKS_BY_ID_SQL = f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ANY($1::uuid[])"
+
+# Columns added after the first release. init.sql only runs on a fresh database volume,
+# so Marcus brings an existing database up to date whenever it connects
+SCHEMA_MIGRATIONS = (
+    "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS depends_on UUID[] NOT NULL DEFAULT '{}'",
+)
+
+# Serializes migrations when several Marcus processes start together
+MIGRATION_LOCK_ID = 0x5359524153
+
+# Set for TASK_CACHE_TTL once a task is deleted, so a read that loaded the row just
+# before the DELETE can't put it back into the cache
+DELETED_KEY = "task:{}:deleted"
+
+# Cache writes from concurrent requests can land out of order; never replace a newer
+# version, and never re-cache a deleted task
+CACHE_IF_NEWER_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return 0
+end
+local current = redis.call('GET', KEYS[1])
+if current then
+    local ok, doc = pcall(cjson.decode, current)
+    if ok and type(doc) == 'table' and tonumber(doc['version'] or 1) > tonumber(ARGV[2]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+return 1
+"""
+
+
+def _db_timestamp(value: Any) -> Optional[datetime]:
+    """Naive UTC datetime for the TIMESTAMP columns"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _row_to_task(row) -> Dict[str, Any]:
+    return Task.model_validate(dict(row)).model_dump(mode="json")
+
+
+def _task_to_row(task: Dict[str, Any]) -> tuple:
+    return (
+        uuid.UUID(task["id"]),
+        task["title"],
+        task.get("description"),
+        task["status"],
+        task["priority"],
+        _db_timestamp(task.get("due_date")),
+        task.get("created_by"),
+        _db_timestamp(task["created_at"]),
+        _db_timestamp(task["updated_at"]),
+        task.get("version", 1),
+        [uuid.UUID(str(dependency)) for dependency in task.get("depends_on") or []]
+    )
+
+
+class TaskRepository:
+    """Task storage: PostgreSQL when DATABASE_URL is set, otherwise Redis alone"""
+
+    def __init__(self, redis_client: RedisClient, database_url: str = None):
+        self.redis_client = redis_client
+        self.database_url = database_url or os.getenv('DATABASE_URL')
+        self.cache_ttl = int(os.getenv('TASK_CACHE_TTL', '3600'))
+        self.index = TaskIndex(redis_client)
+        self.cache_script = redis_client.client.register_script(CACHE_IF_NEWER_SCRIPT)
+        self.pool = None
+
+    @property
+    def uses_database(self) -> bool:
+        return self.pool is not None
+
+    async def start(self) -> None:
+        """Open the connection pool when a database is configured"""
+        if self.database_url and asyncpg is not None:
+            # asyncpg prepares each distinct statement once per connection and caches it
+            self.pool = await asyncpg.create_pool(
+                self.database_url,
+                min_size=int(os.getenv('DATABASE_POOL_MIN', '2')),
+                max_size=int(os.getenv('DATABASE_POOL_MAX', '10')),
+                statement_cache_size=int(os.getenv('DATABASE_STATEMENT_CACHE', '256'))
+            )
+            await self.migrate()
+            print("🐘 Task repository using PostgreSQL")
+            await self._warn_if_not_backfilled()
+            return
+
+        if self.database_url:
+            print("⚠️ asyncpg not installed, storing tasks in Redis only")
+
+    async def migrate(self) -> None:
+        """Apply SCHEMA_MIGRATIONS; each one is idempotent"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATION_LOCK_ID)
+                for statement in SCHEMA_MIGRATIONS:
+                    await conn.execute(statement)
+
+    async def _warn_if_not_backfilled(self) -> None:
+        """Redis-only tasks are invisible once PostgreSQL is in use until they are copied over"""
+        try:
+            # The newest Redis-only tasks are the likeliest to be missing
+            task_ids = []
+            for task_id in self.redis_client.zrange(CREATED_KEY, 0, 49, desc=True):
+                try:
+                    task_ids.append(uuid.UUID(task_id))
+                except ValueError:
+                    pass
+            if not task_ids:
+                return
+            found = await self.pool.fetchval("SELECT count(*) FROM tasks WHERE id = ANY($1::uuid[])", task_ids)
+            if found < len(task_ids):
+                print("⚠️ Tasks stored in Redis are missing from PostgreSQL; run scripts/migrate_tasks_to_postgres.py")
+        except Exception as e:
+            print(f"⚠️ Could not compare Redis and PostgreSQL tasks: {e}")
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+
+    async def add(self, tasks: List[Dict[str, Any]]) -> None:
+        """Insert new tasks"""
+        if self.uses_database:
+            async with self.pool.acquire() as conn:
+                await conn.executemany(INSERT_TASK_SQL, [_task_to_row(task) for task in tasks])
+            self._cache(tasks)
+            return
+
+        pipe = self.redis_client.client.pipeline()
+        for task in tasks:
+            pipe.set(f"task:{task['id']}", json.dumps(task))
+            self.index.add(pipe, task)
+        pipe.execute()
+
+    async def get(self, task_id: str, fresh: bool = False) -> Optional[Dict[str, Any]]:
+        return (await self.get_many([task_id], fresh=fresh))[0]
+
+    async def get_many(self, task_ids: List[str], fresh: bool = False) -> List[Optional[Dict[str, Any]]]:
+        """Tasks by id in the given order (None where missing)
+
+        Reads the cache first unless fresh is set; updates read fresh so their
+        compare-and-set starts from the stored version.
+        """
+        if fresh and self.uses_database:
+            cached = [None] * len(task_ids)
+        else:
+            cached = self.redis_client.mget([f"task:{task_id}" for task_id in task_ids])
+        if not self.uses_database:
+            return cached
+
+        missing = []
+        for task_id, task in zip(task_ids, cached):
+            if task is None:
+                try:
+                    missing.append(uuid.UUID(task_id))
+                except ValueError:
+                    pass
+        if not missing:
+            return cached
+
+        rows = await self.pool.fetch(SELECT_TASKS_BY_ID_SQL, missing)
+        loaded = {task["id"]: task for task in map(_row_to_task, rows)}
+        self._cache(list(loaded.values()))
+        return [task if task is not None else loaded.get(task_id) for task_id, task in zip(task_ids, cached)]
+
+    async def save(self, changes: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[str]:
+        """Write updated tasks given (stored, updated) pairs; returns the ids that lost a race
+
+        A task is only written if it is still at the stored version, and its version is
+        then bumped. Ids whose task changed or vanished since it was read are returned
+        unwritten for the caller to retry or report.
+        """
+        if self.uses_database:
+            rows = await self.pool.fetch(UPDATE_TASKS_SQL, *zip(*[
+                (uuid.UUID(new["id"]), new["title"], new.get("description"), new["status"], new["priority"],
+                 _db_timestamp(new.get("due_date")), _db_timestamp(new["updated_at"]), old.get("version", 1),
+                 ",".join(str(dependency) for dependency in new.get("depends_on") or []))
+                for old, new in changes
+            ]))
+            written = {str(row["id"]) for row in rows}
+            for old, new in changes:
+                if new["id"] in written:
+                    new["version"] = old.get("version", 1) + 1
+            self._cache([new for _, new in changes if new["id"] in written])
+            return [new["id"] for _, new in changes if new["id"] not in written]
+
+        keys = [f"task:{new['id']}" for _, new in changes]
+        with self.redis_client.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*keys)
+                    conflicts = []
+                    written = []
+                    for (old, new), raw in zip(changes, pipe.mget(keys)):
+                        if raw is None or json.loads(raw).get("version", 1) != old.get("version", 1):
+                            conflicts.append(new["id"])
+                        else:
+                            written.append((old, new))
+
+                    pipe.multi()
+                    for old, new in written:
+                        new["version"] = old.get("version", 1) + 1
+                        pipe.set(f"task:{new['id']}", json.dumps(new))
+                        self.index.update(pipe, old, new)
+                    pipe.execute()
+                    return conflicts
+                except WatchError:
+                    # A watched task changed between the check and the write; check again
+                    continue
+
+    async def remove(self, tasks: List[Dict[str, Any]]) -> None:
+        """Delete tasks"""
+        pipe = self.redis_client.client.pipeline()
+        if self.uses_database:
+            await self.pool.execute(DELETE_TASKS_SQL, [uuid.UUID(task["id"]) for task in tasks])
+            # Only once the DELETE has committed: block refills, then drop the cached copy
+            for task in tasks:
+                pipe.set(DELETED_KEY.format(task["id"]), 1, ex=self.cache_ttl)
+                pipe.delete(f"task:{task['id']}")
+            pipe.execute()
+            return
+
+        for task in tasks:
+            pipe.delete(f"task:{task['id']}")
+            self.index.remove(pipe, task)
+        pipe.execute()
+
+    async def query(self, limit: int, cursor: Optional[str] = None,
+                    statuses: Optional[List[str]] = None, priorities: Optional[List[str]] = None,
+                    due_after: Optional[datetime] = None, due_before: Optional[datetime] = None,
+                    created_after: Optional[datetime] = None,
+                    created_before: Optional[datetime] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of tasks matching every filter, newest first, and the next cursor"""
+        if not self.uses_database:
+            task_ids, next_cursor = self.index.query(
+                limit, cursor, statuses=statuses, priorities=priorities,
+                due_after=due_after, due_before=due_before,
+                created_after=created_after, created_before=created_before
+            )
+            return [task for task in self.redis_client.mget([f"task:{task_id}" for task_id in task_ids]) if task], next_cursor
+
+        # The statement text only varies with which filters are present, so each shape is
+        # prepared once per connection and can use idx_tasks_status/priority/due_date
+        conditions: List[str] = []
+        args: List[Any] = []
+
+        def bind(value: Any) -> str:
+            args.append(value)
+            return f"${len(args)}"
+
+        if statuses:
+            conditions.append(f"status = ANY({bind(statuses)}::text[])")
+        if priorities:
+            conditions.append(f"priority = ANY({bind(priorities)}::text[])")
+        if due_after:
+            conditions.append(f"due_date >= {bind(_db_timestamp(due_after))}")
+        if due_before:
+            conditions.append(f"due_date <= {bind(_db_timestamp(due_before))}")
+        if created_after:
+            conditions.append(f"created_at >= {bind(_db_timestamp(created_after))}")
+        if created_before:
+            conditions.append(f"created_at <= {bind(_db_timestamp(created_before))}")
+        if cursor:
+            score, task_id = decode_cursor(cursor)
+            created_at = datetime.fromtimestamp(score, timezone.utc).replace(tzinfo=None)
+            conditions.append(f"(created_at, id) < ({bind(created_at)}, {bind(uuid.UUID(task_id))})")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT {TASK_COLUMNS} FROM tasks {where} ORDER BY created_at DESC, id DESC LIMIT {bind(limit + 1)}"
+        rows = await self.pool.fetch(sql, *args)
+
+        tasks = [_row_to_task(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = tasks[-1]
+            next_cursor = encode_cursor(timestamp_score(last["created_at"]), last["id"])
+        return tasks, next_cursor
+
+    def _cache(self, tasks: List[Dict[str, Any]]) -> None:
+        """Write tasks through to the Redis cache unless it already holds a newer version"""
+        if not tasks:
+            return
+        pipe = self.redis_client.client.pipeline(transaction=False)
+        for task in tasks:
+            self.cache_script(
+                keys=[f"task:{task['id']}", DELETED_KEY.format(task["id"])],
+                args=[json.dumps(task), task.get("version", 1), self.cache_ttl],
+                client=pipe
+            )
+        pipe.execute()
@@ -0,0 +1,36 @@
+"""
+Marcus Job Worker
+Runs Marcus's queued side effects (n8n triggers, calendar events, Notion syncs)
+in a separate process; start as many as needed with `python worker.py`
+"""
+
+import signal
+import asyncio
+
+from shared.jobs import get_job_queue, JobWorker
+from shared.n8n import get_n8n_dispatcher
+from job_handlers import register_job_handlers
+from mocks.calendar import CalendarMock
+from mocks.n8n import N8nMock
+from skysky.notion_client import NotionClient
+
+
+async def main():
+    job_queue = get_job_queue()
+    n8n_dispatcher = get_n8n_dispatcher()
+    register_job_handlers(job_queue, CalendarMock(), N8nMock(), NotionClient(), n8n_dispatcher)
+    worker = JobWorker(job_queue)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, lambda: setattr(worker, 'stopping', True))
+
+    await worker.run()
+    # Let in-flight jobs finish; anything cut off is retried once its lease expires
+    await worker.stop()
+    await n8n_dispatcher.close()
+    print("🛑 Job worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+SkyRas v2 Marcus Workflow Actions
+The workflow states Marcus handles itself, and how for_each steps reach Giorgio's tools
+"""
+
+import os
+from typing import Dict, Any, Optional
+
+import httpx
+
+from workflow_engine import WorkflowEngine
+
+
+GIORGIO_SERVICE_URL = os.getenv('GIORGIO_SERVICE_URL', 'http://localhost:8003')
+GIORGIO_TOOLS = ("midjourney", "heygen", "elevenlabs", "suno")
+
+# Context keys that make up an episode brief
+BRIEF_FIELDS = ("episode_id", "title", "theme", "tagline", "prompt", "age_range", "moral_lesson", "request_form")
+
+
+class GiorgioTools:
+    """Runs one for_each step through Giorgio's generate endpoint for its tool"""
+
+    def __init__(self, base_url: str = None, timeout: float = None):
+        self.base_url = (base_url or GIORGIO_SERVICE_URL).rstrip('/')
+        self.timeout = timeout or float(os.getenv('GIORGIO_TIMEOUT', '600'))
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def generate(self, run: Dict[str, Any], state: Dict[str, Any], item: Dict[str, Any],
+                       step: Dict[str, Any], previous: Dict[str, Any] = None) -> Dict[str, Any]:
+        if self.client is None:
+            self.client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+
+        payload = {
+            **item,
+            'episode_id': run['context'].get('episode_id'),
+            'scene_name': item.get('name'),
+            'scene_context': item.get('description'),
+            'text': item.get('description', ''),
+            'brief': run['artifacts'].get('episode_brief')
+        }
+        # HeyGen renders over the image an earlier step of the same scene generated
+        for result in (previous or {}).values():
+            if result.get('image_url') and not payload.get('background_image_url'):
+                payload['background_image_url'] = result['image_url']
+        response = await self.client.post(f"/api/generate/{step['tool']}", json=payload)
+        if response.status_code >= 400:
+            return {'success': False, 'error': f"Giorgio error: {response.status_code} {response.text[:200]}"}
+
+        body = response.json()
+        data = body.get('data') or {}
+        if body.get('success'):
+            return {'success': True, **data}
+        # Giorgio skips tools without an API key, just like its batch endpoint
+        if data.get('error') == 'API key not set':
+            return {'success': False, 'skipped': True, 'reason': body.get('message')}
+        return {'success': False, 'error': data.get('error') or body.get('message')}
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+async def brief_intake(run: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    """Assemble the episode brief from what the run was started with"""
+    context = run['context']
+    return {
+        'success': True,
+        'episode_brief': {field: context[field] for field in BRIEF_FIELDS if context.get(field) is not None}
+    }
+
+
+async def qc_and_notes(run: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn reviewer feedback into notes and decide whether scenes need another pass"""
+    feedback = run['artifacts'].get('feedback')
+    if not isinstance(feedback, dict):
+        feedback = {'notes': feedback}
+    blockers = feedback.get('blockers') or []
+    return {
+        'success': True,
+        'notes': feedback.get('notes'),
+        'blockers': blockers,
+        'blockers_present': bool(blockers)
+    }
+
+
+def register_workflow_actions(engine: WorkflowEngine, giorgio_tools: GiorgioTools) -> None:
+    """Register what Marcus runs in-process; other agents' states wait for complete_state()"""
+    engine.register_state("brief_intake", brief_intake)
+    engine.register_state("qc_and_notes", qc_and_notes)
+    for tool in GIORGIO_TOOLS:
+        engine.register_tool(tool, giorgio_tools.generate)
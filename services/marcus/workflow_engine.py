@@ -0,0 +1,609 @@
+"""
+SkyRas v2 Marcus Workflow Engine
+Compiles declarative workflows (workflows/*.yaml) into dependency graphs and runs them,
+keeping run state in Redis so another Marcus process can resume after a crash
+"""
+
+import os
+import json
+import uuid
+import time
+import asyncio
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, Callable
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from shared.redis_client import RedisClient, get_redis_client
+from shared.events import EventBus, EventTypes, get_event_bus
+from shared.pagination import timestamp_score
+
+
+RUN_KEY = "workflow_run:{}"
+RUN_INBOX_KEY = "workflow_run:{}:inbox"   # list of external inputs for the run's owner to apply
+RUN_LEASE_KEY = "workflow_run:{}:lease"   # owner id of the process driving the run
+ACTIVE_RUNS_KEY = "workflow_runs:active"  # zset of unfinished run ids by creation time
+
+WORKFLOWS_DIR = os.getenv('WORKFLOWS_DIR', str(Path(__file__).resolve().parents[2] / 'workflows'))
+LEASE_SECONDS = float(os.getenv('WORKFLOW_LEASE_SECONDS', '30'))
+POLL_INTERVAL = float(os.getenv('WORKFLOW_POLL_INTERVAL', '1'))
+DEFAULT_TOOL_CONCURRENCY = int(os.getenv('WORKFLOW_TOOL_CONCURRENCY', '4'))
+STEP_MAX_ATTEMPTS = int(os.getenv('WORKFLOW_STEP_MAX_ATTEMPTS', '3'))
+MAX_REROUTES = int(os.getenv('WORKFLOW_MAX_REROUTES', '3'))
+
+FINAL_RUN_STATUSES = {"completed", "failed"}
+
+# Queues an input only while the run is unfinished, checked in the same step as the
+# push so nothing lands in the inbox of a run that just finished.
+# Returns 1 if queued, 0 if the run is finished, -1 if there is no such run
+SEND_SCRIPT = """
+local run = redis.call('GET', KEYS[1])
+if not run then
+    return -1
+end
+local status = cjson.decode(run)['status']
+for i = 2, #ARGV do
+    if status == ARGV[i] then
+        return 0
+    end
+end
+redis.call('RPUSH', KEYS[2], ARGV[1])
+return 1
+"""
+
+# Lease changes only by the process holding it, compared and applied in one step.
+# Both return 1 if this owner held the lease, 0 otherwise (including an expired lease)
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class WorkflowDefinitionError(ValueError):
+    """A workflow file that can't be compiled"""
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+class WorkflowDefinition:
+    """A workflow compiled into a DAG of states
+
+    A state depends on whichever states produce (or emit) the artifacts it requires.
+    Requirements nothing produces, such as reviewer feedback, are external inputs
+    that have to be provided to the run.
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.id = spec.get('id')
+        if not self.id:
+            raise WorkflowDefinitionError("Workflow has no id")
+        self.name = spec.get('name', self.id)
+        self.spec = spec
+        self.tool_concurrency: Dict[str, int] = dict(spec.get('tool_concurrency') or {})
+
+        self.states: Dict[str, Dict[str, Any]] = {}
+        for state in spec.get('states') or []:
+            if state.get('name') in self.states:
+                raise WorkflowDefinitionError(f"Duplicate state {state.get('name')} in {self.id}")
+            self.states[state['name']] = state
+
+        self.producers: Dict[str, str] = {}
+        for name, state in self.states.items():
+            for artifact in self.produces(name):
+                self.producers[artifact] = name
+
+        self.depends_on: Dict[str, Set[str]] = {}
+        self.external: Dict[str, Set[str]] = {}
+        self.decisions: Dict[str, List[Dict[str, str]]] = {}
+        for name, state in self.states.items():
+            requires = _as_list(state.get('requires'))
+            self.depends_on[name] = {self.producers[r] for r in requires if r in self.producers} - {name}
+            self.external[name] = {r for r in requires if r not in self.producers}
+            self.decisions[name] = []
+            for point in state.get('decision_points') or []:
+                target = (point.get('then') or {}).get('reroute_to')
+                if target not in self.states:
+                    raise WorkflowDefinitionError(f"State {name} reroutes to unknown state {target}")
+                self.decisions[name].append({'if': point.get('if'), 'reroute_to': target})
+
+        self.order = self._topological_order()
+
+    @classmethod
+    def from_file(cls, path: str) -> 'WorkflowDefinition':
+        if yaml is None:
+            raise WorkflowDefinitionError("PyYAML is required to load workflows")
+        with open(path) as f:
+            return cls(yaml.safe_load(f) or {})
+
+    def produces(self, name: str) -> List[str]:
+        """Artifacts a state makes available: its outputs plus the event it emits"""
+        state = self.states[name]
+        return _as_list(state.get('produces')) + _as_list(state.get('emits_event'))
+
+    def downstream(self, name: str) -> Set[str]:
+        """A state and every state that transitively depends on it"""
+        found = {name}
+        changed = True
+        while changed:
+            changed = False
+            for state, prerequisites in self.depends_on.items():
+                if state not in found and prerequisites & found:
+                    found.add(state)
+                    changed = True
+        return found
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'states': [
+                {
+                    'name': name,
+                    'agent': self.states[name].get('agent'),
+                    'depends_on': sorted(self.depends_on[name]),
+                    'external_inputs': sorted(self.external[name]),
+                    'for_each': (self.states[name].get('for_each') or {}).get('collection')
+                }
+                for name in self.order
+            ]
+        }
+
+    def _topological_order(self) -> List[str]:
+        remaining = {name: set(prerequisites) for name, prerequisites in self.depends_on.items()}
+        order = []
+        while remaining:
+            ready = [name for name in self.states if name in remaining and not remaining[name]]
+            if not ready:
+                raise WorkflowDefinitionError(f"Dependency cycle in {self.id} among {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for prerequisites in remaining.values():
+                prerequisites.difference_update(ready)
+        return order
+
+
+class WorkflowEngine:
+    """Runs workflow instances, one asyncio driver per run
+
+    Ready states run concurrently, and so do the items of a for_each state; every
+    step of an item goes through a per-tool semaphore. A state runs through the
+    action registered for its name or agent, or is handed to other agents with a
+    workflow.state.ready event and completed through complete_state(). Progress is
+    saved to Redis after every step, and a run whose owner stops renewing its lease
+    is picked up by the next resume().
+    """
+
+    def __init__(self, redis_client: RedisClient = None, event_bus: EventBus = None,
+                 workflows_dir: str = None):
+        self.redis_client = redis_client or get_redis_client()
+        self.event_bus = event_bus or get_event_bus()
+        self.workflows_dir = workflows_dir or WORKFLOWS_DIR
+        self.owner = str(uuid.uuid4())
+        self.definitions: Dict[str, WorkflowDefinition] = {}
+        self.state_actions: Dict[str, Callable] = {}
+        self.agent_actions: Dict[str, Callable] = {}
+        self.tool_actions: Dict[str, Callable] = {}
+        self.tool_limits: Dict[str, int] = {}
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.drivers: Dict[str, asyncio.Task] = {}
+        self.wakeups: Dict[str, asyncio.Event] = {}
+        self.send_script = self.redis_client.client.register_script(SEND_SCRIPT)
+        self.renew_script = self.redis_client.client.register_script(RENEW_LEASE_SCRIPT)
+        self.release_script = self.redis_client.client.register_script(RELEASE_LEASE_SCRIPT)
+
+        for limit in os.getenv('WORKFLOW_TOOL_LIMITS', '').split(','):
+            if '=' in limit:
+                tool, value = limit.split('=', 1)
+                self.tool_limits[tool.strip()] = int(value)
+
+    def load_definitions(self) -> None:
+        """Compile every workflow file in the workflows directory"""
+        for path in sorted(Path(self.workflows_dir).glob('*.y*ml')):
+            try:
+                definition = WorkflowDefinition.from_file(str(path))
+                self.definitions[definition.id] = definition
+                for tool, limit in definition.tool_concurrency.items():
+                    self.tool_limits.setdefault(tool, int(limit))
+            except Exception as e:
+                print(f"❌ Failed to load workflow {path.name}: {e}")
+        print(f"🧭 Loaded {len(self.definitions)} workflow(s) from {self.workflows_dir}")
+
+    def register_state(self, state: str, action: Callable) -> None:
+        """action(run, state_spec) -> {'success': bool, ...outputs}"""
+        self.state_actions[state] = action
+
+    def register_agent(self, agent: str, action: Callable) -> None:
+        """Fallback action for states of an agent that have none of their own"""
+        self.agent_actions[agent] = action
+
+    def register_tool(self, tool: str, action: Callable) -> None:
+        """action(run, state_spec, item, step, previous) -> {'success': bool, ...}; 'skipped' marks a no-op
+
+        previous maps each earlier completed step of the same item to its result.
+        """
+        self.tool_actions[tool] = action
+
+    async def start(self, workflow_id: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Create a run and start driving it"""
+        definition = self.definitions.get(workflow_id)
+        if definition is None:
+            return {'success': False, 'error': f"Unknown workflow {workflow_id}"}
+
+        now = datetime.utcnow().isoformat()
+        run = {
+            'id': str(uuid.uuid4()),
+            'workflow': workflow_id,
+            'status': 'running',
+            'context': context or {},
+            'artifacts': {},
+            'states': {name: self._fresh_state() for name in definition.order},
+            'reroutes': 0,
+            'error': None,
+            'created_at': now,
+            'updated_at': now
+        }
+        pipe = self.redis_client.client.pipeline()
+        pipe.set(RUN_KEY.format(run['id']), json.dumps(run))
+        pipe.zadd(ACTIVE_RUNS_KEY, {run['id']: timestamp_score(now)})
+        pipe.set(RUN_LEASE_KEY.format(run['id']), self.owner, px=int(LEASE_SECONDS * 1000))
+        pipe.execute()
+
+        await self._publish(EventTypes.WORKFLOW_STARTED, run)
+        self._spawn(run['id'])
+        return {'success': True, 'run': run}
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        return self.redis_client.get(RUN_KEY.format(run_id))
+
+    def provide(self, run_id: str, name: str, value: Any) -> Dict[str, Any]:
+        """Supply an external input such as reviewer feedback"""
+        return self._send(run_id, {'type': 'artifact', 'name': name, 'value': value})
+
+    def complete_state(self, run_id: str, state: str, outputs: Dict[str, Any] = None,
+                       success: bool = True, error: str = None) -> Dict[str, Any]:
+        """Report the result of a state that was handed to another agent"""
+        return self._send(run_id, {
+            'type': 'state', 'state': state, 'success': success,
+            'outputs': outputs or {}, 'error': error
+        })
+
+    async def resume(self) -> int:
+        """Take over unfinished runs nobody holds a lease on; returns how many"""
+        resumed = 0
+        for run_id in self.redis_client.zrange(ACTIVE_RUNS_KEY, 0, -1):
+            if run_id in self.drivers:
+                continue
+            if self.redis_client.client.set(RUN_LEASE_KEY.format(run_id), self.owner,
+                                            nx=True, px=int(LEASE_SECONDS * 1000)):
+                self._spawn(run_id)
+                resumed += 1
+        if resumed:
+            print(f"🔁 Resumed {resumed} workflow run(s)")
+        return resumed
+
+    async def watch(self) -> None:
+        """Keep resuming runs orphaned by other processes"""
+        while True:
+            await asyncio.sleep(LEASE_SECONDS)
+            try:
+                await self.resume()
+            except Exception as e:
+                print(f"❌ Workflow resume error: {e}")
+
+    async def close(self) -> None:
+        """Stop driving runs and release their leases so another process can resume them"""
+        for run_id, driver in list(self.drivers.items()):
+            driver.cancel()
+            await asyncio.gather(driver, return_exceptions=True)
+            self._release(run_id)
+
+    def _send(self, run_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        queued = self.send_script(keys=[RUN_KEY.format(run_id), RUN_INBOX_KEY.format(run_id)],
+                                  args=[json.dumps(message), *FINAL_RUN_STATUSES])
+        if queued == -1:
+            return {'success': False, 'error': 'Workflow run not found'}
+        if queued == 0:
+            return {'success': False, 'finished': True, 'error': 'Workflow run has already finished'}
+        if run_id in self.wakeups:
+            self.wakeups[run_id].set()
+        return {'success': True}
+
+    def _spawn(self, run_id: str) -> None:
+        self.wakeups[run_id] = asyncio.Event()
+        driver = asyncio.ensure_future(self._drive(run_id))
+        self.drivers[run_id] = driver
+
+        def forget(_):
+            self.drivers.pop(run_id, None)
+            self.wakeups.pop(run_id, None)
+        driver.add_done_callback(forget)
+
+    @staticmethod
+    def _fresh_state() -> Dict[str, Any]:
+        return {'status': 'pending', 'outputs': None, 'error': None, 'items': []}
+
+    async def _drive(self, run_id: str) -> None:
+        run = self.get_run(run_id)
+        if not run or run['status'] in FINAL_RUN_STATUSES:
+            self._finish(run_id)
+            return
+        definition = self.definitions.get(run['workflow'])
+        if definition is None:
+            print(f"❌ Workflow run {run_id} uses unknown workflow {run['workflow']}")
+            self._release(run_id)
+            return
+
+        # Whatever was running when the previous owner stopped runs again; finished
+        # for_each steps are kept, so only the unfinished work repeats
+        for state in run['states'].values():
+            if state['status'] == 'running':
+                state['status'] = 'pending'
+
+        running: Dict[asyncio.Task, str] = {}
+        wakeup = self.wakeups[run_id]
+        last_renewal = time.time()
+        try:
+            while True:
+                self._apply_inbox(run, definition)
+                self._cancel_stale(run, running)
+
+                for name in definition.order:
+                    if run['status'] not in FINAL_RUN_STATUSES and self._is_ready(run, definition, name):
+                        run['states'][name]['status'] = 'running'
+                        running[asyncio.ensure_future(self._run_state(run, definition, name))] = name
+
+                if run['status'] not in FINAL_RUN_STATUSES:
+                    if all(state['status'] == 'completed' for state in run['states'].values()):
+                        run['status'] = 'completed'
+                        await self._publish(EventTypes.WORKFLOW_COMPLETED, run)
+                    else:
+                        run['status'] = 'running' if running else 'waiting'
+                self._save(run)
+
+                if run['status'] in FINAL_RUN_STATUSES:
+                    if run['status'] == 'failed':
+                        await self._publish(EventTypes.WORKFLOW_FAILED, run)
+                    for task in running:
+                        task.cancel()
+                    self._finish(run_id)
+                    return
+
+                waiter = asyncio.ensure_future(wakeup.wait())
+                done, _ = await asyncio.wait(set(running) | {waiter}, timeout=POLL_INTERVAL,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                wakeup.clear()
+                for task in done:
+                    if task in running:
+                        await self._state_finished(run, definition, running.pop(task), task)
+                        self._cancel_stale(run, running)
+
+                if time.time() - last_renewal > LEASE_SECONDS / 3:
+                    if not self._renew(run_id):
+                        print(f"⚠️ Lost the lease on workflow run {run_id}, stopping")
+                        for task in running:
+                            task.cancel()
+                        return
+                    last_renewal = time.time()
+        except asyncio.CancelledError:
+            for task in running:
+                task.cancel()
+            raise
+
+    @staticmethod
+    def _cancel_stale(run: Dict[str, Any], running: Dict[asyncio.Task, str]) -> None:
+        """Cancel tasks whose state a reroute reset while they ran, so their results are never applied"""
+        for task, name in list(running.items()):
+            if run['states'][name]['status'] != 'running':
+                task.cancel()
+                del running[task]
+
+    def _is_ready(self, run: Dict[str, Any], definition: WorkflowDefinition, name: str) -> bool:
+        if run['states'][name]['status'] != 'pending':
+            return False
+        if any(run['states'][prerequisite]['status'] != 'completed' for prerequisite in definition.depends_on[name]):
+            return False
+        return all(artifact in run['artifacts'] for artifact in definition.external[name])
+
+    def _apply_inbox(self, run: Dict[str, Any], definition: WorkflowDefinition) -> None:
+        key = RUN_INBOX_KEY.format(run['id'])
+        pipe = self.redis_client.client.pipeline()
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+        messages, _ = pipe.execute()
+        for raw in messages:
+            message = json.loads(raw)
+            if message['type'] == 'artifact':
+                run['artifacts'][message['name']] = message['value']
+                continue
+
+            state = run['states'].get(message['state'])
+            if state is None or state['status'] != 'waiting':
+                print(f"⚠️ Ignoring result for {message['state']} in run {run['id']}: state is not waiting")
+                continue
+            if message['success']:
+                self._complete(run, definition, message['state'], message['outputs'])
+            else:
+                self._fail(run, message['state'], message.get('error') or 'State failed')
+
+    async def _run_state(self, run: Dict[str, Any], definition: WorkflowDefinition, name: str) -> Dict[str, Any]:
+        spec = definition.states[name]
+        if spec.get('for_each'):
+            return await self._run_for_each(run, spec)
+
+        action = self.state_actions.get(name) or self.agent_actions.get(spec.get('agent'))
+        if action is None:
+            # Nothing in Marcus can do this; hand it to the owning agent and wait
+            return {'success': True, 'waiting': True}
+        return await action(run, spec)
+
+    async def _run_for_each(self, run: Dict[str, Any], spec: Dict[str, Any]) -> Dict[str, Any]:
+        for_each = spec['for_each']
+        collection = run['context'].get(for_each['collection'], run['artifacts'].get(for_each['collection'])) or []
+        state = run['states'][spec['name']]
+        while len(state['items']) < len(collection):
+            state['items'].append({})
+
+        results = await asyncio.gather(
+            *(self._run_item(run, spec, index, item) for index, item in enumerate(collection)),
+            return_exceptions=True
+        )
+        errors = [str(result) for result in results if isinstance(result, Exception)]
+        if errors:
+            return {'success': False, 'error': errors[0]}
+        return {'success': True, 'items': state['items']}
+
+    async def _run_item(self, run: Dict[str, Any], spec: Dict[str, Any], index: int, item: Any) -> None:
+        """Run one item's steps in order, skipping those that already finished"""
+        record = run['states'][spec['name']]['items'][index]
+        for step in spec['for_each'].get('steps') or []:
+            task = step.get('task')
+            if (record.get(task) or {}).get('status') in ('completed', 'skipped'):
+                continue
+            tool = step.get('tool')
+            action = self.tool_actions.get(tool)
+            if action is None:
+                raise RuntimeError(f"No action registered for tool {tool}")
+
+            # Earlier steps' results, e.g. Midjourney's background for HeyGen
+            previous = {name: entry['result'] for name, entry in record.items() if entry.get('status') == 'completed'}
+            error = None
+            for attempt in range(STEP_MAX_ATTEMPTS):
+                if attempt:
+                    await asyncio.sleep(2 ** (attempt - 1))
+                async with self._semaphore(tool):
+                    try:
+                        result = await action(run, spec, item, step, previous)
+                    except Exception as e:
+                        result = {'success': False, 'error': str(e)}
+                if result.get('success') or result.get('skipped'):
+                    record[task] = {
+                        'status': 'skipped' if result.get('skipped') else 'completed',
+                        'result': result,
+                        'attempts': attempt + 1
+                    }
+                    break
+                error = result.get('error') or f"{task} failed"
+            else:
+                record[task] = {'status': 'failed', 'error': error, 'attempts': STEP_MAX_ATTEMPTS}
+                self._save(run)
+                raise RuntimeError(f"{task} for item {index + 1}: {error}")
+            self._save(run)
+
+    async def _state_finished(self, run: Dict[str, Any], definition: WorkflowDefinition,
+                              name: str, task: asyncio.Task) -> None:
+        try:
+            result = task.result()
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+
+        if result.get('waiting'):
+            run['states'][name]['status'] = 'waiting'
+            spec = definition.states[name]
+            await self._publish(EventTypes.WORKFLOW_STATE_READY, {
+                'run_id': run['id'],
+                'workflow': run['workflow'],
+                'state': name,
+                'agent': spec.get('agent'),
+                'goal': spec.get('goal'),
+                'inputs': {
+                    artifact: run['artifacts'].get(artifact, run['context'].get(artifact))
+                    for artifact in _as_list(spec.get('requires')) + _as_list(spec.get('inputs'))
+                },
+                'context': run['context']
+            })
+        elif result.get('success'):
+            self._complete(run, definition, name, result)
+            await self._publish(EventTypes.WORKFLOW_STATE_COMPLETED, {'run_id': run['id'], 'state': name})
+        else:
+            self._fail(run, name, result.get('error') or 'State failed')
+
+    def _complete(self, run: Dict[str, Any], definition: WorkflowDefinition, name: str,
+                  outputs: Dict[str, Any]) -> None:
+        state = run['states'][name]
+        state['status'] = 'completed'
+        state['outputs'] = outputs
+        for artifact in definition.produces(name):
+            run['artifacts'][artifact] = outputs.get(artifact, outputs)
+
+        for decision in definition.decisions[name]:
+            condition = decision['if']
+            if not outputs.get(condition, run['artifacts'].get(condition)):
+                continue
+            if run['reroutes'] >= MAX_REROUTES:
+                self._fail(run, name, f"{condition} still true after {MAX_REROUTES} reroutes")
+                return
+            run['reroutes'] += 1
+            # Rerun the target and everything after it, with fresh external inputs
+            for reset in definition.downstream(decision['reroute_to']):
+                run['states'][reset] = self._fresh_state()
+                for artifact in definition.produces(reset) + sorted(definition.external[reset]):
+                    run['artifacts'].pop(artifact, None)
+            print(f"↩️ Workflow run {run['id']}: {condition}, rerouting to {decision['reroute_to']}")
+            return
+
+    def _fail(self, run: Dict[str, Any], name: str, error: str) -> None:
+        run['states'][name]['status'] = 'failed'
+        run['states'][name]['error'] = error
+        run['status'] = 'failed'
+        run['error'] = f"{name}: {error}"
+        print(f"❌ Workflow run {run['id']} failed in {name}: {error}")
+
+    def _semaphore(self, tool: str) -> asyncio.Semaphore:
+        if tool not in self.semaphores:
+            self.semaphores[tool] = asyncio.Semaphore(self.tool_limits.get(tool, DEFAULT_TOOL_CONCURRENCY))
+        return self.semaphores[tool]
+
+    def _save(self, run: Dict[str, Any]) -> None:
+        run['updated_at'] = datetime.utcnow().isoformat()
+        self.redis_client.set(RUN_KEY.format(run['id']), run)
+
+    def _renew(self, run_id: str) -> bool:
+        """Extend our lease; False once it expired or another process took the run over"""
+        return bool(self.renew_script(keys=[RUN_LEASE_KEY.format(run_id)],
+                                      args=[self.owner, int(LEASE_SECONDS * 1000)]))
+
+    def _release(self, run_id: str) -> None:
+        self.release_script(keys=[RUN_LEASE_KEY.format(run_id)], args=[self.owner])
+
+    def _finish(self, run_id: str) -> None:
+        pipe = self.redis_client.client.pipeline()
+        pipe.zrem(ACTIVE_RUNS_KEY, run_id)
+        pipe.delete(RUN_LEASE_KEY.format(run_id), RUN_INBOX_KEY.format(run_id))
+        pipe.execute()
+
+    async def _publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        try:
+            event = await self.event_bus.create_event(event_type, 'marcus', data)
+            await self.event_bus.publish(event)
+        except Exception as e:
+            print(f"❌ Failed to publish {event_type}: {e}")
+
+
+# Global workflow engine instance
+workflow_engine = None
+
+def get_workflow_engine() -> WorkflowEngine:
+    """Get or create the global workflow engine instance"""
+    global workflow_engine
+    if workflow_engine is None:
+        workflow_engine = WorkflowEngine()
+    return workflow_engine
@@ -6,11 +6,17 @@ Handles Redis pub/sub events for inter-agent communication
 import json
 import redis
 import asyncio
+from functools import partial
 from datetime import datetime
 from typing import Dict, Any, Optional, Callable
 from dataclasses import dataclass, asdict
 
 
+# Recent events kept for polling clients
+EVENT_LOG_KEY = "skyras:events"
+EVENT_LOG_MAX = 1000
+
+
 @dataclass
 class SkyRasEvent:
     """Standard event structure for SkyRas v2"""
@@ -42,10 +48,18 @@ class EventBus:
         
         event_data = json.dumps(event.to_dict())
         await asyncio.get_event_loop().run_in_executor(
-            None, self.redis_client.publish, channel, event_data
+            None, self._publish_and_record, channel, event_data
         )
         print(f"📡 Published {event.event_type} from {event.agent} to {channel}")
     
+    def _publish_and_record(self, channel: str, event_data: str) -> None:
+        """Publish the event and append it to the bounded recent-events log"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.publish(channel, event_data)
+        pipe.lpush(EVENT_LOG_KEY, event_data)
+        pipe.ltrim(EVENT_LOG_KEY, 0, EVENT_LOG_MAX - 1)
+        pipe.execute()
+    
     async def subscribe(self, channel: str, callback: Callable[[SkyRasEvent], None]) -> None:
         """Subscribe to a Redis channel"""
         if channel not in self.subscribers:
@@ -62,7 +76,7 @@ class EventBus:
         while True:
             try:
                 message = await asyncio.get_event_loop().run_in_executor(
-                    None, self.pubsub.get_message, timeout=1.0
+                    None, partial(self.pubsub.get_message, timeout=1.0)
                 )
                 
                 if message and message['type'] == 'message':
@@ -76,12 +90,15 @@ class EventBus:
                                 await callback(event)
                             except Exception as e:
                                 print(f"❌ Error in callback for {channel}: {e}")
-                
-                await asyncio.sleep(0.1)
             except Exception as e:
                 print(f"❌ Error in event listener: {e}")
                 await asyncio.sleep(1)
     
+    @staticmethod
+    def all_channels() -> list:
+        """Every channel events are published on"""
+        return ['skyras:tasks', 'skyras:files', 'skyras:system']
+    
     def _get_channel_for_event_type(self, event_type: str) -> str:
         """Map event types to Redis channels"""
         if event_type.startswith('task.'):
@@ -108,6 +125,9 @@ class EventTypes:
     TASK_UPDATED = "task.updated"
     TASK_COMPLETED = "task.completed"
     TASK_DELETED = "task.deleted"
+    TASKS_BULK_CREATED = "task.bulk_created"
+    TASKS_BULK_UPDATED = "task.bulk_updated"
+    TASKS_BULK_DELETED = "task.bulk_deleted"
     SCHEDULE_CHANGED = "schedule.changed"
     
     # File events
@@ -117,6 +137,13 @@ class EventTypes:
     SEARCH_INDEXED = "search.indexed"
     FILE_ASSOCIATED = "file.associated"
     
+    # Workflow events
+    WORKFLOW_STARTED = "workflow.started"
+    WORKFLOW_STATE_READY = "workflow.state.ready"
+    WORKFLOW_STATE_COMPLETED = "workflow.state.completed"
+    WORKFLOW_COMPLETED = "workflow.completed"
+    WORKFLOW_FAILED = "workflow.failed"
+    
     # System events
     AGENT_STARTED = "agent.started"
     AGENT_STOPPED = "agent.stopped"
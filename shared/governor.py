@@ -0,0 +1,272 @@
+"""
+SkyRas v2 Provider Governor
+Redis-coordinated rate limits and concurrency quotas for external generation APIs
+"""
+
+import os
+import time
+import uuid
+import random
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+import httpx
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from shared.redis_client import RedisClient, get_redis_client
+
+
+BUCKET_KEY = "governor:{}:bucket"   # hash: tokens, ts, rate, blocked_until
+SLOTS_KEY = "governor:{}:slots"     # zset of held concurrency slots by lease expiry
+
+# Starting points; GOVERNOR_CONFIG (YAML) and GOVERNOR_<PROVIDER>_<SETTING> override them
+DEFAULT_LIMITS = {
+    'midjourney': {'rate_per_minute': 10, 'burst': 3, 'concurrency': 3},
+    'heygen': {'rate_per_minute': 60, 'burst': 5, 'concurrency': 2},
+    'elevenlabs': {'rate_per_minute': 120, 'burst': 10, 'concurrency': 4},
+    'suno': {'rate_per_minute': 10, 'burst': 2, 'concurrency': 2}
+}
+LIMIT_SETTINGS = ('rate_per_minute', 'burst', 'concurrency')
+
+SLOT_LEASE_SECONDS = float(os.getenv('GOVERNOR_SLOT_LEASE_SECONDS', '120'))
+MAX_RETRIES = int(os.getenv('GOVERNOR_MAX_RETRIES', '3'))
+# After a 429 the shared rate is multiplied by this; each success adds back a fraction of the maximum
+RATE_DECREASE = float(os.getenv('GOVERNOR_RATE_DECREASE', '0.5'))
+RATE_INCREASE = float(os.getenv('GOVERNOR_RATE_INCREASE', '0.05'))
+MIN_RATE_FRACTION = float(os.getenv('GOVERNOR_MIN_RATE_FRACTION', '0.1'))
+
+# Take one token from the provider's bucket, refilled at its current (adaptive) rate.
+# Returns "0" when granted, otherwise the seconds to wait before trying again
+ACQUIRE_SCRIPT = """
+local key = KEYS[1]
+local max_rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', key, 'tokens', 'ts', 'rate', 'blocked_until')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+local rate = math.min(tonumber(state[3]) or max_rate, max_rate)
+local blocked_until = tonumber(state[4]) or 0
+if blocked_until > now then
+    return tostring(blocked_until - now)
+end
+
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now), 'rate', tostring(rate))
+redis.call('EXPIRE', key, 3600)
+return tostring(wait)
+"""
+
+# AIMD on the shared rate: halve it and pause the provider on 429, creep back up on success
+FEEDBACK_SCRIPT = """
+local key = KEYS[1]
+local throttled, max_rate, min_rate = ARGV[1] == '1', tonumber(ARGV[2]), tonumber(ARGV[3])
+local retry_after, decrease, increase = tonumber(ARGV[4]), tonumber(ARGV[5]), tonumber(ARGV[6])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local rate = math.min(tonumber(redis.call('HGET', key, 'rate')) or max_rate, max_rate)
+if throttled then
+    rate = math.max(min_rate, rate * decrease)
+    redis.call('HSET', key, 'tokens', '0', 'ts', tostring(now))
+    if retry_after > 0 then
+        redis.call('HSET', key, 'blocked_until', tostring(now + retry_after))
+    end
+    redis.call('HINCRBY', key, 'throttled', 1)
+else
+    rate = math.min(max_rate, rate + max_rate * increase)
+end
+redis.call('HSET', key, 'rate', tostring(rate))
+redis.call('EXPIRE', key, 3600)
+return tostring(rate)
+"""
+
+# Hold one of `limit` slots under a lease so a crashed replica's slots free themselves
+SLOT_SCRIPT = """
+local key, limit, token, lease = KEYS[1], tonumber(ARGV[1]), ARGV[2], tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now)
+if redis.call('ZSCORE', key, token) or redis.call('ZCARD', key) < limit then
+    redis.call('ZADD', key, now + lease, token)
+    return 1
+end
+return 0
+"""
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return max(0.0, float(response.headers.get('Retry-After', 0)))
+    except ValueError:
+        return 0.0
+
+
+class ProviderGovernor:
+    """Rate limit and concurrency quota for one provider, shared by every replica
+
+    slot() caps how many generations run at once; call() spends a token per HTTP
+    request, reports the outcome and retries 429s. A 429 lowers the shared rate and
+    honours Retry-After for everyone; successes raise it back towards the maximum.
+    If Redis is unreachable the governor fails open rather than blocking generation.
+    """
+
+    def __init__(self, provider: str, limits: Dict[str, Any], redis_client: RedisClient):
+        self.provider = provider
+        self.rate = float(limits['rate_per_minute']) / 60
+        self.min_rate = self.rate * MIN_RATE_FRACTION
+        self.burst = max(1.0, float(limits['burst']))
+        self.concurrency = int(limits['concurrency'])
+        self.client = redis_client.client
+        self.acquire_script = self.client.register_script(ACQUIRE_SCRIPT)
+        self.feedback_script = self.client.register_script(FEEDBACK_SCRIPT)
+        self.slot_script = self.client.register_script(SLOT_SCRIPT)
+
+    async def throttle(self) -> None:
+        """Wait until the provider's token bucket grants a request"""
+        while True:
+            try:
+                wait = float(self.acquire_script(keys=[BUCKET_KEY.format(self.provider)],
+                                                 args=[self.rate, self.burst]))
+            except Exception as e:
+                print(f"⚠️ Governor unavailable for {self.provider}, not throttling: {e}")
+                return
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait * random.uniform(1.0, 1.2))
+
+    def report(self, response: httpx.Response) -> None:
+        """Feed a provider response back into the shared rate"""
+        throttled = response.status_code == 429
+        if not throttled and response.status_code >= 400:
+            return
+        try:
+            self.feedback_script(
+                keys=[BUCKET_KEY.format(self.provider)],
+                args=['1' if throttled else '0', self.rate, self.min_rate, _retry_after(response) if throttled else 0,
+                      RATE_DECREASE, RATE_INCREASE]
+            )
+        except Exception as e:
+            print(f"⚠️ Governor feedback failed for {self.provider}: {e}")
+
+    async def call(self, send: Callable[..., Awaitable[httpx.Response]], *args, **kwargs) -> httpx.Response:
+        """Make one API request under the rate limit, retrying when the provider says 429"""
+        for attempt in range(MAX_RETRIES + 1):
+            await self.throttle()
+            response = await send(*args, **kwargs)
+            self.report(response)
+            if response.status_code != 429 or attempt == MAX_RETRIES:
+                return response
+            print(f"⏳ {self.provider} rate limited, retry {attempt + 1}/{MAX_RETRIES}")
+        return response
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the provider's concurrent-generation slots"""
+        key = SLOTS_KEY.format(self.provider)
+        token = str(uuid.uuid4())
+        delay = 0.2
+        while True:
+            try:
+                if self.slot_script(keys=[key], args=[self.concurrency, token, SLOT_LEASE_SECONDS]):
+                    break
+            except Exception as e:
+                print(f"⚠️ Governor unavailable for {self.provider}, not limiting concurrency: {e}")
+                yield
+                return
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, 2.0)
+
+        # Long generations (HeyGen renders for minutes) keep renewing their lease
+        renewer = asyncio.ensure_future(self._renew(key, token))
+        try:
+            yield
+        finally:
+            renewer.cancel()
+            try:
+                self.client.zrem(key, token)
+            except Exception as e:
+                print(f"⚠️ Failed to release {self.provider} slot: {e}")
+
+    async def _renew(self, key: str, token: str) -> None:
+        while True:
+            await asyncio.sleep(SLOT_LEASE_SECONDS / 3)
+            try:
+                self.slot_script(keys=[key], args=[self.concurrency, token, SLOT_LEASE_SECONDS])
+            except Exception as e:
+                print(f"⚠️ Failed to renew {self.provider} slot: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        bucket = self.client.hgetall(BUCKET_KEY.format(self.provider))
+        return {
+            'max_rate_per_minute': round(self.rate * 60, 2),
+            'rate_per_minute': round(float(bucket.get('rate', self.rate)) * 60, 2),
+            'burst': self.burst,
+            'concurrency': self.concurrency,
+            'slots_in_use': self.client.zcount(SLOTS_KEY.format(self.provider), time.time(), '+inf'),
+            'throttled': int(bucket.get('throttled', 0))
+        }
+
+
+class Governor:
+    """Per-provider governors built from defaults, GOVERNOR_CONFIG and environment overrides"""
+
+    def __init__(self, redis_client: RedisClient = None, config_path: str = None):
+        self.redis_client = redis_client or get_redis_client()
+        self.limits = self._load_limits(config_path or os.getenv('GOVERNOR_CONFIG'))
+        self.providers: Dict[str, ProviderGovernor] = {}
+
+    def provider(self, name: str) -> ProviderGovernor:
+        if name not in self.providers:
+            limits = self.limits.get(name) or self.limits.get('default') or DEFAULT_LIMITS['midjourney']
+            self.providers[name] = ProviderGovernor(name, limits, self.redis_client)
+        return self.providers[name]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: self.provider(name).stats() for name in sorted(self.limits)}
+
+    @staticmethod
+    def _load_limits(config_path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        limits = {provider: dict(settings) for provider, settings in DEFAULT_LIMITS.items()}
+
+        if config_path:
+            if yaml is None:
+                print("⚠️ PyYAML not installed, ignoring GOVERNOR_CONFIG")
+            else:
+                try:
+                    with open(config_path) as f:
+                        config = yaml.safe_load(f) or {}
+                    for provider, settings in (config.get('providers') or {}).items():
+                        limits.setdefault(provider, dict(DEFAULT_LIMITS['midjourney'])).update(settings or {})
+                except Exception as e:
+                    print(f"❌ Failed to load governor config {config_path}: {e}")
+
+        for provider, settings in limits.items():
+            for setting in LIMIT_SETTINGS:
+                value = os.getenv(f"GOVERNOR_{provider.upper()}_{setting.upper()}")
+                if value:
+                    settings[setting] = float(value)
+        return limits
+
+
+# Global governor instance
+governor = None
+
+def get_governor() -> Governor:
+    """Get or create the global governor instance"""
+    global governor
+    if governor is None:
+        governor = Governor()
+    return governor
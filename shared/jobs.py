@@ -0,0 +1,318 @@
+"""
+SkyRas v2 Job Queue
+Durable Redis-backed background jobs with retries, delays and per-queue concurrency limits
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import inspect
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+
+from shared.redis_client import RedisClient, get_redis_client
+
+
+JOB_KEY = "job:{}"
+READY_KEY = "jobs:{}:ready"          # list of runnable job ids, claimed from the right
+SCHEDULED_KEY = "jobs:{}:scheduled"  # zset of delayed and retrying job ids by run time
+ACTIVE_KEY = "jobs:{}:active"        # zset of running job ids by lease expiry
+LEASES_KEY = "jobs:{}:leases"        # hash of running job id to the token of its current claim
+DEAD_KEY = "jobs:{}:dead"            # list of job ids that used up their attempts
+
+DEFAULT_QUEUE = "default"
+DEFAULT_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '5'))
+RETRY_BASE_DELAY = float(os.getenv('JOB_RETRY_BASE_DELAY', '2'))
+RETRY_MAX_DELAY = float(os.getenv('JOB_RETRY_MAX_DELAY', '300'))
+LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '60'))
+
+# Atomically: hand expired leases (crashed workers) back, release due scheduled jobs,
+# then claim up to ARGV[4] ready jobs without exceeding the queue's concurrency limit.
+# Each claim gets its own token; returns a flat list of job id, token pairs
+CLAIM_SCRIPT = """
+local ready, scheduled, active, leases = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local now, lease_until, limit, wanted = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local claim_id = ARGV[5]
+
+for _, job_id in ipairs(redis.call('ZRANGEBYSCORE', active, '-inf', now)) do
+    redis.call('ZREM', active, job_id)
+    redis.call('HDEL', leases, job_id)
+    redis.call('RPUSH', ready, job_id)
+end
+
+for _, job_id in ipairs(redis.call('ZRANGEBYSCORE', scheduled, '-inf', now, 'LIMIT', 0, 500)) do
+    redis.call('ZREM', scheduled, job_id)
+    redis.call('LPUSH', ready, job_id)
+end
+
+if limit > 0 then
+    wanted = math.min(wanted, limit - redis.call('ZCARD', active))
+end
+
+local claimed = {}
+for _ = 1, wanted do
+    local job_id = redis.call('RPOP', ready)
+    if not job_id then
+        break
+    end
+    local token = claim_id .. ':' .. job_id
+    redis.call('ZADD', active, lease_until, job_id)
+    redis.call('HSET', leases, job_id, token)
+    claimed[#claimed + 1] = job_id
+    claimed[#claimed + 1] = token
+end
+return claimed
+"""
+
+# Atomically finish a claimed job, but only while ARGV[2] is still its lease token; a worker
+# whose lease expired and was handed to someone else changes nothing. ARGV[3] is
+# 'complete' (drop the job), 'retry' (store it and run it at ARGV[5]) or 'dead'
+FINISH_SCRIPT = """
+local active, leases, job_key, scheduled, dead = KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5]
+local job_id, token, outcome = ARGV[1], ARGV[2], ARGV[3]
+
+if redis.call('HGET', leases, job_id) ~= token then
+    return 0
+end
+redis.call('HDEL', leases, job_id)
+redis.call('ZREM', active, job_id)
+
+if outcome == 'complete' then
+    redis.call('DEL', job_key)
+else
+    redis.call('SET', job_key, ARGV[4])
+    if outcome == 'retry' then
+        redis.call('ZADD', scheduled, tonumber(ARGV[5]), job_id)
+    else
+        redis.call('LPUSH', dead, job_id)
+    end
+end
+return 1
+"""
+
+
+class JobQueue:
+    """Enqueues jobs by handler name; handlers and queue limits are registered up front"""
+
+    def __init__(self, redis_client: RedisClient = None):
+        self.redis_client = redis_client or get_redis_client()
+        self.handlers: Dict[str, Dict[str, Any]] = {}
+        self.limits: Dict[str, int] = {}
+        self.claim_script = self.redis_client.client.register_script(CLAIM_SCRIPT)
+        self.finish_script = self.redis_client.client.register_script(FINISH_SCRIPT)
+
+    def register(self, name: str, handler: Callable, queue: str = DEFAULT_QUEUE,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> None:
+        """Register a handler (sync or async) under a job name"""
+        self.handlers[name] = {'handler': handler, 'queue': queue, 'max_attempts': max_attempts}
+
+    def set_limit(self, queue: str, concurrency: int) -> None:
+        """Cap how many jobs of a queue run at once across all workers (0 means unlimited)"""
+        self.limits[queue] = concurrency
+
+    def queues(self) -> List[str]:
+        return sorted({spec['queue'] for spec in self.handlers.values()})
+
+    def enqueue(self, name: str, *args: Any, delay: float = 0,
+                run_at: Optional[datetime] = None) -> str:
+        """Persist a job and make it runnable now, after delay seconds, or at run_at"""
+        if name not in self.handlers:
+            raise ValueError(f"No job handler registered for {name}")
+
+        spec = self.handlers[name]
+        job_id = str(uuid.uuid4())
+        job = {
+            'id': job_id,
+            'name': name,
+            'queue': spec['queue'],
+            'args': list(args),
+            'attempts': 0,
+            'max_attempts': spec['max_attempts'],
+            'created_at': datetime.utcnow().isoformat(),
+            'last_error': None
+        }
+
+        when = run_at.timestamp() if run_at is not None else time.time() + delay
+        pipe = self.redis_client.client.pipeline()
+        pipe.set(JOB_KEY.format(job_id), json.dumps(job))
+        if when > time.time():
+            pipe.zadd(SCHEDULED_KEY.format(spec['queue']), {job_id: when})
+        else:
+            pipe.lpush(READY_KEY.format(spec['queue']), job_id)
+        pipe.execute()
+        return job_id
+
+    def claim(self, queue: str, wanted: int) -> List[Dict[str, Any]]:
+        """Lease up to wanted runnable jobs from a queue
+
+        Each job carries the 'lease_token' of this claim; complete and fail only take
+        effect while it is still the job's current lease.
+        """
+        now = time.time()
+        claimed = self.claim_script(
+            keys=[READY_KEY.format(queue), SCHEDULED_KEY.format(queue), ACTIVE_KEY.format(queue),
+                  LEASES_KEY.format(queue)],
+            args=[now, now + LEASE_SECONDS, self.limits.get(queue, 0), wanted, uuid.uuid4().hex]
+        )
+        if not claimed:
+            return []
+
+        job_ids, tokens = claimed[0::2], claimed[1::2]
+        jobs = self.redis_client.mget([JOB_KEY.format(job_id) for job_id in job_ids])
+        missing = [job_id for job_id, job in zip(job_ids, jobs) if job is None]
+        if missing:
+            pipe = self.redis_client.client.pipeline()
+            pipe.zrem(ACTIVE_KEY.format(queue), *missing)
+            pipe.hdel(LEASES_KEY.format(queue), *missing)
+            pipe.execute()
+        return [{**job, 'lease_token': token} for job, token in zip(jobs, tokens) if job is not None]
+
+    def extend(self, queue: str, job_ids: List[str]) -> None:
+        """Renew the leases of jobs that are still running"""
+        if job_ids:
+            lease_until = time.time() + LEASE_SECONDS
+            self.redis_client.client.zadd(ACTIVE_KEY.format(queue), {job_id: lease_until for job_id in job_ids}, xx=True)
+
+    def complete(self, job: Dict[str, Any]) -> bool:
+        """Remove a finished job; returns False if its lease had already passed to another claim"""
+        return self._finish(job, 'complete')
+
+    def fail(self, job: Dict[str, Any], error: str) -> Optional[bool]:
+        """Schedule a retry with exponential backoff; returns False once the job is dead
+
+        Returns None without changing anything if the lease had already passed to another claim.
+        """
+        job['attempts'] += 1
+        job['last_error'] = error
+        retrying = job['attempts'] < job['max_attempts']
+
+        delay = min(RETRY_BASE_DELAY * 2 ** (job['attempts'] - 1), RETRY_MAX_DELAY)
+        if not self._finish(job, 'retry' if retrying else 'dead', time.time() + delay):
+            return None
+        return retrying
+
+    def _finish(self, job: Dict[str, Any], outcome: str, run_at: float = 0) -> bool:
+        queue = job['queue']
+        stored = {key: value for key, value in job.items() if key != 'lease_token'}
+        return bool(self.finish_script(
+            keys=[ACTIVE_KEY.format(queue), LEASES_KEY.format(queue), JOB_KEY.format(job['id']),
+                  SCHEDULED_KEY.format(queue), DEAD_KEY.format(queue)],
+            args=[job['id'], job.get('lease_token', ''), outcome, json.dumps(stored), run_at]
+        ))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Job counts per queue"""
+        pipe = self.redis_client.client.pipeline(transaction=False)
+        queues = self.queues()
+        for queue in queues:
+            pipe.llen(READY_KEY.format(queue))
+            pipe.zcard(SCHEDULED_KEY.format(queue))
+            pipe.zcard(ACTIVE_KEY.format(queue))
+            pipe.llen(DEAD_KEY.format(queue))
+        counts = pipe.execute()
+        return {
+            queue: dict(zip(('ready', 'scheduled', 'running', 'dead'), counts[i * 4:i * 4 + 4]))
+            for i, queue in enumerate(queues)
+        }
+
+
+class JobWorker:
+    """Claims and runs jobs from a JobQueue until stopped
+
+    Jobs run at least once: a job whose worker dies is handed to another worker when
+    its lease expires. A handler fails by raising or by returning {'success': False}.
+    """
+
+    def __init__(self, job_queue: JobQueue, queues: List[str] = None,
+                 concurrency: int = None, poll_interval: float = None):
+        self.job_queue = job_queue
+        self.queues = queues or job_queue.queues()
+        self.concurrency = concurrency or int(os.getenv('JOB_WORKER_CONCURRENCY', '10'))
+        self.poll_interval = poll_interval or float(os.getenv('JOB_POLL_INTERVAL', '0.5'))
+        self.running: Dict[str, Dict[str, Any]] = {}
+        self.stopping = False
+
+    async def run(self) -> None:
+        print(f"👷 Job worker started on queues: {', '.join(self.queues)}")
+        loop = asyncio.get_event_loop()
+        last_renewal = time.time()
+        while not self.stopping:
+            try:
+                claimed = 0
+                for queue in self.queues:
+                    free = self.concurrency - len(self.running)
+                    if free <= 0:
+                        break
+                    jobs = await loop.run_in_executor(None, self.job_queue.claim, queue, free)
+                    for job in jobs:
+                        self.running[job['id']] = job
+                        asyncio.create_task(self._execute(job))
+                    claimed += len(jobs)
+
+                if time.time() - last_renewal > LEASE_SECONDS / 3:
+                    await loop.run_in_executor(None, self._renew_leases)
+                    last_renewal = time.time()
+
+                if not claimed:
+                    await asyncio.sleep(self.poll_interval)
+                else:
+                    await asyncio.sleep(0)
+            except Exception as e:
+                print(f"❌ Job worker error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop claiming and give running jobs a chance to finish"""
+        self.stopping = True
+        deadline = time.time() + timeout
+        while self.running and time.time() < deadline:
+            await asyncio.sleep(0.1)
+
+    def _renew_leases(self) -> None:
+        by_queue: Dict[str, List[str]] = {}
+        for job in list(self.running.values()):
+            by_queue.setdefault(job['queue'], []).append(job['id'])
+        for queue, job_ids in by_queue.items():
+            self.job_queue.extend(queue, job_ids)
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        loop = asyncio.get_event_loop()
+        try:
+            spec = self.job_queue.handlers.get(job['name'])
+            if spec is None:
+                raise RuntimeError(f"No job handler registered for {job['name']}")
+
+            handler = spec['handler']
+            if inspect.iscoroutinefunction(handler):
+                result = await handler(*job['args'])
+            else:
+                result = await loop.run_in_executor(None, handler, *job['args'])
+
+            if isinstance(result, dict) and result.get('success') is False:
+                raise RuntimeError(result.get('error') or 'Job handler reported failure')
+
+            if not await loop.run_in_executor(None, self.job_queue.complete, job):
+                print(f"⚠️ Job {job['name']} finished after its lease passed to another worker")
+        except Exception as e:
+            retrying = await loop.run_in_executor(None, self.job_queue.fail, job, str(e))
+            if retrying is None:
+                print(f"⚠️ Job {job['name']} failed after its lease passed to another worker: {e}")
+            elif retrying:
+                print(f"⚠️ Job {job['name']} failed (attempt {job['attempts']}), retrying: {e}")
+            else:
+                print(f"❌ Job {job['name']} failed permanently after {job['attempts']} attempts: {e}")
+        finally:
+            self.running.pop(job['id'], None)
+
+
+# Global job queue instance
+job_queue = None
+
+def get_job_queue() -> JobQueue:
+    """Get or create the global job queue instance"""
+    global job_queue
+    if job_queue is None:
+        job_queue = JobQueue()
+    return job_queue
@@ -41,6 +41,7 @@ class TaskBase(BaseModel):
     priority: TaskPriority = TaskPriority.MEDIUM
     due_date: Optional[datetime] = None
     created_by: Optional[str] = None
+    depends_on: List[uuid.UUID] = Field(default_factory=list)
 
 
 class TaskCreate(TaskBase):
@@ -53,17 +54,45 @@ class TaskUpdate(BaseModel):
     status: Optional[TaskStatus] = None
     priority: Optional[TaskPriority] = None
     due_date: Optional[datetime] = None
+    depends_on: Optional[List[uuid.UUID]] = None
 
 
 class Task(TaskBase):
     id: uuid.UUID
     created_at: datetime
     updated_at: datetime
+    version: int = 1
     
     class Config:
         from_attributes = True
 
 
+class TaskBulkUpdate(TaskUpdate):
+    id: uuid.UUID
+    version: Optional[int] = None
+
+
+# Bulk requests carry raw items so each one is validated and reported on its own
+class BulkTaskCreateRequest(BaseModel):
+    tasks: List[Any] = Field(..., min_length=1, max_length=500)
+
+
+class BulkTaskUpdateRequest(BaseModel):
+    tasks: List[Any] = Field(..., min_length=1, max_length=500)
+
+
+class BulkTaskDeleteRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=500)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    success: bool
+    error: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+
 # File Models
 class FileBase(BaseModel):
     filename: str = Field(..., min_length=1, max_length=255)
@@ -124,10 +153,18 @@ class APIResponse(BaseModel):
 
 class TaskListResponse(APIResponse):
     data: List[Task]
+    next_cursor: Optional[str] = None
 
 
 class FileListResponse(APIResponse):
     data: List[File]
+    next_cursor: Optional[str] = None
+
+
+class BulkTaskResponse(APIResponse):
+    data: List[BulkItemResult]
+    succeeded: int
+    failed: int
 
 
 # Agent Status Models
@@ -136,6 +173,7 @@ class AgentStatus(BaseModel):
     status: str
     last_seen: datetime
     version: Optional[str] = None
+    circuit: Optional[Dict[str, Any]] = None
 
 
 class HealthCheck(BaseModel):
@@ -167,4 +205,30 @@ class SearchResponse(APIResponse):
     query: str
 
 
+# Batch Models
+class BatchSubRequest(BaseModel):
+    id: str = Field(..., min_length=1, max_length=100)
+    agent: str = "hub"
+    method: str = Field("GET", pattern="^(GET|POST|PUT|DELETE)$")
+    path: str = Field(..., pattern="^/")
+    params: Optional[Dict[str, Any]] = None
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest] = Field(..., min_length=1, max_length=50)
+
+
+class BatchItemResult(BaseModel):
+    id: str
+    status: int
+    data: Optional[Any] = None
+    error: Optional[str] = None
+    elapsed_ms: float
+
+
+class BatchResponse(APIResponse):
+    data: List[BatchItemResult]
+
+
 
@@ -0,0 +1,202 @@
+"""
+SkyRas v2 n8n Dispatcher
+Pooled, batched n8n webhook delivery with retries and a concurrency cap
+"""
+
+import os
+import time
+import random
+import asyncio
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+
+class _Batch:
+    """Payloads waiting for one workflow, plus the futures of whoever is waiting on them"""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.waiters: List[asyncio.Future] = []
+        self.started = time.monotonic()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class N8nDispatcher:
+    """Delivers workflow webhooks to n8n
+
+    Only workflows that opt in (N8N_BATCH_WORKFLOWS) are batched, and they always
+    receive {"items": [...], "count": n}, even for a single payload, so the body
+    shape never depends on timing. Payloads for such a workflow that arrive within
+    the batching window are sent as one request; the window restarts with each new
+    payload (debounce) but a batch is never held longer than max_wait or grown past
+    max_batch. Every other workflow gets each payload posted unchanged, right away.
+    Failed deliveries are retried with exponential backoff and jitter.
+    """
+
+    def __init__(self, base_url: str = None, api_key: str = None, batch_workflows: List[str] = None):
+        self.base_url = (base_url or os.getenv('N8N_URL', 'http://localhost:5678')).rstrip('/')
+        self.api_key = api_key or os.getenv('N8N_API_KEY')
+        if batch_workflows is None:
+            batch_workflows = os.getenv('N8N_BATCH_WORKFLOWS', '').split(',')
+        self.batch_workflows = {workflow.strip() for workflow in batch_workflows if workflow.strip()}
+        self.window = float(os.getenv('N8N_BATCH_WINDOW_MS', '250')) / 1000
+        self.max_wait = float(os.getenv('N8N_BATCH_MAX_WAIT_MS', '1000')) / 1000
+        self.max_batch = int(os.getenv('N8N_BATCH_MAX', '100'))
+        self.max_attempts = int(os.getenv('N8N_MAX_ATTEMPTS', '4'))
+        self.retry_base_delay = float(os.getenv('N8N_RETRY_BASE_DELAY', '0.5'))
+        self.concurrency = int(os.getenv('N8N_MAX_CONCURRENCY', '8'))
+        self.timeout = float(os.getenv('N8N_TIMEOUT', '10'))
+
+        self.client: Optional[httpx.AsyncClient] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.pending: Dict[str, _Batch] = {}
+        self.in_flight: set = set()
+        self.stats = {'dispatched': 0, 'requests': 0, 'retries': 0, 'failed': 0}
+
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
+
+    def batches(self, workflow: str) -> bool:
+        """Whether a workflow takes batched {"items", "count"} bodies"""
+        return workflow in self.batch_workflows
+
+    async def dispatch(self, workflow: str, payload: Any, wait: bool = True) -> Dict[str, Any]:
+        """Queue one payload; with wait, return once its batch has been delivered"""
+        return await self.dispatch_many(workflow, [payload], wait=wait)
+
+    async def dispatch_many(self, workflow: str, payloads: List[Any], wait: bool = True) -> Dict[str, Any]:
+        """Queue several payloads for one workflow"""
+        if not self.is_configured():
+            return {'success': False, 'error': 'n8n not configured'}
+        if not payloads:
+            return {'success': True, 'delivered': 0}
+
+        self._ensure_client()
+        loop = asyncio.get_running_loop()
+        waiters = []
+        if self.batches(workflow):
+            remaining = list(payloads)
+            while remaining:
+                batch = self.pending.get(workflow)
+                if batch is None:
+                    batch = self.pending[workflow] = _Batch()
+                room = self.max_batch - len(batch.items)
+                batch.items.extend(remaining[:room])
+                remaining = remaining[room:]
+                waiter = loop.create_future()
+                batch.waiters.append(waiter)
+                waiters.append(waiter)
+                self._schedule(workflow, batch)
+        else:
+            # Each payload is its own request, sent right away
+            for payload in payloads:
+                batch = _Batch()
+                batch.items.append(payload)
+                waiter = loop.create_future()
+                batch.waiters.append(waiter)
+                waiters.append(waiter)
+                self._start(workflow, batch)
+
+        self.stats['dispatched'] += len(payloads)
+        if not wait:
+            return {'success': True, 'queued': len(payloads)}
+
+        results = await asyncio.gather(*waiters)
+        failed = [result for result in results if not result['success']]
+        return failed[0] if failed else {'success': True, 'delivered': len(payloads)}
+
+    async def flush(self) -> None:
+        """Send everything pending now and wait for in-flight deliveries"""
+        for workflow in list(self.pending):
+            self._send_now(workflow)
+        while self.in_flight:
+            await asyncio.gather(*list(self.in_flight), return_exceptions=True)
+
+    async def close(self) -> None:
+        await self.flush()
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def _ensure_client(self) -> None:
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers={'Authorization': f'Bearer {self.api_key}'},
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            )
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+
+    def _schedule(self, workflow: str, batch: _Batch) -> None:
+        if batch.timer is not None:
+            batch.timer.cancel()
+        if len(batch.items) >= self.max_batch:
+            self._send_now(workflow)
+            return
+        delay = min(self.window, max(0.0, batch.started + self.max_wait - time.monotonic()))
+        batch.timer = asyncio.get_running_loop().call_later(delay, self._send_now, workflow)
+
+    def _send_now(self, workflow: str) -> None:
+        batch = self.pending.pop(workflow, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        self._start(workflow, batch)
+
+    def _start(self, workflow: str, batch: _Batch) -> None:
+        task = asyncio.ensure_future(self._deliver(workflow, batch))
+        self.in_flight.add(task)
+        task.add_done_callback(self.in_flight.discard)
+
+    async def _deliver(self, workflow: str, batch: _Batch) -> None:
+        body = {'items': batch.items, 'count': len(batch.items)} if self.batches(workflow) else batch.items[0]
+        try:
+            result = await self._post_with_retries(workflow, body)
+        except Exception as e:
+            result = {'success': False, 'error': f"Failed to trigger n8n: {str(e)}"}
+        if not result['success']:
+            self.stats['failed'] += len(batch.items)
+        for waiter in batch.waiters:
+            if not waiter.done():
+                waiter.set_result(result)
+
+    async def _post_with_retries(self, workflow: str, body: Any) -> Dict[str, Any]:
+        error = None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self.stats['retries'] += 1
+                delay = self.retry_base_delay * 2 ** (attempt - 1)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            try:
+                async with self.semaphore:
+                    self.stats['requests'] += 1
+                    response = await self.client.post(f"{self.base_url}/webhook/{workflow}", json=body)
+            except httpx.TransportError as e:
+                error = f"Failed to trigger n8n: {str(e)}"
+                continue
+
+            if response.status_code < 300:
+                try:
+                    return {'success': True, 'response': response.json()}
+                except ValueError:
+                    return {'success': True, 'response': response.text}
+            error = f"n8n error: {response.status_code} {response.text[:200]}"
+            # Client errors other than rate limiting won't succeed on retry
+            if response.status_code < 500 and response.status_code != 429:
+                break
+
+        print(f"❌ n8n workflow {workflow} failed: {error}")
+        return {'success': False, 'error': error}
+
+
+# Global dispatcher instance
+n8n_dispatcher = None
+
+def get_n8n_dispatcher() -> N8nDispatcher:
+    """Get or create the global n8n dispatcher instance"""
+    global n8n_dispatcher
+    if n8n_dispatcher is None:
+        n8n_dispatcher = N8nDispatcher()
+    return n8n_dispatcher
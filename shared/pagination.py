@@ -0,0 +1,86 @@
+"""
+SkyRas v2 Pagination
+Opaque keyset cursors over Redis sorted sets, newest first
+"""
+
+import json
+import base64
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def timestamp_score(value: Any) -> Optional[float]:
+    """Sorted-set score for an ISO timestamp or datetime (naive values are UTC)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def encode_cursor(score: float, member: str) -> str:
+    """Opaque cursor pointing just past (score, member)"""
+    raw = json.dumps([score, member], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Decode a cursor; raises ValueError if it was not produced by encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, member = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(score), str(member)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _after(score: float, member: str, cursor: Optional[Tuple[float, str]]) -> bool:
+    """Whether (score, member) comes after the cursor in newest-first order"""
+    return cursor is None or (score, member) < cursor
+
+
+def zset_page(client, key: str, limit: int, cursor: Optional[str] = None,
+              min_score: float = float('-inf'), max_score: float = float('inf')) -> Tuple[List[str], Optional[str]]:
+    """One page of members from a sorted set, highest score first
+
+    Each page is a bounded ZREVRANGEBYSCORE starting at the cursor's score, so the cost
+    doesn't depend on how many members the set holds or how deep the page is.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    high = min(max_score, position[0]) if position is not None else max_score
+
+    members: List[Tuple[str, float]] = []
+    offset = 0
+    while len(members) <= limit:
+        wanted = limit + 1 - len(members)
+        batch = client.zrevrangebyscore(key, high, min_score, start=offset, num=wanted, withscores=True)
+        # Members sharing the cursor's score that were already returned are skipped here
+        members.extend((member, score) for member, score in batch if _after(score, member, position))
+        if len(batch) < wanted:
+            break
+        offset += len(batch)
+
+    return _page(members, limit)
+
+
+def list_page(scored: List[Tuple[str, float]], limit: int,
+              cursor: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+    """One page from (member, score) pairs already sorted highest first"""
+    position = decode_cursor(cursor) if cursor else None
+    remaining = [(member, score) for member, score in scored if _after(score, member, position)]
+    return _page(remaining[:limit + 1], limit)
+
+
+def _page(members: List[Tuple[str, float]], limit: int) -> Tuple[List[str], Optional[str]]:
+    page = members[:limit]
+    next_cursor = None
+    if len(members) > limit:
+        member, score = page[-1]
+        next_cursor = encode_cursor(score, member)
+    return [member for member, _ in page], next_cursor
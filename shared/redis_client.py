@@ -51,6 +51,22 @@ class RedisClient:
             print(f"❌ Redis GET error: {e}")
             return None
     
+    def mget(self, keys: list) -> list:
+        """Get several values in one round trip (None for missing keys)"""
+        if not keys:
+            return []
+        try:
+            values = []
+            for value in self.client.mget(keys):
+                try:
+                    values.append(json.loads(value) if value is not None else None)
+                except (json.JSONDecodeError, TypeError):
+                    values.append(value)
+            return values
+        except Exception as e:
+            print(f"❌ Redis MGET error: {e}")
+            return [None] * len(keys)
+    
     def delete(self, key: str) -> bool:
         """Delete a key from Redis"""
         try:
@@ -128,6 +144,14 @@ class RedisClient:
             print(f"❌ Redis RPOP error: {e}")
             return None
     
+    def lrange(self, key: str, start: int, end: int) -> list:
+        """Get a range of raw values from a list"""
+        try:
+            return self.client.lrange(key, start, end)
+        except Exception as e:
+            print(f"❌ Redis LRANGE error: {e}")
+            return []
+    
     def llen(self, key: str) -> int:
         """Get the length of a list"""
         try:
@@ -136,6 +160,38 @@ class RedisClient:
             print(f"❌ Redis LLEN error: {e}")
             return 0
     
+    def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        """Add members with scores to a sorted set"""
+        try:
+            return self.client.zadd(key, mapping)
+        except Exception as e:
+            print(f"❌ Redis ZADD error: {e}")
+            return 0
+    
+    def zrem(self, key: str, *members: str) -> int:
+        """Remove members from a sorted set"""
+        try:
+            return self.client.zrem(key, *members)
+        except Exception as e:
+            print(f"❌ Redis ZREM error: {e}")
+            return 0
+    
+    def zrange(self, key: str, start: int, end: int, desc: bool = False) -> list:
+        """Get a range of members from a sorted set, lowest score first unless desc"""
+        try:
+            return self.client.zrange(key, start, end, desc=desc)
+        except Exception as e:
+            print(f"❌ Redis ZRANGE error: {e}")
+            return []
+    
+    def zcard(self, key: str) -> int:
+        """Get the number of members in a sorted set"""
+        try:
+            return self.client.zcard(key)
+        except Exception as e:
+            print(f"❌ Redis ZCARD error: {e}")
+            return 0
+    
     def keys(self, pattern: str = "*") -> list:
         """Get keys matching a pattern"""
         try:
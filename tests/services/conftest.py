@@ -0,0 +1,28 @@
+"""
+SkyRas v2 service tests
+Services import their modules flat from their own directory, so the repo root and each
+service directory go on sys.path. Redis is fakeredis with Lua support (lupa), so the
+Lua scripts run for real.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+import fakeredis
+
+ROOT = Path(__file__).resolve().parents[2]
+for path in (ROOT, ROOT / "services" / "marcus", ROOT / "services" / "giorgio"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from shared import redis_client as redis_client_module  # noqa: E402
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    """A RedisClient on a private in-memory server"""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_client_module.redis, "from_url",
+                        lambda *args, **kwargs: fakeredis.FakeRedis(server=server, decode_responses=True))
+    return redis_client_module.RedisClient("redis://fake")
@@ -0,0 +1,113 @@
+import random
+from datetime import datetime, timedelta
+
+from calendar_index import CalendarIndex, DEFAULT_EVENT_DURATION
+
+BASE = datetime(2026, 3, 2, 9, 0)
+
+
+def event(event_id, start_minutes, length_minutes=60, **extra):
+    start = BASE + timedelta(minutes=start_minutes)
+    return {"id": event_id, "start": start.isoformat(),
+            "end": (start + timedelta(minutes=length_minutes)).isoformat(), **extra}
+
+
+def ids(events):
+    return [e["id"] for e in events]
+
+
+def at(minutes):
+    return BASE + timedelta(minutes=minutes)
+
+
+def test_find_conflicts_returns_overlapping_events_earliest_first():
+    index = CalendarIndex()
+    index.load([event("late", 120), event("early", 0), event("middle", 45, 30), event("other_day", 24 * 60)])
+
+    assert ids(index.find_conflicts(at(30), at(130))) == ["early", "middle", "late"]
+    assert ids(index.find_conflicts(at(200), at(300))) == []
+
+
+def test_ranges_are_half_open():
+    index = CalendarIndex()
+    index.add(event("a", 0, 60))
+
+    # An event ending exactly when the range starts, or starting when it ends, is no conflict
+    assert index.find_conflicts(at(60), at(90)) == []
+    assert index.find_conflicts(at(-30), at(0)) == []
+    assert ids(index.find_conflicts(at(59), at(90))) == ["a"]
+
+
+def test_add_with_same_id_replaces_the_event():
+    index = CalendarIndex()
+    index.add(event("a", 0))
+    index.add(event("a", 300, title="moved"))
+
+    assert len(index) == 1
+    assert index.find_conflicts(at(0), at(60)) == []
+    assert index.find_conflicts(at(300), at(310))[0]["title"] == "moved"
+
+
+def test_remove():
+    index = CalendarIndex()
+    index.load([event("a", 0), event("b", 0), event("c", 30)])
+
+    assert index.remove("b") is True
+    assert index.remove("b") is False
+    assert ids(index.find_conflicts(at(0), at(120))) == ["a", "c"]
+
+
+def test_missing_or_inverted_end_uses_the_default_duration():
+    index = CalendarIndex()
+    index.add({"id": "open", "start": BASE.isoformat()})
+    index.add({"id": "inverted", "start": at(300).isoformat(), "end": at(200).isoformat()})
+
+    minutes = int(DEFAULT_EVENT_DURATION.total_seconds() // 60)
+    assert ids(index.find_conflicts(at(minutes - 1), at(minutes))) == ["open"]
+    assert index.find_conflicts(at(minutes), at(minutes + 1)) == []
+    assert ids(index.find_conflicts(at(300 + minutes - 1), at(400))) == ["inverted"]
+
+
+def test_next_free_slot_skips_back_to_back_events():
+    index = CalendarIndex()
+    index.load([event("a", 0, 60), event("b", 60, 30), event("c", 100, 60)])
+
+    # 10 minutes fit between b and c, 30 do not
+    assert index.next_free_slot(timedelta(minutes=10), after=at(0)) == (at(90), at(100))
+    assert index.next_free_slot(timedelta(minutes=30), after=at(0)) == (at(160), at(190))
+    assert index.next_free_slot(timedelta(minutes=30), after=at(0), until=at(150)) is None
+
+
+def test_apply_change():
+    index = CalendarIndex()
+    index.apply_change({"action": "created", "event": event("a", 0)})
+    index.apply_change({"action": "updated", "event": event("a", 120)})
+    assert ids(index.find_conflicts(at(120), at(121))) == ["a"]
+
+    index.apply_change({"action": "deleted", "event": {"id": "a"}})
+    assert len(index) == 0
+
+
+def test_matches_a_linear_scan():
+    rng = random.Random(7)
+    index = CalendarIndex()
+    events = {}
+    for i in range(400):
+        if events and rng.random() < 0.2:
+            removed = rng.choice(sorted(events))
+            index.remove(removed)
+            del events[removed]
+        else:
+            new = event(f"e{i % 300}", rng.randrange(0, 10000), rng.randrange(5, 240))
+            index.add(new)
+            events[new["id"]] = new
+
+    for _ in range(200):
+        start = rng.randrange(-100, 10100)
+        end = start + rng.randrange(1, 500)
+        expected = sorted(
+            (e for e in events.values()
+             if datetime.fromisoformat(e["start"]) < at(end) and datetime.fromisoformat(e["end"]) > at(start)),
+            key=lambda e: (datetime.fromisoformat(e["start"]), e["id"])
+        )
+        assert ids(index.find_conflicts(at(start), at(end))) == ids(expected)
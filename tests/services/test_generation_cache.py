@@ -0,0 +1,147 @@
+import os
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from generation_cache import GenerationCache, ENTRY_KEY, LRU_KEY, BYTES_KEY
+
+
+@pytest.fixture
+def cache(redis_client, tmp_path, monkeypatch):
+    monkeypatch.setenv("GIORGIO_PUBLIC_URL", "http://giorgio:8003/")
+    return GenerationCache(redis_client, cache_dir=str(tmp_path / "cache"), max_bytes=250)
+
+
+@pytest.fixture
+def asset(tmp_path):
+    def write(name, size):
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        return str(path)
+    return write
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def cached_bytes(cache):
+    return int(cache.redis_client.client.get(BYTES_KEY) or 0)
+
+
+def test_keys_depend_on_everything_that_shapes_the_output():
+    key = GenerationCache.key("elevenlabs", "hello", model="m1", voice="v1", settings={"a": 1, "b": 2})
+
+    assert key.startswith("elevenlabs:")
+    assert key == GenerationCache.key("elevenlabs", "hello", model="m1", voice="v1", settings={"b": 2, "a": 1})
+    assert key != GenerationCache.key("elevenlabs", "hello", model="m1", voice="v2", settings={"a": 1, "b": 2})
+    assert key != GenerationCache.key("elevenlabs", "hello!", model="m1", voice="v1", settings={"a": 1, "b": 2})
+
+
+def test_hit_copies_the_blob_and_drops_request_fields_and_provider_urls(cache, asset, tmp_path):
+    key = cache.key("midjourney", "castle")
+    run(cache.store(key, asset("a.png", 10), {
+        "success": True, "file_path": "/episode/a.png", "context": {"scene_number": 1},
+        "image_url": "https://cdn.example/expires", "prompt": "castle"
+    }))
+
+    destination = tmp_path / "out.png"
+    hit = run(cache.fetch(key, destination))
+
+    assert destination.read_bytes() == b"x" * 10
+    assert hit == {"prompt": "castle", "success": True, "file_path": str(destination), "cached": True, "cache_key": key}
+    assert cache.blob_url(key) == f"http://giorgio:8003/api/cache/blobs/midjourney/{key.split(':')[1]}"
+    assert cache.stats()["providers"]["midjourney"]["hits"] == 1
+
+
+def test_miss_and_force(cache, asset, tmp_path):
+    key = cache.key("suno", "song")
+    assert run(cache.fetch(key, tmp_path / "out.mp3")) is None
+
+    run(cache.store(key, asset("s.mp3", 10), {}))
+    assert run(cache.fetch(key, tmp_path / "out.mp3", force=True)) is None
+
+    counts = cache.stats()["providers"]["suno"]
+    assert (counts["misses"], counts["forced"], counts["stores"]) == (1, 1, 1)
+
+
+def test_restoring_a_key_swaps_its_size_instead_of_adding_it(cache, asset):
+    key = cache.key("midjourney", "castle")
+
+    async def stores():
+        await cache.store(key, asset("a.png", 100), {})
+        await asyncio.gather(cache.store(key, asset("b.png", 120), {}), cache.store(key, asset("c.png", 120), {}))
+
+    run(stores())
+    assert cached_bytes(cache) == 120
+    assert cache.stats()["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted_over_budget(cache, asset, tmp_path):
+    first, second, third = (cache.key("midjourney", prompt) for prompt in ("a", "b", "c"))
+    run(cache.store(first, asset("a.png", 100), {}))
+    run(cache.store(second, asset("b.png", 100), {}))
+    # Using the first entry makes the second the least recently used
+    run(cache.fetch(first, tmp_path / "out.png"))
+    second_blob = cache.blob_path(second)
+
+    run(cache.store(third, asset("c.png", 100), {}))
+
+    assert cached_bytes(cache) == 200
+    assert set(cache.redis_client.client.zrange(LRU_KEY, 0, -1)) == {first, third}
+    assert cache.blob_path(second) is None
+    assert not Path(second_blob).exists()
+    assert cache.stats()["providers"]["midjourney"]["evictions"] == 1
+
+
+def test_a_missing_blob_is_dropped_once(cache, asset, tmp_path):
+    key = cache.key("heygen", "scene")
+    run(cache.store(key, asset("v.mp4", 100), {}))
+    entry = cache.redis_client.client.hgetall(ENTRY_KEY.format(key))
+
+    # Two readers both found the blob missing; only one may count its bytes off
+    assert cache._drop(key, entry) is True
+    assert cache._drop(key, entry) is False
+    assert cached_bytes(cache) == 0
+
+
+def test_a_stale_drop_leaves_a_replaced_entry_alone(cache, asset):
+    key = cache.key("heygen", "scene")
+    run(cache.store(key, asset("v.mp4", 100), {}))
+    stale = cache.redis_client.client.hgetall(ENTRY_KEY.format(key))
+    run(cache.store(key, asset("v2.mp4", 50), {}))
+
+    assert cache._drop(key, stale) is False
+    assert cached_bytes(cache) == 50
+
+
+def test_fetch_after_the_blob_vanished_is_a_miss(cache, asset, tmp_path):
+    key = cache.key("heygen", "scene")
+    run(cache.store(key, asset("v.mp4", 100), {}))
+    os.remove(cache.blob_path(key))
+
+    assert run(cache.fetch(key, tmp_path / "out.mp4")) is None
+    assert cached_bytes(cache) == 0
+    assert cache.stats()["entries"] == 0
+
+
+def test_a_late_hit_does_not_recreate_a_dropped_entry(cache, asset):
+    key = cache.key("suno", "song")
+    run(cache.store(key, asset("s.mp3", 10), {}))
+    entry = cache.redis_client.client.hgetall(ENTRY_KEY.format(key))
+    cache._drop(key, entry)
+
+    cache.touch_script(keys=[ENTRY_KEY.format(key), LRU_KEY], args=[1, key])
+
+    assert cache.redis_client.client.exists(ENTRY_KEY.format(key)) == 0
+    assert cache.redis_client.client.zcard(LRU_KEY) == 0
+
+
+def test_disabled_cache_stores_nothing(redis_client, asset, tmp_path):
+    cache = GenerationCache(redis_client, cache_dir=str(tmp_path / "cache"), max_bytes=0)
+    key = cache.key("suno", "song")
+    run(cache.store(key, asset("s.mp3", 10), {}))
+
+    assert run(cache.fetch(key, tmp_path / "out.mp3")) is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,127 @@
+import asyncio
+
+import httpx
+import pytest
+
+from shared import governor as governor_module
+from shared.governor import Governor, ProviderGovernor, BUCKET_KEY, SLOTS_KEY
+
+
+def provider(redis_client, rate_per_minute=60, burst=2, concurrency=2):
+    return ProviderGovernor("heygen", {"rate_per_minute": rate_per_minute, "burst": burst,
+                                       "concurrency": concurrency}, redis_client)
+
+
+def acquire(governor):
+    return float(governor.acquire_script(keys=[BUCKET_KEY.format(governor.provider)],
+                                         args=[governor.rate, governor.burst]))
+
+
+def response(status, retry_after=None):
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+    return httpx.Response(status, headers=headers)
+
+
+def test_bucket_grants_the_burst_then_asks_callers_to_wait(redis_client):
+    governor = provider(redis_client, rate_per_minute=60, burst=2)
+
+    assert acquire(governor) == 0
+    assert acquire(governor) == 0
+    # One token a second; the third caller waits about that long
+    assert 0.9 < acquire(governor) <= 1.0
+
+
+def test_replicas_share_one_bucket(redis_client):
+    first, second = provider(redis_client, burst=1), provider(redis_client, burst=1)
+
+    assert acquire(first) == 0
+    assert acquire(second) > 0
+
+
+def test_429_halves_the_rate_and_honours_retry_after(redis_client):
+    governor = provider(redis_client, rate_per_minute=60)
+    key = BUCKET_KEY.format("heygen")
+
+    governor.report(response(429, retry_after=30))
+    assert float(redis_client.client.hget(key, "rate")) == pytest.approx(0.5)
+    assert 29 < acquire(governor) <= 30
+
+    # Successes raise the rate back towards the maximum and never past it
+    redis_client.client.hdel(key, "blocked_until")
+    for _ in range(50):
+        governor.report(response(200))
+    assert float(redis_client.client.hget(key, "rate")) == pytest.approx(1.0)
+    assert governor.stats()["throttled"] == 1
+
+
+def test_rate_never_drops_below_the_floor(redis_client):
+    governor = provider(redis_client, rate_per_minute=60)
+    for _ in range(20):
+        governor.report(response(429))
+    rate = float(redis_client.client.hget(BUCKET_KEY.format("heygen"), "rate"))
+    assert rate == pytest.approx(governor.min_rate)
+
+
+def test_other_errors_do_not_change_the_rate(redis_client):
+    governor = provider(redis_client)
+    governor.report(response(500))
+    assert redis_client.client.exists(BUCKET_KEY.format("heygen")) == 0
+
+
+def test_slots_cap_concurrency_and_expired_leases_free_themselves(redis_client):
+    governor = provider(redis_client, concurrency=2)
+    key = SLOTS_KEY.format("heygen")
+
+    def take(token, lease=60):
+        return governor.slot_script(keys=[key], args=[governor.concurrency, token, lease])
+
+    assert take("a") == 1
+    assert take("b", lease=-1) == 1
+    # b's lease has already run out, so c gets its slot
+    assert take("c") == 1
+    assert take("d") == 0
+    # Renewing a held slot always succeeds
+    assert take("a") == 1
+
+
+def test_slot_context_manager_limits_concurrent_generations(redis_client):
+    governor = provider(redis_client, concurrency=1)
+    active, peak = [0], [0]
+
+    async def generate():
+        async with governor.slot():
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.05)
+            active[0] -= 1
+
+    async def run():
+        await asyncio.gather(*(generate() for _ in range(3)))
+
+    asyncio.run(run())
+    assert peak[0] == 1
+    assert redis_client.client.zcard(SLOTS_KEY.format("heygen")) == 0
+
+
+def test_call_retries_429s(redis_client):
+    governor = provider(redis_client, rate_per_minute=6000, burst=10)
+    responses = [response(429), response(429), response(200)]
+
+    async def send():
+        return responses.pop(0)
+
+    assert asyncio.run(governor.call(send)).status_code == 200
+    assert responses == []
+
+
+def test_limits_come_from_defaults_config_and_environment(redis_client, tmp_path, monkeypatch):
+    config = tmp_path / "governor.yaml"
+    config.write_text("providers:\n  heygen:\n    rate_per_minute: 30\n  runway:\n    concurrency: 1\n")
+    monkeypatch.setenv("GOVERNOR_HEYGEN_CONCURRENCY", "1")
+
+    governor = Governor(redis_client, config_path=str(config))
+
+    assert governor.limits["heygen"]["rate_per_minute"] == 30
+    assert governor.limits["heygen"]["concurrency"] == 1
+    assert governor.limits["runway"]["concurrency"] == 1
+    assert governor.limits["suno"] == governor_module.DEFAULT_LIMITS["suno"]
@@ -0,0 +1,116 @@
+import json
+import time
+
+import pytest
+
+from shared import jobs
+from shared.jobs import JobQueue, ACTIVE_KEY, DEAD_KEY, JOB_KEY
+
+
+@pytest.fixture
+def queue(redis_client):
+    job_queue = JobQueue(redis_client)
+    job_queue.register("render", lambda *args: None, queue="video", max_attempts=2)
+    return job_queue
+
+
+def claimed_args(jobs_claimed):
+    return sorted(job["args"][0] for job in jobs_claimed)
+
+
+def test_claim_is_fifo_and_respects_the_queue_limit(queue):
+    queue.set_limit("video", 2)
+    for i in range(5):
+        queue.enqueue("render", i)
+
+    first = queue.claim("video", 10)
+    assert [job["args"][0] for job in first] == [0, 1]
+    # Both slots are held until a job completes
+    assert queue.claim("video", 10) == []
+
+    queue.complete(first[0])
+    assert claimed_args(queue.claim("video", 10)) == [2]
+    assert queue.stats()["video"] == {"ready": 2, "scheduled": 0, "running": 2, "dead": 0}
+
+
+def test_unlimited_queue_hands_out_each_job_once(queue):
+    for i in range(20):
+        queue.enqueue("render", i)
+
+    seen = []
+    while True:
+        batch = queue.claim("video", 3)
+        if not batch:
+            break
+        seen.extend(job["args"][0] for job in batch)
+    assert sorted(seen) == list(range(20))
+
+
+def test_expired_leases_are_handed_back(queue, monkeypatch):
+    queue.enqueue("render", "crashed")
+    monkeypatch.setattr(jobs, "LEASE_SECONDS", -1)
+    assert claimed_args(queue.claim("video", 1)) == ["crashed"]
+
+    # The worker died without completing; the next claim picks the job up again
+    monkeypatch.setattr(jobs, "LEASE_SECONDS", 60)
+    assert claimed_args(queue.claim("video", 1)) == ["crashed"]
+    assert queue.claim("video", 1) == []
+
+
+def test_delayed_jobs_wait_until_due(queue):
+    queue.enqueue("render", "later", delay=0.2)
+    assert queue.claim("video", 1) == []
+    time.sleep(0.25)
+    assert claimed_args(queue.claim("video", 1)) == ["later"]
+
+
+def test_failed_jobs_retry_then_go_dead(queue, monkeypatch, redis_client):
+    monkeypatch.setattr(jobs, "RETRY_BASE_DELAY", 0)
+    queue.enqueue("render", "flaky")
+
+    job = queue.claim("video", 1)[0]
+    assert queue.fail(job, "first") is True
+    job = queue.claim("video", 1)[0]
+    assert job["attempts"] == 1 and job["last_error"] == "first"
+
+    assert queue.fail(job, "second") is False
+    assert queue.claim("video", 1) == []
+    assert redis_client.client.lrange(DEAD_KEY.format("video"), 0, -1) == [job["id"]]
+
+
+def test_claimed_ids_without_a_job_document_are_released(queue, redis_client):
+    job_id = queue.enqueue("render", "orphan")
+    redis_client.client.delete(JOB_KEY.format(job_id))
+
+    assert queue.claim("video", 1) == []
+    assert redis_client.client.zcard(ACTIVE_KEY.format("video")) == 0
+
+
+def test_a_worker_that_lost_its_lease_changes_nothing(queue, monkeypatch, redis_client):
+    queue.enqueue("render", "slow")
+    monkeypatch.setattr(jobs, "LEASE_SECONDS", -1)
+    stale = queue.claim("video", 1)[0]
+
+    # The lease ran out and another worker picked the job up
+    monkeypatch.setattr(jobs, "LEASE_SECONDS", 60)
+    current = queue.claim("video", 1)[0]
+
+    assert queue.complete(stale) is False
+    assert queue.fail(stale, "late") is None
+    assert redis_client.client.zcard(ACTIVE_KEY.format("video")) == 1
+    assert json.loads(redis_client.client.get(JOB_KEY.format(current["id"])))["attempts"] == 0
+
+    assert queue.complete(current) is True
+    assert redis_client.client.exists(JOB_KEY.format(current["id"])) == 0
+    assert queue.stats()["video"] == {"ready": 0, "scheduled": 0, "running": 0, "dead": 0}
+
+
+def test_the_lease_token_is_not_stored_with_the_job(queue, monkeypatch, redis_client):
+    monkeypatch.setattr(jobs, "RETRY_BASE_DELAY", 0)
+    queue.enqueue("render", "flaky")
+
+    job = queue.claim("video", 1)[0]
+    queue.fail(job, "first")
+
+    assert "lease_token" not in json.loads(redis_client.client.get(JOB_KEY.format(job["id"])))
+    assert queue.claim("video", 1)[0]["lease_token"] != job["lease_token"]
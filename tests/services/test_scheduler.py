@@ -0,0 +1,98 @@
+from scheduler import TaskScheduler
+
+
+def task(task_id, priority="medium", status="pending", due_date=None, depends_on=(), created_at="2026-03-01T09:00:00"):
+    return {"id": task_id, "title": task_id, "priority": priority, "status": status, "due_date": due_date,
+            "depends_on": list(depends_on), "created_at": created_at}
+
+
+def next_ids(scheduler, n=10):
+    return [t["id"] for t in scheduler.next(n)]
+
+
+def test_orders_by_priority_then_due_date_then_age():
+    scheduler = TaskScheduler()
+    scheduler.load([
+        task("low", priority="low"),
+        task("old_medium", created_at="2026-01-01T00:00:00"),
+        task("new_medium", created_at="2026-02-01T00:00:00"),
+        task("due_medium", due_date="2026-03-05T00:00:00", created_at="2026-02-15T00:00:00"),
+        task("urgent", priority="urgent"),
+    ])
+
+    assert next_ids(scheduler) == ["urgent", "due_medium", "old_medium", "new_medium", "low"]
+    # next() does not claim anything
+    assert next_ids(scheduler, 2) == ["urgent", "due_medium"]
+
+
+def test_dependents_wait_until_their_prerequisites_close():
+    scheduler = TaskScheduler()
+    scheduler.load([task("a"), task("b", priority="urgent", depends_on=["a"]), task("c", depends_on=["b"])])
+    assert next_ids(scheduler) == ["a"]
+
+    scheduler.upsert(task("a", status="completed"))
+    assert next_ids(scheduler) == ["b"]
+
+    scheduler.remove("b")
+    assert next_ids(scheduler) == ["c"]
+
+
+def test_in_progress_tasks_block_but_are_not_offered():
+    scheduler = TaskScheduler()
+    scheduler.load([task("a"), task("b", depends_on=["a"])])
+
+    scheduler.upsert(task("a", status="in-progress"))
+    assert next_ids(scheduler) == []
+
+    scheduler.upsert(task("a", status="pending"))
+    assert next_ids(scheduler) == ["a"]
+
+
+def test_unknown_prerequisites_count_as_done():
+    scheduler = TaskScheduler()
+    scheduler.upsert(task("b", depends_on=["gone"]))
+    assert next_ids(scheduler) == ["b"]
+
+
+def test_updates_replace_the_heap_entry():
+    scheduler = TaskScheduler()
+    scheduler.load([task("a", priority="low"), task("b")])
+    scheduler.upsert(task("a", priority="urgent"))
+    scheduler.upsert(task("b", depends_on=["a"]))
+
+    assert next_ids(scheduler) == ["a"]
+    assert len(scheduler) == 2
+
+
+def test_file_links_make_consumers_wait_for_producers():
+    scheduler = TaskScheduler()
+    scheduler.load([task("render"), task("edit")], file_links={"f1:render": "output", "f1:edit": "input"})
+    assert next_ids(scheduler) == ["render"]
+
+    scheduler.upsert(task("render", status="completed"))
+    assert next_ids(scheduler) == ["edit"]
+
+    scheduler.upsert(task("render2"))
+    scheduler.link_file("render2", "f1", "output")
+    assert next_ids(scheduler) == ["render2"]
+
+
+def test_creates_cycle():
+    scheduler = TaskScheduler()
+    scheduler.load([task("a"), task("b", depends_on=["a"]), task("c", depends_on=["b"])])
+
+    assert scheduler.creates_cycle("a", ["c"])
+    assert scheduler.creates_cycle("a", ["a"])
+    assert not scheduler.creates_cycle("c", ["a"])
+
+
+def test_creates_cycle_uses_pending_edges_in_place_of_tracked_ones():
+    scheduler = TaskScheduler()
+    scheduler.load([task("a"), task("b"), task("c", depends_on=["b"])])
+
+    # An earlier item of the same bulk update made b depend on a
+    assert scheduler.creates_cycle("a", ["c"], pending={"b": ["a"]})
+    # ...or cut c loose from b
+    scheduler.upsert(task("b", depends_on=["a"]))
+    assert scheduler.creates_cycle("a", ["c"])
+    assert not scheduler.creates_cycle("a", ["c"], pending={"c": []})
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from task_graph import TaskGraph, GenerationJob
+
+
+def job(job_id, depends_on=(), delay=0.0, result=None, error=None, log=None):
+    async def run(inputs):
+        if log is not None:
+            log.append(("start", job_id, sorted(inputs)))
+        await asyncio.sleep(delay)
+        if error:
+            raise RuntimeError(error)
+        return result or {"success": True, "job": job_id, "inputs": inputs}
+    return GenerationJob(job_id, job_id.split(":")[-1], 1, run, depends_on=list(depends_on))
+
+
+async def collect(graph):
+    return [(j.id, result) async for j, result in graph.run()]
+
+
+def test_yields_in_completion_order_and_passes_dependency_results():
+    graph = TaskGraph()
+    graph.add(job("midjourney", delay=0.02, result={"success": True, "image_url": "http://img"}))
+    graph.add(job("heygen", depends_on=["midjourney"]))
+    graph.add(job("elevenlabs"))
+
+    results = asyncio.run(collect(graph))
+
+    assert [job_id for job_id, _ in results] == ["elevenlabs", "midjourney", "heygen"]
+    assert results[2][1]["inputs"] == {"midjourney": {"success": True, "image_url": "http://img"}}
+
+
+def test_independent_jobs_run_concurrently():
+    graph = TaskGraph()
+    for i in range(5):
+        graph.add(job(f"scene_{i}:suno", delay=0.1))
+
+    async def timed():
+        started = asyncio.get_running_loop().time()
+        await collect(graph)
+        return asyncio.get_running_loop().time() - started
+
+    assert asyncio.run(timed()) < 0.3
+
+
+def test_a_failed_dependency_is_passed_on_rather_than_blocking():
+    graph = TaskGraph()
+    graph.add(job("midjourney", error="boom"))
+    graph.add(job("heygen", depends_on=["midjourney"]))
+
+    results = dict(asyncio.run(collect(graph)))
+
+    assert results["midjourney"] == {"success": False, "error": "midjourney failed: boom"}
+    assert results["heygen"]["inputs"]["midjourney"]["success"] is False
+
+
+def test_validate_rejects_unknown_dependencies_cycles_and_duplicates():
+    graph = TaskGraph()
+    graph.add(job("a", depends_on=["missing"]))
+    with pytest.raises(ValueError, match="unknown"):
+        graph.validate()
+
+    graph = TaskGraph()
+    graph.add(job("a", depends_on=["b"]))
+    graph.add(job("b", depends_on=["a"]))
+    with pytest.raises(ValueError, match="cycle"):
+        graph.validate()
+
+    with pytest.raises(ValueError, match="Duplicate"):
+        graph.add(job("a"))
+
+
+def test_closing_the_stream_cancels_running_jobs():
+    cancelled = []
+
+    async def slow(inputs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    graph = TaskGraph()
+    graph.add(job("fast"))
+    graph.add(GenerationJob("slow", "heygen", 1, slow))
+
+    async def first_only():
+        stream = graph.run()
+        first = await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0)
+        return first[0].id
+
+    assert asyncio.run(first_only()) == "fast"
+    assert cancelled == [True]
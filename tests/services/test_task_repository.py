@@ -0,0 +1,84 @@
+import json
+import uuid
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from shared.models import Task
+from task_index import STATUS_KEY
+from task_repository import TaskRepository, DELETED_KEY
+
+
+@pytest.fixture
+def repository(redis_client, monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    return TaskRepository(redis_client)
+
+
+def new_task(title="Storyboard", **fields):
+    now = datetime.utcnow()
+    return Task(id=str(uuid.uuid4()), title=title, created_at=now, updated_at=now, **fields).model_dump(mode="json")
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_save_bumps_the_version_and_moves_the_index(repository, redis_client):
+    task = new_task()
+    run(repository.add([task]))
+
+    stored = run(repository.get(task["id"]))
+    updated = {**stored, "status": "in-progress"}
+    assert run(repository.save([(stored, updated)])) == []
+
+    assert run(repository.get(task["id"]))["version"] == 2
+    assert redis_client.client.sismember(STATUS_KEY.format("in-progress"), task["id"])
+    assert not redis_client.client.sismember(STATUS_KEY.format("pending"), task["id"])
+
+
+def test_the_second_writer_from_the_same_version_loses(repository):
+    task = new_task()
+    run(repository.add([task]))
+    stored = run(repository.get(task["id"]))
+
+    first = run(repository.save([(stored, {**stored, "title": "first"})]))
+    second = run(repository.save([(stored, {**stored, "title": "second"})]))
+
+    assert (first, second) == ([], [task["id"]])
+    assert run(repository.get(task["id"]))["title"] == "first"
+
+
+def test_a_bulk_save_writes_the_winners_and_reports_the_rest(repository):
+    winner, loser, deleted = new_task("a"), new_task("b"), new_task("c")
+    run(repository.add([winner, loser, deleted]))
+    stored = {task["id"]: run(repository.get(task["id"])) for task in (winner, loser, deleted)}
+
+    run(repository.save([(stored[loser["id"]], {**stored[loser["id"]], "priority": "high"})]))
+    run(repository.remove([stored[deleted["id"]]]))
+
+    conflicts = run(repository.save([(task, {**task, "priority": "low"}) for task in stored.values()]))
+
+    assert sorted(conflicts) == sorted([loser["id"], deleted["id"]])
+    assert run(repository.get(winner["id"]))["priority"] == "low"
+    assert run(repository.get(loser["id"]))["priority"] == "high"
+
+
+def test_cache_never_replaces_a_newer_version(repository, redis_client):
+    task = new_task()
+    repository._cache([{**task, "version": 3, "title": "newer"}])
+    repository._cache([{**task, "version": 2, "title": "older"}])
+    assert json.loads(redis_client.client.get(f"task:{task['id']}"))["title"] == "newer"
+
+    repository._cache([{**task, "version": 4, "title": "newest"}])
+    assert json.loads(redis_client.client.get(f"task:{task['id']}"))["title"] == "newest"
+
+
+def test_cache_never_brings_back_a_deleted_task(repository, redis_client):
+    task = new_task()
+    redis_client.client.set(DELETED_KEY.format(task["id"]), 1)
+
+    repository._cache([task])
+
+    assert redis_client.client.get(f"task:{task['id']}") is None
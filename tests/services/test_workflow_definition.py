@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest
+
+from workflow_engine import WorkflowDefinition, WorkflowDefinitionError
+
+WORKFLOWS_DIR = Path(__file__).resolve().parents[2] / "workflows"
+
+
+def spec(*states, **extra):
+    return {"id": "test", "states": list(states), **extra}
+
+
+def test_dependencies_come_from_produced_artifacts_and_emitted_events():
+    definition = WorkflowDefinition(spec(
+        {"name": "brief", "produces": ["brief"]},
+        {"name": "generate", "requires": "brief", "emits_event": "asset.generated"},
+        {"name": "catalog", "requires": ["asset.generated", "feedback"], "produces": "bundle"},
+        {"name": "publish", "requires": ["bundle", "brief"]},
+    ))
+
+    assert definition.depends_on == {
+        "brief": set(),
+        "generate": {"brief"},
+        "catalog": {"generate"},
+        "publish": {"catalog", "brief"},
+    }
+    # Nothing produces feedback, so it has to be provided to the run
+    assert definition.external["catalog"] == {"feedback"}
+    assert definition.order == ["brief", "generate", "catalog", "publish"]
+    assert definition.downstream("generate") == {"generate", "catalog", "publish"}
+
+
+def test_order_is_topological_regardless_of_file_order():
+    definition = WorkflowDefinition(spec(
+        {"name": "last", "requires": "middle_out"},
+        {"name": "middle", "requires": "first_out", "produces": "middle_out"},
+        {"name": "first", "produces": "first_out"},
+    ))
+    assert definition.order == ["first", "middle", "last"]
+
+
+def test_a_state_requiring_its_own_output_does_not_depend_on_itself():
+    definition = WorkflowDefinition(spec({"name": "loop", "requires": "draft", "produces": "draft"}))
+    assert definition.depends_on["loop"] == set()
+
+
+@pytest.mark.parametrize("bad, message", [
+    ({"states": []}, "no id"),
+    (spec({"name": "a"}, {"name": "a"}), "Duplicate state"),
+    (spec({"name": "a", "requires": "b_out", "produces": "a_out"},
+          {"name": "b", "requires": "a_out", "produces": "b_out"}), "cycle"),
+    (spec({"name": "a", "decision_points": [{"if": "x", "then": {"reroute_to": "nowhere"}}]}), "unknown state"),
+])
+def test_invalid_workflows_are_rejected(bad, message):
+    with pytest.raises(WorkflowDefinitionError, match=message):
+        WorkflowDefinition(bad)
+
+
+def test_repository_workflows_compile():
+    paths = sorted(WORKFLOWS_DIR.glob("*.y*ml"))
+    assert paths
+    for path in paths:
+        definition = WorkflowDefinition.from_file(str(path))
+        assert set(definition.order) == set(definition.states)
+
+
+def test_skysky_episode_workflow_shape():
+    definition = WorkflowDefinition.from_file(str(WORKFLOWS_DIR / "skysky_episode.yaml"))
+
+    assert definition.order[0] == "brief_intake"
+    assert definition.depends_on["qc_and_notes"] == {"asset_catalog"}
+    assert definition.external["qc_and_notes"] == {"feedback"}
+    assert definition.decisions["qc_and_notes"] == [{"if": "blockers_present", "reroute_to": "scene_generation"}]
+    assert definition.tool_concurrency["heygen"] == 2
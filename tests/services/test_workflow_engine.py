@@ -0,0 +1,209 @@
+import json
+import asyncio
+
+import pytest
+
+import workflow_engine
+from workflow_engine import WorkflowEngine, WorkflowDefinition, RUN_KEY, RUN_INBOX_KEY, RUN_LEASE_KEY
+
+
+class RecordingBus:
+    def __init__(self):
+        self.events = []
+
+    async def create_event(self, event_type, agent, data):
+        return event_type
+
+    async def publish(self, event):
+        self.events.append(event)
+
+
+@pytest.fixture
+def engine(redis_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(workflow_engine, "POLL_INTERVAL", 0.01)
+    return WorkflowEngine(redis_client, event_bus=RecordingBus(), workflows_dir=str(tmp_path))
+
+
+def define(engine, *states):
+    engine.definitions["test"] = WorkflowDefinition({"id": "test", "states": list(states)})
+
+
+def run_workflow(engine, timeout=5):
+    """Start the test workflow and drive it until the driver stops"""
+    async def drive():
+        started = await engine.start("test")
+        run_id = started["run"]["id"]
+        await asyncio.wait_for(engine.drivers[run_id], timeout)
+        return engine.get_run(run_id)
+    return asyncio.run(drive())
+
+
+def save_run(redis_client, run_id, status):
+    redis_client.client.set(RUN_KEY.format(run_id), json.dumps({"id": run_id, "status": status}))
+
+
+def inbox(redis_client, run_id):
+    return [json.loads(message) for message in redis_client.client.lrange(RUN_INBOX_KEY.format(run_id), 0, -1)]
+
+
+def test_inputs_are_queued_for_unfinished_runs(engine, redis_client):
+    save_run(redis_client, "r1", "waiting")
+
+    assert engine.provide("r1", "feedback", {"blockers": []}) == {"success": True}
+    assert inbox(redis_client, "r1") == [{"type": "artifact", "name": "feedback", "value": {"blockers": []}}]
+
+
+@pytest.mark.parametrize("status", ["completed", "failed"])
+def test_finished_runs_refuse_inputs_and_results(engine, redis_client, status):
+    save_run(redis_client, "r1", status)
+
+    assert engine.provide("r1", "feedback", {})["finished"] is True
+    assert engine.complete_state("r1", "asset_catalog", {"asset_bundle": {}})["success"] is False
+    assert inbox(redis_client, "r1") == []
+
+
+def test_unknown_runs_are_not_found(engine, redis_client):
+    result = engine.provide("missing", "feedback", {})
+
+    assert result == {"success": False, "error": "Workflow run not found"}
+    assert not redis_client.client.exists(RUN_INBOX_KEY.format("missing"))
+
+
+def test_states_run_in_dependency_order_and_independent_ones_overlap(engine):
+    define(engine,
+           {"name": "brief", "produces": "brief"},
+           {"name": "images", "requires": "brief", "produces": "images"},
+           {"name": "voice", "requires": "brief", "produces": "voice"},
+           {"name": "edit", "requires": ["images", "voice"]})
+    log, active, peak = [], [0], [0]
+
+    def action(name):
+        async def act(run, spec):
+            log.append(name)
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.05)
+            active[0] -= 1
+            return {"success": True, name: f"{name} output"}
+        return act
+
+    for name in ("brief", "images", "voice", "edit"):
+        engine.register_state(name, action(name))
+
+    run = run_workflow(engine)
+
+    assert run["status"] == "completed"
+    assert log[0] == "brief" and log[-1] == "edit"
+    assert peak[0] == 2
+    assert run["artifacts"]["images"] == "images output"
+    assert engine.event_bus.events[-1] == "workflow.completed"
+
+
+def test_a_reroute_reruns_the_target_and_cancels_its_running_dependents(engine):
+    define(engine,
+           {"name": "draft", "produces": "draft"},
+           {"name": "render", "requires": "draft", "produces": "render"},
+           {"name": "review", "requires": "draft",
+            "decision_points": [{"if": "needs_changes", "then": {"reroute_to": "draft"}}]})
+    calls = {"draft": 0, "render": 0, "review": 0}
+    cancelled = []
+
+    async def draft(run, spec):
+        calls["draft"] += 1
+        return {"success": True, "draft": calls["draft"]}
+
+    async def render(run, spec):
+        calls["render"] += 1
+        attempt, source = calls["render"], run["artifacts"]["draft"]
+        try:
+            # The first render is still going when the review asks for changes,
+            # and would finish before the second one
+            await asyncio.sleep(0.1 if attempt == 1 else 0.3)
+        except asyncio.CancelledError:
+            cancelled.append(attempt)
+            raise
+        return {"success": True, "render": f"render of draft {source}"}
+
+    async def review(run, spec):
+        calls["review"] += 1
+        return {"success": True, "needs_changes": calls["review"] == 1}
+
+    engine.register_state("draft", draft)
+    engine.register_state("render", render)
+    engine.register_state("review", review)
+
+    run = run_workflow(engine)
+
+    assert run["status"] == "completed"
+    assert run["reroutes"] == 1
+    assert calls == {"draft": 2, "render": 2, "review": 2}
+    assert cancelled == [1]
+    assert run["artifacts"]["render"] == "render of draft 2"
+
+
+def test_reroutes_stop_after_the_limit(engine, monkeypatch):
+    monkeypatch.setattr(workflow_engine, "MAX_REROUTES", 2)
+    define(engine,
+           {"name": "draft", "produces": "draft"},
+           {"name": "review", "requires": "draft",
+            "decision_points": [{"if": "needs_changes", "then": {"reroute_to": "draft"}}]})
+
+    async def draft(run, spec):
+        return {"success": True}
+
+    async def review(run, spec):
+        return {"success": True, "needs_changes": True}
+
+    engine.register_state("draft", draft)
+    engine.register_state("review", review)
+
+    run = run_workflow(engine)
+
+    assert run["status"] == "failed"
+    assert run["reroutes"] == 2
+    assert "after 2 reroutes" in run["error"]
+
+
+@pytest.mark.parametrize("new_owner", ["another-process", None])
+def test_a_driver_that_loses_its_lease_stops_without_taking_it_back(engine, redis_client, monkeypatch, new_owner):
+    monkeypatch.setattr(workflow_engine, "LEASE_SECONDS", 0.3)
+    define(engine, {"name": "slow", "produces": "out"})
+    stopped = []
+
+    async def slow(run, spec):
+        lease = RUN_LEASE_KEY.format(run["id"])
+        if new_owner:
+            redis_client.client.set(lease, new_owner)
+        else:
+            redis_client.client.delete(lease)
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            stopped.append(True)
+            raise
+        return {"success": True}
+
+    engine.register_state("slow", slow)
+
+    run = run_workflow(engine, timeout=2)
+
+    assert stopped == [True]
+    assert run["status"] == "running"
+    assert redis_client.client.get(RUN_LEASE_KEY.format(run["id"])) == new_owner
+
+
+def test_only_the_owner_renews_or_releases_a_lease(engine, redis_client):
+    lease = RUN_LEASE_KEY.format("r1")
+    redis_client.client.set(lease, engine.owner)
+    assert engine._renew("r1") is True
+    assert redis_client.client.pttl(lease) > 0
+
+    redis_client.client.set(lease, "another-process")
+    assert engine._renew("r1") is False
+    engine._release("r1")
+    assert redis_client.client.get(lease) == "another-process"
+
+    redis_client.client.set(lease, engine.owner)
+    engine._release("r1")
+    assert redis_client.client.exists(lease) == 0
+    assert engine._renew("r1") is False